@@ -1,17 +1,36 @@
 """
 Web interface for the nanozyme multi-agent framework.
 """
-from flask import Flask, render_template, request
+import json
+import uuid
+from flask import Flask, Response, jsonify, render_template, request, session
 from src.framework import SimpleReActFramework
+from src.models.registry import get_model_registry
+from src.services.framework_pool import FrameworkPool
+from src.services.jobs import JobManager
+from src.services.metrics import get_metrics
 from src.utils.logger import setup_logger
+from config.settings import JOB_CONFIG, MODEL_REGISTRY_CONFIG
 
 import os
 os.environ['HTTPS_PROXY'] = "http://127.0.0.1:7890"
 os.environ['HTTP_PROXY'] = "http://127.0.0.1:7890"
 
 app = Flask(__name__)
+# Only used to sign the session cookie that ties a browser to its warm framework
+app.secret_key = os.environ.get('FLASK_SECRET_KEY') or os.urandom(32)
 logger = setup_logger("nanozyme_framework.web")
 
+# Warm frameworks per browser session and API key; datasets they load are shared
+framework_pool = FrameworkPool(lambda api_key: SimpleReActFramework(openai_api_key=api_key))
+
+# Queries submitted as background jobs run here, at most MAX_WORKERS at a time
+job_manager = JobManager()
+
+# Optionally load models before the first request instead of on first use
+if MODEL_REGISTRY_CONFIG['PRELOAD']:
+    get_model_registry().preload(MODEL_REGISTRY_CONFIG['PRELOAD_PATHS'])
+
 def format_result(result_text):
     """Format result text to reduce excessive indentation and improve readability"""
     if not result_text:
@@ -54,11 +73,11 @@ def analyze():
         return render_template('index.html', error="Please enter a query.")
     
     try:
-        # 初始化框架，使用提供的API密钥
-        react_framework = SimpleReActFramework(openai_api_key=api_key)
-        
-        # 运行查询
-        result = react_framework.run(query)
+        # 复用该会话的框架实例，使用提供的API密钥
+        session_id = session.setdefault('session_id', uuid.uuid4().hex)
+        with framework_pool.session(api_key, session_id) as react_framework:
+            # 运行查询
+            result = react_framework.run(query)
         
         # Format result to improve readability
         formatted_result = format_result(result)
@@ -71,5 +90,81 @@ def analyze():
         logger.error(f"Error processing query: {str(e)}")
         return render_template('index.html', error=f"Error during processing: {str(e)}")
 
+@app.route('/metrics')
+def metrics():
+    """Expose tool, LLM, cache and query metrics in Prometheus text format."""
+    return Response(get_metrics().render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """Queue a query and return its job id immediately."""
+    query = request.form.get('query', '')
+    api_key = request.form.get('api_key', '').strip()
+
+    if not api_key:
+        return jsonify(error="API key is required to use this system."), 400
+    if not query:
+        return jsonify(error="Please enter a query."), 400
+
+    # The session cookie is only readable inside the request, so capture it now
+    session_id = session.setdefault('session_id', uuid.uuid4().hex)
+
+    def run_query(progress):
+        with framework_pool.session(api_key, session_id) as react_framework:
+            return format_result(react_framework.run(query, step_callback=progress))
+
+    job = job_manager.submit(query[:200], run_query)
+    logger.info(f"Query queued as job {job.id}: {query[:50]}...")
+    return jsonify(job_id=job.id, status=job.status), 202
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Return the status and progress events of a job."""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify(error="Unknown job"), 404
+    return jsonify(job.to_dict())
+
+@app.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    """Return the result of a finished job."""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify(error="Unknown job"), 404
+    if not job.finished:
+        return jsonify(status=job.status, error="Job has not finished yet"), 409
+    return jsonify(status=job.status, result=job.result, error=job.error)
+
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    """Stream the progress events of a job as server-sent events."""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify(error="Unknown job"), 404
+
+    def stream():
+        seen = 0
+        while True:
+            events = job.wait_for_events(seen, JOB_CONFIG['EVENT_POLL_SECONDS'])
+            for event in events:
+                yield f"event: {event['event']}\ndata: {json.dumps(event, default=str)}\n\n"
+            seen += len(events)
+            if job.finished and seen == len(job.events):
+                break
+            if not events:
+                # Keep proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+
+    return Response(stream(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """Request cancellation of a queued or running job."""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify(error="Unknown job"), 404
+    cancelled = job_manager.cancel(job_id)
+    return jsonify(job_id=job_id, status=job.status, cancel_requested=cancelled)
+
 if __name__ == "__main__":
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,76 @@
+"""
+Benchmark script for the material screening pipeline.
+"""
+import os
+import argparse
+from datetime import datetime
+
+from src.benchmark.profiler import environment_info, write_results
+from src.benchmark.startup import format_startup, startup_report
+from src.benchmark.suite import BenchmarkSuite, DEFAULT_RULE, OPTIONAL_STAGES, format_summary
+from src.utils.logger import setup_logger
+from config.settings import BENCHMARK_CONFIG, TRAINING_CONFIG
+
+logger = setup_logger("material_analysis.benchmark")
+
+def parse_arguments():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Benchmark the material screening pipeline on synthetic formulas')
+
+    parser.add_argument('--rows', type=int, nargs='+', default=BENCHMARK_CONFIG['SIZES'],
+                        help=f'Dataset sizes to benchmark (default: {BENCHMARK_CONFIG["SIZES"]})')
+    parser.add_argument('--model-path', type=str, default=TRAINING_CONFIG['MODEL_OUTPUT_PATH'],
+                        help=f'Model used for prediction (default: {TRAINING_CONFIG["MODEL_OUTPUT_PATH"]})')
+    parser.add_argument('--rule', type=str, default=DEFAULT_RULE,
+                        help=f'Element rule for the matching stages (default: {DEFAULT_RULE})')
+    parser.add_argument('--format', type=str, default='csv', choices=['csv', 'parquet', 'feather'],
+                        help='Format of the generated screening file (default: csv)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the synthetic data (default: 0)')
+    parser.add_argument('--pymatgen-limit', type=int, default=BENCHMARK_CONFIG['PYMATGEN_LIMIT'],
+                        help=f'Maximum rows for the pymatgen conversion stage (default: {BENCHMARK_CONFIG["PYMATGEN_LIMIT"]})')
+    parser.add_argument('--train-rows', type=int, default=BENCHMARK_CONFIG['TRAIN_ROWS'],
+                        help=f'Rows for the training stage, 0 to skip (default: {BENCHMARK_CONFIG["TRAIN_ROWS"]})')
+    parser.add_argument('--train-iterations', type=int, default=BENCHMARK_CONFIG['TRAIN_ITERATIONS'],
+                        help=f'Boosting iterations for the training stage (default: {BENCHMARK_CONFIG["TRAIN_ITERATIONS"]})')
+    parser.add_argument('--skip', type=str, nargs='*', default=[], choices=OPTIONAL_STAGES, metavar='STAGE',
+                        help=f'Stages to leave out: {", ".join(OPTIONAL_STAGES)}')
+    parser.add_argument('--feature-cache', action='store_true',
+                        help='Use the on-disk feature cache (off by default so runs are comparable)')
+    parser.add_argument('--startup', action='store_true',
+                        help='Only measure cold start of the entry points, with an import time breakdown')
+    parser.add_argument('--startup-runs', type=int, default=BENCHMARK_CONFIG['STARTUP_RUNS'],
+                        help=f'Fresh interpreters per entry point for --startup (default: {BENCHMARK_CONFIG["STARTUP_RUNS"]})')
+    parser.add_argument('--output', type=str, default=None,
+                        help=f'JSON results file (default: {BENCHMARK_CONFIG["OUTPUT_DIR"]}/<timestamp>.json)')
+
+    return parser.parse_args()
+
+def main():
+    """Main function to run the benchmark."""
+    args = parse_arguments()
+    output = args.output or os.path.join(BENCHMARK_CONFIG['OUTPUT_DIR'],
+                                         f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+
+    if args.startup:
+        report = startup_report(runs=args.startup_runs)
+        write_results({'environment': environment_info(), 'startup': report}, output)
+        print(format_startup(report))
+        print(f"Results written to: {output}")
+        logger.info(f"Startup results written to {output}")
+        return
+
+    if not os.path.exists(args.model_path):
+        print(f"Error: Model file not found: {args.model_path}")
+        return
+
+    suite = BenchmarkSuite(args.model_path, seed=args.seed, rule=args.rule, input_format=args.format,
+                           pymatgen_limit=args.pymatgen_limit, skip=args.skip, feature_cache=args.feature_cache)
+    results = suite.run(args.rows, train_rows=args.train_rows, train_iterations=args.train_iterations)
+
+    write_results(results, output)
+    print(format_summary(results))
+    print(f"Results written to: {output}")
+    logger.info(f"Benchmark results written to {output}")
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 """
 Configuration settings for the material analysis framework.
 """
+import os
 
 # API settings
 DEFAULT_BASE_URL = "https://api.openai.com/v1"
@@ -15,6 +16,7 @@ AGENT_TYPE = "CONVERSATIONAL_REACT_DESCRIPTION"
 MEMORY_KEY = "chat_history"
 
 # Get API key from environment or use default
+API_KEY = os.environ.get("OPENAI_API_KEY")
 
 # Training configuration
 TRAINING_CONFIG = {
@@ -27,6 +29,156 @@ TRAINING_CONFIG = {
         'iterations': 1000,
         'learning_rate': 0.05,
         'depth': 6,
+        'l2_leaf_reg': 3,
         'loss_function': 'Logloss'
+    },
+    # Featurized rows of each training file, so reruns only featurize new formulas
+    'FEATURE_SNAPSHOT_DIR': './cache/training',
+    # train.py --incremental: continue the saved model when few rows changed
+    'WARM_START': {
+        'ITERATIONS': 100,
+        'MAX_CHANGED_FRACTION': 0.1,
+        'MAX_TREES': 2000
     }
-} 
\ No newline at end of file
+} 
+
+# Hyperparameter search configuration (train.py --search)
+SEARCH_CONFIG = {
+    'GRID': {
+        'learning_rate': [0.03, 0.05, 0.1],
+        'depth': [4, 6, 8],
+        'l2_leaf_reg': [1, 3, 10]
+    },
+    'N_FOLDS': 5,
+    'MAX_ITERATIONS': 2000,
+    'EARLY_STOPPING_ROUNDS': 50,
+    'TIME_BUDGET_SECONDS': 600,
+    'MAX_CANDIDATES': None,
+    'N_JOBS': None
+}
+
+# Feature cache configuration
+FEATURE_CACHE_CONFIG = {
+    'ENABLED': True,
+    'CACHE_DIR': './cache/features',
+    'MAX_BYTES': 2 * 1024 ** 3
+}
+
+# Composition parser configuration
+COMPOSITION_PARSER_CONFIG = {
+    'N_JOBS': None,
+    'CHUNK_SIZE': 50000
+}
+
+# Model registry configuration
+MODEL_REGISTRY_CONFIG = {
+    'MAX_MODELS': 4,
+    'VERIFY_HASH': False,
+    'PRELOAD': False,
+    'PRELOAD_PATHS': [TRAINING_CONFIG['MODEL_OUTPUT_PATH']]
+}
+
+# Streaming screening configuration
+SCREENING_CONFIG = {
+    'CHUNK_SIZE': 100000,
+    'MAX_MEMORY_MB': 512,
+    # Share of MAX_MEMORY_MB for predictions remembered across chunks; a file with more distinct
+    # compositions than fit is still screened, but its predictions are not stored for the next run
+    'MEMO_MEMORY_FRACTION': 0.25,
+    # Predictions stored per input file and model version, so re-screening only predicts new rows
+    'INCREMENTAL': True,
+    'MANIFEST_DIR': './cache/screening'
+}
+
+# Multi-model prediction configuration (ensemble_predict)
+# AGGREGATE: which of mean, vote and max becomes the 'pred' column used for ranking
+ENSEMBLE_CONFIG = {
+    'N_JOBS': None,
+    'VOTE_THRESHOLD': 0.5,
+    'AGGREGATE': 'mean'
+}
+
+# Nearest-neighbor search configuration (find_similar)
+# N_COMPONENTS: principal components kept in the index (None indexes every standardized feature)
+SIMILARITY_CONFIG = {
+    'N_COMPONENTS': 32,
+    'BLOCK_ROWS': 65536,
+    'DEFAULT_K': 10,
+    'PERSIST': True
+}
+
+# Stoichiometry constraint filter configuration (filter_materials)
+FILTER_CONFIG = {
+    # Excluded by the 'nontoxic' constraint
+    'TOXIC_ELEMENTS': ['As', 'Be', 'Cd', 'Hg', 'Pb', 'Tl', 'Po'],
+    # Other anions that disqualify a compound from the 'oxide' constraint
+    'OXIDE_EXCLUDED': ['N', 'F', 'S', 'Cl', 'Se', 'Br', 'Te', 'I']
+}
+
+# Columnar input/output configuration
+IO_CONFIG = {
+    'COMPRESSION': 'zstd'
+}
+
+# Shared dataset store configuration
+DATASET_STORE_CONFIG = {
+    'MAX_DATASETS': 4
+}
+
+# Web framework pool configuration
+FRAMEWORK_POOL_CONFIG = {
+    'MAX_FRAMEWORKS': 32,
+    'IDLE_TIMEOUT_SECONDS': 1800
+}
+
+# Local query daemon configuration (main.py --serve)
+DAEMON_CONFIG = {
+    'SOCKET_PATH': './cache/daemon.sock',
+    'CONNECT_TIMEOUT_SECONDS': 1.0,
+    'MAX_MESSAGE_BYTES': 16 * 1024 ** 2
+}
+
+# Background job queue configuration
+JOB_CONFIG = {
+    'MAX_WORKERS': 2,
+    'RESULT_TTL_SECONDS': 3600,
+    'EVENT_POLL_SECONDS': 15
+}
+
+# LLM response cache configuration
+# MODE: 'off' calls the model every time, 'record' answers repeated prompts from the
+# cache and records new ones, 'replay' answers only from the cache (no network)
+LLM_CACHE_CONFIG = {
+    'MODE': 'off',
+    'CACHE_DIR': './cache/llm',
+    'MAX_BYTES': 256 * 1024 ** 2
+}
+
+# Fast-path query planner configuration
+PLANNER_CONFIG = {
+    'ENABLED': True
+}
+
+# Benchmark configuration
+BENCHMARK_CONFIG = {
+    'SIZES': [10000, 100000],
+    'PYMATGEN_LIMIT': 20000,
+    'TRAIN_ROWS': 10000,
+    'TRAIN_ITERATIONS': 100,
+    'STARTUP_RUNS': 3,
+    'OUTPUT_DIR': './benchmark_results'
+}
+
+# Metrics configuration
+METRICS_CONFIG = {
+    'ENABLED': True,
+    'JSON_EVENTS': True,
+    'RSS_SAMPLE_INTERVAL': 0.01,
+    'DURATION_BUCKETS': [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300]
+}
+
+# NumPy oblivious tree evaluator configuration
+OBLIVIOUS_MODEL_CONFIG = {
+    'PREFER_ARTIFACT': True,
+    'BLOCK_ROWS': 2048
+}
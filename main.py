@@ -1,20 +1,29 @@
 """
 Main entry point for the material analysis framework.
 """
-from src.framework import SimpleReActFramework
-from config.settings import API_KEY
+from config.settings import API_KEY, DAEMON_CONFIG
 from src.utils.logger import setup_logger
 import argparse
 
 logger = setup_logger("material_analysis.main")
 
-def get_user_query():
-    """Get query from command line arguments."""
+def parse_arguments():
+    """Parse command line arguments."""
     parser = argparse.ArgumentParser(description="Material Analysis Framework")
     parser.add_argument("--query", type=str, help="Query to analyze")
     parser.add_argument("--web", action="store_true", help="Start web interface")
-    args = parser.parse_args()
-    
+    parser.add_argument("--serve", action="store_true",
+                        help="Run a daemon that keeps frameworks, datasets and models warm for --query calls")
+    parser.add_argument("--stop", action="store_true", help="Stop the running daemon")
+    parser.add_argument("--session", type=str, default=None,
+                        help="Daemon session whose conversation and loaded data are kept between queries")
+    parser.add_argument("--no-daemon", action="store_true", help="Always run the query in this process")
+    parser.add_argument("--socket", type=str, default=DAEMON_CONFIG['SOCKET_PATH'],
+                        help=f"Daemon socket path (default: {DAEMON_CONFIG['SOCKET_PATH']})")
+    return parser.parse_args()
+
+def get_user_query(args):
+    """Get query from command line arguments."""
     if args.web:
         # 启动Web界面
         from app import app
@@ -30,13 +39,42 @@ def main():
     """Main function to initialize framework and run query."""
     logger.info("Starting material analysis application")
     
-    query = get_user_query()
+    args = parse_arguments()
+    
+    if args.serve:
+        # 常驻进程：框架、数据集和模型在查询之间保持加载
+        from src.services.daemon import DaemonError, QueryDaemon
+        try:
+            QueryDaemon(args.socket).serve_forever()
+        except DaemonError as e:
+            print(f"Error: {str(e)}")
+        return
+    if args.stop:
+        from src.services.daemon import request
+        response = request({'command': 'shutdown'}, args.socket)
+        print("Daemon stopped" if response is not None else "No daemon is running")
+        return
+    
+    query = get_user_query(args)
     
     # 如果启动Web界面，则直接返回
     if query is None:
         return
     
-    # 初始化框架
+    # 优先交给正在运行的常驻进程，否则在本进程中执行
+    if not args.no_daemon:
+        from src.services.daemon import DaemonError, send_query
+        try:
+            result = send_query(query, session=args.session, api_key=API_KEY, socket_path=args.socket)
+        except DaemonError as e:
+            result = f"Daemon error: {str(e)}"
+        if result is not None:
+            print(result)
+            logger.info("Query answered by daemon")
+            return
+    
+    # 初始化框架（参数解析之后再导入，--help 无需等待依赖加载）
+    from src.framework import SimpleReActFramework
     react_framework = SimpleReActFramework(openai_api_key=API_KEY)
     
     # 运行查询
@@ -0,0 +1,3 @@
+"""
+Benchmark tooling for measuring throughput and memory of the screening pipeline.
+"""
@@ -0,0 +1,99 @@
+"""
+Wall time and memory measurement of benchmark stages.
+"""
+import os
+import sys
+import time
+import json
+import platform
+import subprocess
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.services.metrics import RssSampler, current_rss
+from src.utils.helpers import ensure_directory_exists
+
+def _megabytes(value: Optional[int]) -> Optional[float]:
+    return round(value / 1024 ** 2, 2) if value is not None else None
+
+class StageProfiler:
+    """Records wall time, throughput and RSS of named benchmark stages."""
+
+    def __init__(self, sample_interval: float = 0.005):
+        """
+        Initialize the profiler.
+
+        Args:
+            sample_interval: Seconds between RSS samples while a stage runs
+        """
+        self.sample_interval = sample_interval
+        self.stages: List[Dict[str, Any]] = []
+
+    @contextmanager
+    def stage(self, name: str, rows: Optional[int] = None, **details: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Measure a block of code.
+
+        Args:
+            name: Stage name
+            rows: Number of rows the stage processes, for throughput
+            **details: Extra fields stored with the result
+
+        Yields:
+            The stage record; the block may add fields to it
+        """
+        record = dict(details, stage=name, rows=rows)
+        rss_before = current_rss()
+        start = time.perf_counter()
+        with RssSampler(self.sample_interval) as sampler:
+            try:
+                yield record
+            finally:
+                seconds = time.perf_counter() - start
+        record['seconds'] = round(seconds, 6)
+        record['rows_per_second'] = round(rows / seconds, 1) if rows and seconds > 0 else None
+        record['rss_before_mb'] = _megabytes(rss_before)
+        record['rss_peak_mb'] = _megabytes(sampler.peak)
+        record['rss_growth_mb'] = (_megabytes(sampler.peak - rss_before)
+                                   if sampler.peak is not None and rss_before is not None else None)
+        self.stages.append(record)
+
+def _git_commit() -> Optional[str]:
+    """Get the commit of the working tree, if this is a git checkout."""
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def environment_info() -> Dict[str, Any]:
+    """
+    Describe the machine and library versions, so results from different runs can be compared.
+
+    Returns:
+        Dictionary of environment facts
+    """
+    return {
+        'git_commit': _git_commit(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'processor': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+    }
+
+def write_results(results: Dict[str, Any], path: str) -> None:
+    """
+    Write benchmark results as JSON.
+
+    Args:
+        results: Results dictionary
+        path: Output file path
+    """
+    ensure_directory_exists(path)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, default=str)
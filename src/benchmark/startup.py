@@ -0,0 +1,122 @@
+"""
+Cold start measurement of the entry points with a per-module import time breakdown.
+"""
+import os
+import sys
+import time
+import subprocess
+from typing import Any, Dict, List, Optional, Sequence
+
+# What is measured: (name, statement or script arguments, whether it is a Python statement)
+STARTUP_TARGETS = (
+    ('import src.framework', 'import src.framework', True),
+    ('import app', 'import app', True),
+    ('main.py --help', ['main.py', '--help'], False),
+)
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """
+    Parse the report printed by python -X importtime.
+
+    Args:
+        stderr: Standard error of the interpreter run
+
+    Returns:
+        One record per imported module with self and cumulative seconds and the nesting depth
+    """
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        modules.append({
+            'module': name.strip(),
+            'depth': (len(name) - len(name.lstrip()) - 1) // 2,
+            'self_seconds': int(self_us) / 1e6,
+            'cumulative_seconds': int(cumulative_us) / 1e6,
+        })
+    return modules
+
+def _run(arguments: List[str], cwd: str) -> subprocess.CompletedProcess:
+    env = dict(os.environ, PYTHONPATH=cwd + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    return subprocess.run([sys.executable, '-X', 'importtime'] + arguments, cwd=cwd, env=env,
+                          capture_output=True, text=True, timeout=300)
+
+def measure_startup(target: Any, statement: bool = True, runs: int = 3, top: int = 15,
+                    cwd: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Time fresh interpreters running a statement or script, like a cold CLI call or worker spin-up.
+
+    The first run also warms the OS file cache, so the fastest run is reported next to the first.
+
+    Args:
+        target: Python statement, or script path and arguments
+        statement: Whether target is a statement (run with -c) rather than script arguments
+        runs: Number of fresh interpreters
+        top: Number of slowest modules to keep in the breakdown
+        cwd: Directory to run in (the repository root by default)
+
+    Returns:
+        Wall times, the total import time and the slowest packages and modules of the fastest run
+    """
+    cwd = cwd or os.getcwd()
+    arguments = ['-c', target] if statement else list(target)
+    seconds = []
+    best_modules = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        completed = _run(arguments, cwd)
+        elapsed = time.perf_counter() - start
+        if completed.returncode != 0:
+            raise RuntimeError(f"Startup target {target!r} failed: {completed.stderr.strip().splitlines()[-1:]}")
+        if not seconds or elapsed < min(seconds):
+            best_modules = parse_importtime(completed.stderr)
+        seconds.append(elapsed)
+
+    # Self times summed per top-level package show which dependency the time goes to
+    packages = {}
+    for module in best_modules:
+        package = module['module'].split('.')[0]
+        packages[package] = packages.get(package, 0.0) + module['self_seconds']
+    return {
+        'first_seconds': round(seconds[0], 4),
+        'best_seconds': round(min(seconds), 4),
+        'import_seconds': round(sum(module['self_seconds'] for module in best_modules), 4),
+        'modules_imported': len(best_modules),
+        'slowest_packages': [{'package': name, 'seconds': round(value, 4)} for name, value
+                             in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]],
+        'slowest_modules': sorted(best_modules, key=lambda m: m['self_seconds'], reverse=True)[:top],
+    }
+
+def startup_report(targets: Sequence = STARTUP_TARGETS, runs: int = 3, top: int = 15) -> Dict[str, Any]:
+    """
+    Measure every startup target.
+
+    Args:
+        targets: (name, target, is_statement) tuples
+        runs: Fresh interpreters per target
+        top: Slowest modules kept per target
+
+    Returns:
+        Results keyed by target name
+    """
+    return {name: measure_startup(target, statement, runs=runs, top=top) for name, target, statement in targets}
+
+def format_startup(report: Dict[str, Any], top: int = 8) -> str:
+    """
+    Render a startup report as plain text.
+
+    Args:
+        report: Output of startup_report
+        top: Slowest packages listed per target
+
+    Returns:
+        One block per target
+    """
+    lines = []
+    for name, result in report.items():
+        lines.append(f"{name:<28}first {result['first_seconds']:.3f}s  best {result['best_seconds']:.3f}s  "
+                     f"imports {result['import_seconds']:.3f}s ({result['modules_imported']} modules)")
+        for package in result['slowest_packages'][:top]:
+            lines.append(f"    {package['package']:<40}{package['seconds']:>8.3f}s")
+    return '\n'.join(lines)
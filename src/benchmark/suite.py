@@ -0,0 +1,249 @@
+"""
+End-to-end benchmark of the screening pipeline on synthetic compositions.
+"""
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, Optional, Sequence
+
+from src.benchmark.profiler import StageProfiler, environment_info
+from src.benchmark.synthetic import generate_dataset, generate_formulas
+from src.data.composition import parse_compositions
+from src.data.dataset_store import get_dataset_store
+from src.data.feature_cache import feature_cache_enabled
+from src.data.featurizer import MagpieFeaturizer
+from src.data.io import write_table
+from src.data.prediction_store import discard_manifests
+from src.models.registry import get_model_registry
+from src.utils.helpers import safe_composition_conversion
+from src.utils.logger import setup_logger
+
+logger = setup_logger("material_analysis.benchmark.suite")
+
+DEFAULT_RULE = 'La,Ce,Pr,Nd | all(Fe,O)'
+# Stages that can be skipped; generation, parsing and featurization always run
+OPTIONAL_STAGES = ('safe_composition_conversion', 'predict_proba', 'read_data', 'model_predict', 'rule_match',
+                   'save_result', 'framework_agent', 'framework_planner', 'model_train')
+
+def agent_transcript(data_path: str, model_path: str, rule: str, save_path: str) -> Sequence[str]:
+    """
+    Build the responses a fake LLM gives to walk the agent through one screening run.
+
+    Args:
+        data_path: Input file path
+        model_path: Model file path
+        rule: Element rule
+        save_path: Output file path
+
+    Returns:
+        Chat responses in the order the agent asks for them
+    """
+    steps = [('read_data', data_path), ('model_predict', model_path), ('rule_match', rule), ('save_result', save_path)]
+    responses = [f"Thought: Do I need to use a tool? Yes\nAction: {tool}\nAction Input: {argument}"
+                 for tool, argument in steps]
+    responses.append("Thought: Do I need to use a tool? No\nAI: Screening finished.")
+    return responses
+
+class BenchmarkSuite:
+    """Runs every pipeline stage at several dataset sizes and collects the measurements."""
+
+    def __init__(self,
+                 model_path: str,
+                 seed: int = 0,
+                 rule: str = DEFAULT_RULE,
+                 input_format: str = 'csv',
+                 pymatgen_limit: int = 20000,
+                 skip: Optional[Sequence[str]] = None,
+                 work_dir: Optional[str] = None,
+                 feature_cache: bool = False):
+        """
+        Initialize the suite.
+
+        Args:
+            model_path: CatBoost model used for the prediction stages
+            seed: Seed of the synthetic data
+            rule: Element rule for the rule_match stages
+            input_format: Extension of the generated input file ('csv', 'parquet' or 'feather')
+            pymatgen_limit: Maximum rows for the slow pymatgen conversion stage
+            skip: Stage names to leave out
+            work_dir: Directory for generated files (a temporary directory by default)
+            feature_cache: Use the on-disk feature cache; off by default, since cached features
+                would make the featurization stages measure disk reads instead
+        """
+        self.model_path = model_path
+        self.seed = seed
+        self.rule = rule
+        self.input_format = input_format
+        self.pymatgen_limit = pymatgen_limit
+        self.skip = set(skip or ())
+        self.work_dir = work_dir
+        self.feature_cache = feature_cache
+        self.profiler = StageProfiler()
+
+    def _enabled(self, stage: str) -> bool:
+        return stage not in self.skip
+
+    def run_size(self, rows: int) -> None:
+        """
+        Benchmark the data stages on one synthetic dataset.
+
+        Args:
+            rows: Number of formulas
+        """
+        logger.info(f"Benchmarking {rows} rows")
+        profile = self.profiler.stage
+        with profile('generate', rows, size=rows):
+            formulas = generate_formulas(rows, seed=self.seed, invalid_fraction=0.001)
+
+        if self._enabled('safe_composition_conversion'):
+            sample = formulas[:self.pymatgen_limit]
+            with profile('safe_composition_conversion', len(sample), size=rows):
+                [safe_composition_conversion(formula) for formula in sample]
+
+        with profile('parse_compositions', rows, size=rows):
+            compositions = parse_compositions(formulas)
+
+        featurizer = MagpieFeaturizer()
+        with profile('magpie_featurize', rows, size=rows):
+            features = featurizer.featurize_matrix(compositions.to_matrix())
+
+        if self._enabled('predict_proba'):
+            model = get_model_registry().get(self.model_path)
+            with profile('predict_proba', rows, size=rows):
+                model.predict_proba(features)
+        del features
+
+        tool_stages = ('read_data', 'model_predict', 'rule_match', 'save_result')
+        framework_stages = ('framework_agent', 'framework_planner')
+        if not any(self._enabled(stage) for stage in tool_stages + framework_stages):
+            return
+
+        data_path = os.path.join(self.work_dir, f"screen_{rows}.{self.input_format}")
+        save_path = os.path.join(self.work_dir, f"result_{rows}.csv")
+        frame = generate_dataset(rows, seed=self.seed, invalid_fraction=0.001)
+        with profile('write_input', rows, size=rows, format=self.input_format):
+            write_table(frame, data_path)
+        del frame
+
+        if any(self._enabled(stage) for stage in tool_stages):
+            self._run_tools(rows, data_path, save_path)
+        if self._enabled('framework_agent'):
+            self._run_framework(rows, data_path, save_path, planner=False)
+        if self._enabled('framework_planner'):
+            self._run_framework(rows, data_path, save_path, planner=True)
+
+    def _run_tools(self, rows: int, data_path: str, save_path: str) -> None:
+        """Time the MaterialTools calls one by one."""
+        from src.tools.material_tools import MaterialTools
+
+        # Every run predicts from scratch rather than reusing an earlier run's predictions
+        get_dataset_store().clear()
+        discard_manifests(data_path)
+        tools = MaterialTools()
+        calls = (('read_data', data_path), ('model_predict', self.model_path),
+                 ('rule_match', self.rule), ('save_result', save_path))
+        for name, argument in calls:
+            with self.profiler.stage(name, rows, size=rows) as record:
+                record['output'] = getattr(tools, name)(argument)
+
+    def _run_framework(self, rows: int, data_path: str, save_path: str, planner: bool) -> None:
+        """Time a whole query through SimpleReActFramework with a scripted stand-in LLM."""
+        from src.framework import SimpleReActFramework
+        from src.services.llm_cache import TranscriptChatModel
+
+        get_dataset_store().clear()
+        discard_manifests(data_path)
+        llm = TranscriptChatModel(responses=list(agent_transcript(data_path, self.model_path, self.rule, save_path)))
+        framework = SimpleReActFramework(llm=llm, llm_cache_mode='off', use_planner=planner)
+        if planner:
+            query = (f"read {data_path} -> predict {self.model_path} -> match {self.rule} -> save {save_path}")
+            stage = 'framework_planner'
+        else:
+            query = f"Screen {data_path} with {self.model_path}, match '{self.rule}' and save to {save_path}"
+            stage = 'framework_agent'
+        with self.profiler.stage(stage, rows, size=rows) as record:
+            record['output'] = framework.run(query)
+
+    def run_training(self, rows: int, iterations: int) -> None:
+        """
+        Benchmark ModelTrainer.train on labelled synthetic data.
+
+        Args:
+            rows: Number of training formulas
+            iterations: Boosting iterations
+        """
+        from src.models.trainer import ModelTrainer
+
+        frame = generate_dataset(rows, seed=self.seed, with_labels=True)
+        compositions = parse_compositions(frame['Substance'])
+        features = MagpieFeaturizer().featurize_matrix(compositions.to_matrix())
+        trainer = ModelTrainer(iterations=iterations)
+        trainer.model.set_params(verbose=0, allow_writing_files=False)
+        with self.profiler.stage('model_train', rows, iterations=iterations):
+            trainer.train(features, frame['label'].to_numpy())
+
+    def run(self, sizes: Sequence[int], train_rows: int = 10000, train_iterations: int = 100) -> Dict[str, Any]:
+        """
+        Run the whole suite.
+
+        Args:
+            sizes: Dataset sizes to benchmark
+            train_rows: Rows for the training stage (0 skips it)
+            train_iterations: Boosting iterations for the training stage
+
+        Returns:
+            Machine-readable results: environment, settings and one record per stage
+        """
+        if self._enabled('predict_proba') or self._enabled('model_predict'):
+            with self.profiler.stage('model_load', model_path=self.model_path):
+                get_model_registry().get(self.model_path)
+        temporary = self.work_dir is None
+        if temporary:
+            self.work_dir = tempfile.mkdtemp(prefix='material_benchmark_')
+        try:
+            with feature_cache_enabled(self.feature_cache):
+                for rows in sizes:
+                    self.run_size(rows)
+        finally:
+            if temporary:
+                shutil.rmtree(self.work_dir, ignore_errors=True)
+                self.work_dir = None
+        if train_rows and self._enabled('model_train'):
+            self.run_training(train_rows, train_iterations)
+
+        return {
+            'environment': environment_info(),
+            'settings': {
+                'sizes': list(sizes),
+                'seed': self.seed,
+                'rule': self.rule,
+                'input_format': self.input_format,
+                'model_path': self.model_path,
+                'pymatgen_limit': self.pymatgen_limit,
+                'train_rows': train_rows,
+                'train_iterations': train_iterations,
+                'skipped': sorted(self.skip),
+                'feature_cache': self.feature_cache,
+            },
+            'stages': self.profiler.stages,
+        }
+
+def format_summary(results: Dict[str, Any]) -> str:
+    """
+    Render benchmark results as a plain-text table.
+
+    Args:
+        results: Output of BenchmarkSuite.run
+
+    Returns:
+        Table with one line per stage
+    """
+    lines = [f"{'stage':<28}{'size':>10}{'rows':>10}{'seconds':>12}{'rows/s':>14}{'peak MB':>10}{'growth MB':>11}"]
+    for record in results['stages']:
+        def cell(key, width, fmt='{}'):
+            value = record.get(key)
+            return f"{fmt.format(value) if value is not None else '-':>{width}}"
+        lines.append(f"{record['stage']:<28}{cell('size', 10)}{cell('rows', 10)}{cell('seconds', 12, '{:.4f}')}"
+                     f"{cell('rows_per_second', 14, '{:.0f}')}{cell('rss_peak_mb', 10, '{:.1f}')}"
+                     f"{cell('rss_growth_mb', 11, '{:.1f}')}")
+    return '\n'.join(lines)
@@ -0,0 +1,113 @@
+"""
+Synthetic composition generator for benchmarks.
+"""
+import numpy as np
+import pandas as pd
+from typing import List
+
+# Elements drawn for cations, with rough relative frequencies in inorganic databases
+_CATIONS = {
+    'Li': 4, 'Na': 4, 'K': 3, 'Mg': 4, 'Ca': 4, 'Sr': 3, 'Ba': 3, 'Al': 4, 'Ga': 2, 'In': 2,
+    'Si': 4, 'Ge': 2, 'Sn': 3, 'Pb': 1, 'Bi': 2, 'Sb': 2, 'Ti': 4, 'V': 3, 'Cr': 3, 'Mn': 5,
+    'Fe': 5, 'Co': 4, 'Ni': 4, 'Cu': 4, 'Zn': 3, 'Zr': 2, 'Nb': 2, 'Mo': 2, 'W': 2, 'Ru': 1,
+    'Rh': 1, 'Pd': 1, 'Ag': 1, 'Pt': 1, 'Au': 1, 'Cd': 1, 'Hg': 1, 'Y': 2, 'Sc': 1, 'La': 3,
+    'Ce': 3, 'Pr': 2, 'Nd': 2, 'Sm': 2, 'Eu': 2, 'Gd': 2, 'Tb': 1, 'Dy': 1, 'Ho': 1, 'Er': 1,
+    'Tm': 1, 'Yb': 1, 'Lu': 1, 'Hf': 1, 'Ta': 1, 'Te': 1,
+}
+# Elements drawn for anions
+_ANIONS = {'O': 20, 'S': 4, 'Se': 2, 'N': 3, 'F': 3, 'Cl': 3, 'Br': 1, 'I': 1, 'P': 2, 'C': 2, 'H': 2, 'B': 1}
+# Share of formulas with 1, 2, 3, 4 and 5 elements
+_SIZE_WEIGHTS = np.array([0.03, 0.35, 0.40, 0.17, 0.05])
+_BLOCK_ROWS = 100000
+_RARE_EARTHS = ('La', 'Ce', 'Pr', 'Nd', 'Sm', 'Eu', 'Gd', 'Tb', 'Dy', 'Ho', 'Er', 'Tm', 'Yb', 'Lu', 'Y', 'Sc')
+
+def _weights(table: dict) -> np.ndarray:
+    weights = np.array(list(table.values()), dtype=np.float64)
+    return weights / weights.sum()
+
+def generate_formulas(n: int, seed: int = 0, invalid_fraction: float = 0.0,
+                      fractional_fraction: float = 0.05) -> List[str]:
+    """
+    Generate chemical formulas shaped like the entries of materials databases.
+
+    Most formulas are binary or ternary, anions (mainly oxygen) come last, amounts are
+    small integers and a few formulas use fractional (doped) amounts.
+
+    Args:
+        n: Number of formulas
+        seed: Random seed; the same seed gives the same formulas
+        invalid_fraction: Share of formulas replaced by unparseable strings
+        fractional_fraction: Share of formulas with decimal amounts
+
+    Returns:
+        List of formula strings
+    """
+    rng = np.random.default_rng(seed)
+    cations = np.array(list(_CATIONS))
+    anions = np.array(list(_ANIONS))
+    sizes = rng.choice(np.arange(1, 6), size=n, p=_SIZE_WEIGHTS)
+    with_anion = (sizes > 1) & (rng.random(n) < 0.85)
+    n_cations = sizes - with_anion
+    fractional = rng.random(n) < fractional_fraction
+    invalid = rng.random(n) < invalid_fraction
+
+    # Weighted sampling without replacement for all rows at once (Gumbel top-k),
+    # in blocks so 1M rows do not need a 1M x n_cations key matrix
+    cation_order = np.empty((n, 4), dtype=np.int64)
+    log_weights = np.log(_weights(_CATIONS))
+    for start in range(0, n, _BLOCK_ROWS):
+        keys = log_weights - np.log(-np.log(rng.random((min(_BLOCK_ROWS, n - start), len(cations)))))
+        cation_order[start:start + _BLOCK_ROWS] = np.argpartition(-keys, 3, axis=1)[:, :4]
+    anion_choice = rng.choice(len(anions), size=n, p=_weights(_ANIONS))
+    integer_amounts = rng.integers(1, 9, size=(n, 5))
+    decimal_amounts = rng.uniform(0.05, 4.0, size=(n, 5))
+    invalid_amounts = rng.integers(1, 9, size=n)
+
+    # Plain Python lists are much faster than NumPy scalars in the per-row loop below
+    cation_names, anion_names = cations.tolist(), anions.tolist()
+    rows = zip(invalid.tolist(), n_cations.tolist(), with_anion.tolist(), fractional.tolist(),
+               cation_order.tolist(), anion_choice.tolist(), integer_amounts.tolist(),
+               decimal_amounts.tolist(), invalid_amounts.tolist())
+    formulas = []
+    for is_invalid, cation_count, has_anion, is_fractional, order, anion, integers, decimals, bad in rows:
+        if is_invalid:
+            formulas.append(f"Xx{bad}Qq")
+            continue
+        elements = [cation_names[index] for index in order[:cation_count]]
+        if has_anion:
+            elements.append(anion_names[anion])
+        if is_fractional:
+            amounts = [f"{amount:.2f}".rstrip('0').rstrip('.') for amount in decimals]
+        else:
+            amounts = [str(amount) if amount > 1 else '' for amount in integers]
+        formulas.append(''.join(element + amount for element, amount in zip(elements, amounts)))
+    return formulas
+
+def generate_dataset(n: int, seed: int = 0, with_labels: bool = False,
+                     invalid_fraction: float = 0.0, label_noise: float = 0.1) -> pd.DataFrame:
+    """
+    Generate a screening or training table of synthetic formulas.
+
+    Labels mark rare-earth oxides as active, with some noise, so a model has
+    something learnable.
+
+    Args:
+        n: Number of rows
+        seed: Random seed
+        with_labels: Whether to add a 'label' column
+        invalid_fraction: Share of unparseable formulas
+        label_noise: Share of labels flipped at random
+
+    Returns:
+        DataFrame with a 'Substance' column and optionally 'label'
+    """
+    formulas = generate_formulas(n, seed=seed, invalid_fraction=invalid_fraction)
+    frame = pd.DataFrame({'Substance': formulas})
+    if with_labels:
+        rng = np.random.default_rng(seed + 1)
+        rare_earth = frame['Substance'].str.contains('|'.join(_RARE_EARTHS))
+        oxide = frame['Substance'].str.contains(r'O(?![a-z])', regex=True)
+        labels = (rare_earth & oxide).to_numpy()
+        flip = rng.random(n) < label_noise
+        frame['label'] = np.where(flip, ~labels, labels).astype(int)
+    return frame
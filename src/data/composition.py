@@ -0,0 +1,381 @@
+"""
+Lightweight chemical formula parsing into compact element/fraction arrays.
+"""
+import os
+import re
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from scipy import sparse
+
+from src.data.elements import ELEMENT_INDEX, ELEMENT_SYMBOLS, NUM_ELEMENTS
+from src.utils.logger import setup_logger
+from config.settings import COMPOSITION_PARSER_CONFIG
+
+logger = setup_logger("material_analysis.data.composition")
+
+# Element symbol, number, opening/closing group, hydrate separator, or anything else (invalid)
+_TOKEN_PATTERN = re.compile(r'([A-Z][a-z]?)|(\d+(?:\.\d*)?|\.\d+)|([(\[{])|([)\]}])|([·•*])|(\S)')
+_OPENERS = {'(': ')', '[': ']', '{': '}'}
+
+def _parse_amounts(formula: str) -> Optional[Dict[int, float]]:
+    """
+    Parse a formula into {element index: amount}, keeping first-appearance order.
+
+    Supports nested (), [] and {} groups with multipliers, fractional amounts and
+    hydrate notation such as 'CuSO4·5H2O' or 'CuSO4*5H2O'.
+
+    Args:
+        formula: Formula string
+
+    Returns:
+        Ordered mapping of element index to amount, or None if the string is not understood
+    """
+    # Each stack frame is (amounts, expected closing bracket)
+    stack: List[Tuple[Dict[int, float], Optional[str]]] = [({}, None)]
+    # Hydrate parts are accumulated separately and weighted by their leading multiplier
+    parts: List[Tuple[float, Dict[int, float]]] = []
+    part_multiplier = 1.0
+    expect_multiplier = False
+    pending: Optional[Tuple[str, Any]] = None
+
+    def apply_pending(amount: float) -> bool:
+        nonlocal pending
+        if pending is None:
+            return False
+        kind, value = pending
+        target = stack[-1][0]
+        if kind == 'element':
+            target[value] = target.get(value, 0.0) + amount
+        else:
+            for index, group_amount in value.items():
+                target[index] = target.get(index, 0.0) + group_amount * amount
+        pending = None
+        return True
+
+    for match in _TOKEN_PATTERN.finditer(formula):
+        symbol, number, opener, closer, separator, invalid = match.groups()
+        if invalid is not None:
+            return None
+        if number is not None:
+            if pending is not None:
+                apply_pending(float(number))
+            elif expect_multiplier:
+                # Leading multiplier of a hydrate part, e.g. the 5 in '·5H2O'
+                part_multiplier = float(number)
+            else:
+                return None
+            expect_multiplier = False
+            continue
+        apply_pending(1.0)
+        expect_multiplier = False
+        if symbol is not None:
+            index = ELEMENT_INDEX.get(symbol)
+            if index is None:
+                return None
+            pending = ('element', index)
+        elif opener is not None:
+            stack.append(({}, _OPENERS[opener]))
+        elif closer is not None:
+            group, expected = stack.pop() if len(stack) > 1 else ({}, None)
+            if expected != closer or not group:
+                return None
+            pending = ('group', group)
+        else:
+            if len(stack) != 1 or not stack[0][0]:
+                return None
+            parts.append((part_multiplier, stack[0][0]))
+            stack[0] = ({}, None)
+            part_multiplier = 1.0
+            expect_multiplier = True
+
+    apply_pending(1.0)
+    if len(stack) != 1 or not stack[0][0]:
+        return None
+    parts.append((part_multiplier, stack[0][0]))
+
+    amounts: Dict[int, float] = {}
+    for multiplier, part in parts:
+        for index, amount in part.items():
+            amounts[index] = amounts.get(index, 0.0) + amount * multiplier
+    amounts = {index: amount for index, amount in amounts.items() if amount > 0}
+    return amounts or None
+
+def _pymatgen_amounts(formula: str) -> Optional[Dict[int, float]]:
+    """
+    Fall back to pymatgen for strings the fast parser rejects.
+
+    Args:
+        formula: Formula string
+
+    Returns:
+        Ordered mapping of element index to amount, or None if pymatgen fails too
+    """
+    from src.utils.helpers import safe_composition_conversion
+
+    comp = safe_composition_conversion(formula)
+    if comp is None:
+        return None
+    try:
+        amounts = {}
+        for element, amount in comp.element_composition.items():
+            # pymatgen accepts placeholder species such as 'Xx'; they have no element data
+            if not 0 < getattr(element, 'Z', 0) <= NUM_ELEMENTS:
+                return None
+            if amount > 0:
+                amounts[element.Z - 1] = amounts.get(element.Z - 1, 0.0) + float(amount)
+        return amounts or None
+    except Exception:
+        return None
+
+@lru_cache(maxsize=65536)
+def _formula_amounts(formula: str) -> Optional[Tuple[Tuple[int, float], ...]]:
+    """Parse one formula with the fast parser, falling back to pymatgen."""
+    amounts = _parse_amounts(formula)
+    if amounts is None:
+        amounts = _pymatgen_amounts(formula)
+    if amounts is None:
+        return None
+    return tuple(amounts.items())
+
+def parse_formula(formula: Any) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Parse a formula into element indices and fractions.
+
+    Args:
+        formula: Formula string
+
+    Returns:
+        Tuple of (element indices, fractions summing to 1), or None if parsing fails
+    """
+    if not isinstance(formula, str):
+        return None
+    parsed = _formula_amounts(formula)
+    if parsed is None:
+        return None
+    indices, amounts = zip(*parsed)
+    amounts = np.asarray(amounts, dtype=np.float64)
+    return np.asarray(indices, dtype=np.uint8), amounts / amounts.sum()
+
+_FRACTION_SCALE = float(2 ** 32)
+
+def _mix64(values: np.ndarray) -> np.ndarray:
+    """Scramble uint64 values with the splitmix64 finalizer."""
+    values = values.copy()
+    with np.errstate(over='ignore'):
+        values ^= values >> np.uint64(30)
+        values *= np.uint64(0xBF58476D1CE4E5B9)
+        values ^= values >> np.uint64(27)
+        values *= np.uint64(0x94D049BB133111EB)
+        values ^= values >> np.uint64(31)
+    return values
+
+class CompositionArrays:
+    """CSR-style element/fraction arrays for a batch of compositions."""
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, fractions: np.ndarray):
+        """
+        Initialize from CSR components.
+
+        Args:
+            indptr: Row offsets, length n_materials + 1
+            indices: Element indices (Z - 1) per entry
+            fractions: Element fractions per entry; each row sums to 1
+        """
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.uint8)
+        self.fractions = np.asarray(fractions, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def counts(self) -> np.ndarray:
+        """Number of elements in each composition."""
+        return np.diff(self.indptr)
+
+    @property
+    def valid(self) -> np.ndarray:
+        """Boolean mask of rows that were parsed successfully."""
+        return self.counts > 0
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the arrays."""
+        return self.indptr.nbytes + self.indices.nbytes + self.fractions.nbytes
+
+    def to_matrix(self) -> sparse.csr_matrix:
+        """
+        Build the sparse composition-by-element fraction matrix.
+
+        Returns:
+            CSR matrix of shape (n_materials, NUM_ELEMENTS)
+        """
+        return sparse.csr_matrix(
+            (self.fractions, self.indices.astype(np.int32), self.indptr),
+            shape=(len(self), NUM_ELEMENTS)
+        )
+
+    def element_fraction(self, index: int) -> np.ndarray:
+        """
+        Get one element's fraction in every composition.
+
+        Args:
+            index: Element index (Z - 1)
+
+        Returns:
+            float64 array of length n_materials; 0 where the element is absent
+        """
+        entries = np.flatnonzero(self.indices == index)
+        fraction = np.zeros(len(self), dtype=np.float64)
+        fraction[np.searchsorted(self.indptr, entries, side='right') - 1] = self.fractions[entries]
+        return fraction
+
+    def formula(self, row: int) -> Optional[str]:
+        """
+        Render one composition as a formula string of fractions.
+
+        Args:
+            row: Row position
+
+        Returns:
+            Formula string, or None for unparsed rows
+        """
+        start, end = self.indptr[row], self.indptr[row + 1]
+        if start == end:
+            return None
+        return ''.join(f"{ELEMENT_SYMBOLS[i]}{f:.6g}" for i, f in zip(self.indices[start:end], self.fractions[start:end]))
+
+    def take(self, rows: Sequence[int]) -> 'CompositionArrays':
+        """
+        Select a subset of rows.
+
+        Args:
+            rows: Row positions
+
+        Returns:
+            New CompositionArrays with the selected rows in the given order
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        starts = self.indptr[rows]
+        counts = self.indptr[rows + 1] - starts
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        entries = np.repeat(starts - indptr[:-1], counts) + np.arange(indptr[-1])
+        return CompositionArrays(indptr, self.indices[entries], self.fractions[entries])
+
+    def row_hashes(self) -> np.ndarray:
+        """
+        Hash each composition independently of how its formula was written.
+
+        Fractions are quantized to 2**-32, so 'Fe2O3', 'Fe4O6' and 'O3Fe2' hash alike.
+        Entry hashes are summed, which makes the row hash independent of element order.
+
+        Returns:
+            uint64 array of length n_materials; unparsed rows hash to 0
+        """
+        quantized = np.round(self.fractions * _FRACTION_SCALE).astype(np.uint64)
+        entries = _mix64((self.indices.astype(np.uint64) + np.uint64(1)) << np.uint64(40) ^ quantized)
+        with np.errstate(over='ignore'):
+            # Row sums as differences of a running sum, wrapping modulo 2**64
+            running = np.concatenate([np.zeros(1, dtype=np.uint64), np.cumsum(entries, dtype=np.uint64)])
+            sums = running[self.indptr[1:]] - running[self.indptr[:-1]]
+        hashes = _mix64(sums)
+        hashes[~self.valid] = 0
+        return hashes
+
+    def unique(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the distinct compositions.
+
+        Returns:
+            Tuple of (first, inverse): the row position of one representative per distinct
+            composition and, for every row, the index of its composition in first, so that
+            values computed for take(first) broadcast back with values[inverse]
+        """
+        _, first, inverse = np.unique(self.row_hashes(), return_index=True, return_inverse=True)
+        return first, inverse.reshape(-1)
+
+    def element_masks(self) -> np.ndarray:
+        """
+        Pack each composition's element set into two uint64 words.
+
+        Bit (Z - 1) of word (Z - 1) // 64 is set when the element is present,
+        so two words cover all 118 elements.
+
+        Returns:
+            uint64 array of shape (n_materials, 2)
+        """
+        masks = np.zeros((len(self), 2), dtype=np.uint64)
+        entry_rows = np.repeat(np.arange(len(self)), self.counts)
+        bits = np.left_shift(np.uint64(1), (self.indices % 64).astype(np.uint64))
+        np.bitwise_or.at(masks, (entry_rows, self.indices // 64), bits)
+        return masks
+
+    @classmethod
+    def concatenate(cls, batches: Iterable['CompositionArrays']) -> 'CompositionArrays':
+        """
+        Stack several batches row-wise.
+
+        Args:
+            batches: CompositionArrays to concatenate
+
+        Returns:
+            Combined CompositionArrays
+        """
+        batches = list(batches)
+        if not batches:
+            return cls(np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.uint8), np.zeros(0))
+        offsets = np.cumsum([0] + [len(batch.indices) for batch in batches[:-1]])
+        indptr = np.concatenate([[0]] + [batch.indptr[1:] + offset for batch, offset in zip(batches, offsets)])
+        return cls(
+            indptr,
+            np.concatenate([batch.indices for batch in batches]),
+            np.concatenate([batch.fractions for batch in batches])
+        )
+
+def _parse_chunk(formulas: Sequence[Any]) -> CompositionArrays:
+    """Parse a chunk of formulas into CompositionArrays (runs in worker processes)."""
+    indptr = np.zeros(len(formulas) + 1, dtype=np.int64)
+    indices: List[int] = []
+    amounts: List[float] = []
+    for row, formula in enumerate(formulas):
+        parsed = _formula_amounts(formula) if isinstance(formula, str) else None
+        if parsed is not None:
+            total = sum(amount for _, amount in parsed)
+            for index, amount in parsed:
+                indices.append(index)
+                amounts.append(amount / total)
+        indptr[row + 1] = len(indices)
+    return CompositionArrays(indptr, indices, amounts)
+
+def parse_compositions(formulas: Iterable[Any],
+                       n_jobs: Optional[int] = COMPOSITION_PARSER_CONFIG['N_JOBS'],
+                       chunk_size: int = COMPOSITION_PARSER_CONFIG['CHUNK_SIZE']) -> CompositionArrays:
+    """
+    Parse many formulas, in chunks over a process pool for large inputs.
+
+    Args:
+        formulas: Formula strings (non-strings and unparseable strings become empty rows)
+        n_jobs: Worker processes; None uses all CPUs, 1 parses in-process
+        chunk_size: Formulas per chunk
+
+    Returns:
+        CompositionArrays with one row per input formula
+    """
+    formulas = list(formulas)
+    n_jobs = n_jobs or os.cpu_count() or 1
+    chunks = [formulas[i:i + chunk_size] for i in range(0, len(formulas), chunk_size)]
+
+    if n_jobs > 1 and len(chunks) > 1:
+        logger.info(f"Parsing {len(formulas)} formulas in {len(chunks)} chunks over {n_jobs} processes")
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(chunks))) as executor:
+            compositions = CompositionArrays.concatenate(executor.map(_parse_chunk, chunks))
+    else:
+        compositions = CompositionArrays.concatenate(_parse_chunk(chunk) for chunk in chunks)
+
+    failed = int((~compositions.valid).sum())
+    if failed:
+        logger.warning(f"{failed} of {len(formulas)} formulas could not be parsed")
+    return compositions
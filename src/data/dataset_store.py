@@ -0,0 +1,217 @@
+"""
+Process-wide store of loaded and featurized datasets shared read-only across sessions.
+"""
+import os
+import threading
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+
+from src.data.composition import CompositionArrays, parse_compositions
+from src.data.featurizer import MagpieFeaturizer
+from src.data.feature_cache import get_feature_cache
+from src.data.io import read_table
+from src.services.metrics import record_cache_lookup
+from src.utils.logger import setup_logger
+from config.settings import DATASET_STORE_CONFIG
+
+logger = setup_logger("material_analysis.data.dataset_store")
+
+class LoadedDataset:
+    """
+    A screening file as one columnar store: input columns, CSR compositions and a float32
+    feature matrix; treat as read-only.
+
+    Features are stored once per distinct composition; feature_index maps every row to
+    its feature row, so per-composition results broadcast back with values[feature_index].
+    The feature matrix is built on first use, so a re-screening that finds most predictions
+    in its manifest (see PredictionManifest) only featurizes the new compositions.
+    Sessions refer to rows by position (see MaterialTools), so nothing here is copied per session.
+    """
+
+    def __init__(self, path: str, frame: pd.DataFrame, compositions: CompositionArrays,
+                 element_masks: np.ndarray, distinct: CompositionArrays, composition_hashes: np.ndarray,
+                 feature_index: np.ndarray, featurizer: MagpieFeaturizer):
+        """
+        Initialize the dataset.
+
+        Args:
+            path: Source file path
+            frame: Input columns as read from the file
+            compositions: Parsed element/fraction arrays, one row per material
+            element_masks: Packed element bitmasks, shape (n_materials, 2)
+            distinct: One representative per distinct composition, in feature row order
+            composition_hashes: Sorted hash of each distinct composition (see CompositionArrays.row_hashes)
+            feature_index: Feature row of every material, shape (n_materials,)
+            featurizer: Featurizer producing the feature rows
+        """
+        self.path = path
+        self.frame = frame
+        self.compositions = compositions
+        self.element_masks = element_masks
+        self.distinct = distinct
+        self.composition_hashes = composition_hashes
+        self.feature_index = feature_index
+        self.feature_names = featurizer.feature_labels()
+        self._featurizer = featurizer
+        self._features = None
+        self._features_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    @property
+    def n_distinct(self) -> int:
+        """Number of distinct compositions (feature rows)."""
+        return len(self.distinct)
+
+    @property
+    def dedup_ratio(self) -> float:
+        """Rows per distinct composition."""
+        return len(self) / max(self.n_distinct, 1)
+
+    @property
+    def features(self) -> np.ndarray:
+        """float32 magpie feature matrix of the distinct compositions, shape (n_distinct, n_features)."""
+        if self._features is None:
+            with self._features_lock:
+                if self._features is None:
+                    features = self._featurizer.featurize_matrix(self.distinct.to_matrix(), dtype=np.float32)
+                    # Shared between sessions, so make accidental in-place writes fail loudly
+                    features.setflags(write=False)
+                    self._features = features
+        return self._features
+
+    def featurize(self, rows: Sequence[int]) -> np.ndarray:
+        """
+        Get the feature rows of some distinct compositions without building the full matrix.
+
+        Args:
+            rows: Feature row positions
+
+        Returns:
+            float32 feature array, shape (len(rows), n_features)
+        """
+        if self._features is not None:
+            return self._features[rows]
+        return self._featurizer.featurize_matrix(self.distinct.take(rows).to_matrix(), dtype=np.float32)
+
+    def memory_bytes(self) -> int:
+        """
+        Estimate the memory held by the dataset.
+
+        Returns:
+            Bytes of the frame (including string contents) and of every array built so far
+        """
+        arrays = (self.compositions.indptr, self.compositions.indices, self.compositions.fractions,
+                  self.element_masks, self.distinct.indptr, self.distinct.indices, self.distinct.fractions,
+                  self.composition_hashes, self.feature_index)
+        if self._features is not None:
+            arrays += (self._features,)
+        return int(self.frame.memory_usage(deep=True).sum()) + sum(array.nbytes for array in arrays)
+
+def load_dataset(path: str, columns: Optional[List[str]] = None, substance_column: str = 'Substance') -> LoadedDataset:
+    """
+    Read and parse a screening file; features are computed when first needed.
+
+    Args:
+        path: CSV, Parquet or Arrow file path
+        columns: Columns to load (None loads all)
+        substance_column: Name of the column holding formulas
+
+    Returns:
+        LoadedDataset with read-only arrays
+    """
+    frame = read_table(path, columns=columns)
+    compositions = parse_compositions(frame[substance_column])
+    element_masks = compositions.element_masks()
+    # Repeated compositions (polymorphs, entries from several databases) are featurized once
+    first, feature_index = compositions.unique()
+    distinct = compositions.take(first)
+    composition_hashes = distinct.row_hashes()
+
+    # Shared between sessions, so make accidental in-place writes fail loudly
+    for array in (compositions.indptr, compositions.indices, compositions.fractions, element_masks,
+                  distinct.indptr, distinct.indices, distinct.fractions, composition_hashes, feature_index):
+        array.setflags(write=False)
+    dataset = LoadedDataset(path, frame, compositions, element_masks, distinct, composition_hashes,
+                            feature_index, MagpieFeaturizer(cache=get_feature_cache()))
+    logger.info(f"Loaded {len(dataset)} materials ({dataset.n_distinct} distinct compositions, dedup ratio "
+                f"{dataset.dedup_ratio:.2f}) using {dataset.memory_bytes() / 1024 ** 2:.1f} MB")
+    return dataset
+
+class DatasetStore:
+    """LRU cache of loaded datasets keyed by path and column projection, reloaded when the file changes."""
+
+    def __init__(self, max_datasets: int = DATASET_STORE_CONFIG['MAX_DATASETS']):
+        """
+        Initialize the store.
+
+        Args:
+            max_datasets: Maximum number of datasets kept in memory
+        """
+        self.max_datasets = max_datasets
+        self._datasets = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading_locks = {}
+
+    @staticmethod
+    def _file_state(path: str) -> Tuple[int, int]:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self, path: str, columns: Optional[List[str]] = None) -> LoadedDataset:
+        """
+        Get a dataset, loading it once even when several sessions ask at the same time.
+
+        Args:
+            path: CSV, Parquet or Arrow file path
+            columns: Columns to load (None loads all)
+
+        Returns:
+            Shared LoadedDataset; callers must not modify it in place
+        """
+        key = (os.path.normcase(os.path.abspath(path)), tuple(columns) if columns is not None else None)
+        state = self._file_state(path)
+
+        with self._lock:
+            loading_lock = self._loading_locks.setdefault(key, threading.Lock())
+
+        with loading_lock:
+            with self._lock:
+                cached = self._datasets.get(key)
+                if cached is not None and cached[0] == state:
+                    self._datasets.move_to_end(key)
+                    logger.info(f"Reusing loaded dataset: {path}")
+                    record_cache_lookup('dataset', 1, 0)
+                    return cached[1]
+
+            record_cache_lookup('dataset', 0, 1)
+            logger.info(f"Loading dataset into shared store: {path}")
+            dataset = load_dataset(path, columns=columns)
+
+            with self._lock:
+                self._datasets[key] = (state, dataset)
+                self._datasets.move_to_end(key)
+                while len(self._datasets) > self.max_datasets:
+                    evicted, _ = self._datasets.popitem(last=False)
+                    self._loading_locks.pop(evicted, None)
+                    logger.info(f"Evicted dataset from shared store: {evicted[0]}")
+            return dataset
+
+    def clear(self) -> None:
+        """Drop every loaded dataset."""
+        with self._lock:
+            self._datasets.clear()
+
+_default_store = DatasetStore()
+
+def get_dataset_store() -> DatasetStore:
+    """
+    Get the process-wide dataset store.
+
+    Returns:
+        Shared DatasetStore instance
+    """
+    return _default_store
@@ -0,0 +1,295 @@
+"""
+Persistent on-disk store for featurized compositions.
+"""
+import os
+import json
+import threading
+import numpy as np
+from contextlib import contextmanager
+from typing import Iterator, Optional, Sequence, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: processes sharing a cache directory are not coordinated
+    fcntl = None
+
+from src.data.featurizer import FEATURIZER_VERSION, MagpieFeaturizer
+from src.services.metrics import record_cache_lookup
+from src.utils.helpers import atomic_output
+from src.utils.logger import setup_logger
+from config.settings import FEATURE_CACHE_CONFIG
+
+logger = setup_logger("material_analysis.data.feature_cache")
+
+class FeatureCache:
+    """
+    Memory-mapped float32 feature store keyed by normalized formula and featurizer version.
+
+    Several processes (web app, daemon, CLI, training) may share one directory. Writers hold
+    an exclusive lock on the directory's lock file while they reload the index, append at the
+    stored row count and rewrite the index; readers hold a shared lock and reload the index
+    whenever another process has replaced it.
+    """
+
+    def __init__(self,
+                 n_features: int,
+                 cache_dir: str = FEATURE_CACHE_CONFIG['CACHE_DIR'],
+                 max_bytes: int = FEATURE_CACHE_CONFIG['MAX_BYTES'],
+                 version: str = FEATURIZER_VERSION):
+        """
+        Initialize the cache, loading any existing index from disk.
+
+        Args:
+            n_features: Number of feature columns per entry
+            cache_dir: Root directory of the cache
+            max_bytes: Size limit of the feature array before least recently used entries are evicted
+            version: Featurizer version; each version gets its own store
+        """
+        self.n_features = n_features
+        self.max_bytes = max_bytes
+        self.version = version
+        self.directory = os.path.join(cache_dir, version)
+        self.features_path = os.path.join(self.directory, 'features.f32')
+        self.index_path = os.path.join(self.directory, 'index.json')
+        self.lock_path = os.path.join(self.directory, 'lock')
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._n_rows = 0
+        self._tick = 0
+        self._features = None
+        # Identity of the index file last loaded, and keys hit since the index was last written
+        self._index_stamp = None
+        self._touched = set()
+        with self._lock, self._file_lock(exclusive=False):
+            self._load_index()
+
+    @property
+    def row_bytes(self) -> int:
+        """Size of one stored feature row in bytes."""
+        return self.n_features * np.dtype(np.float32).itemsize
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool) -> Iterator[None]:
+        """Hold the directory's inter-process lock, shared for readers and exclusive for writers."""
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.lock_path, 'a+b') as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _stat_index(self) -> Optional[Tuple[int, int, int]]:
+        """Identify the current index file; the index is always replaced, never edited in place."""
+        try:
+            stat = os.stat(self.index_path)
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def _refresh(self) -> None:
+        """
+        Reload the index if another process has replaced it since it was last loaded.
+
+        Must be called with the file lock held. Keys hit by this instance in the meantime
+        keep their recency, so the next eviction still sees them as recently used.
+        """
+        if self._stat_index() == self._index_stamp:
+            return
+        self._features = None
+        self._entries = {}
+        self._n_rows = 0
+        self._tick = 0
+        self._load_index()
+        self._tick += 1
+        for key in self._touched:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries[key] = (entry[0], self._tick)
+
+    def _load_index(self) -> None:
+        """Load the index from disk, discarding it when it does not match the data file."""
+        self._index_stamp = self._stat_index()
+        if not os.path.exists(self.index_path) or not os.path.exists(self.features_path):
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            n_rows = index['n_rows']
+            if index['n_features'] != self.n_features or os.path.getsize(self.features_path) < n_rows * self.row_bytes:
+                logger.warning(f"Feature cache at {self.directory} is inconsistent, starting empty")
+                return
+            self._entries = {key: tuple(value) for key, value in index['entries'].items()}
+            self._n_rows = n_rows
+            self._tick = index['tick']
+            logger.info(f"Loaded feature cache with {len(self._entries)} entries from {self.directory}")
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Failed to load feature cache index: {str(e)}")
+
+    def _save_index(self) -> None:
+        """Atomically write the index next to the feature file."""
+        index = {
+            'version': self.version,
+            'n_features': self.n_features,
+            'n_rows': self._n_rows,
+            'tick': self._tick,
+            'entries': self._entries,
+        }
+        with atomic_output(self.index_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        self._index_stamp = self._stat_index()
+        self._touched = set()
+
+    def _feature_array(self) -> Optional[np.memmap]:
+        """Open (or reuse) the read-only memory map over the stored rows."""
+        if self._n_rows == 0:
+            return None
+        if self._features is None or self._features.shape[0] != self._n_rows:
+            self._features = np.memmap(self.features_path, dtype=np.float32, mode='r',
+                                       shape=(self._n_rows, self.n_features))
+        return self._features
+
+    def get(self, keys: Sequence[Optional[str]]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Look up stored feature rows.
+
+        Args:
+            keys: Normalized formula keys (None entries always miss)
+
+        Returns:
+            Tuple of (features, hits) where features has shape (len(keys), n_features)
+            with NaN rows for misses and hits is a boolean mask
+        """
+        features = np.full((len(keys), self.n_features), np.nan, dtype=np.float32)
+
+        with self._lock, self._file_lock(exclusive=False):
+            self._refresh()
+            slots = np.full(len(keys), -1, dtype=np.int64)
+            self._tick += 1
+            for i, key in enumerate(keys):
+                entry = self._entries.get(key) if key is not None else None
+                if entry is not None:
+                    slots[i] = entry[0]
+                    self._entries[key] = (entry[0], self._tick)
+                    self._touched.add(key)
+            hits = slots >= 0
+            stored = self._feature_array()
+            if stored is not None and hits.any():
+                features[hits] = stored[slots[hits]]
+
+        logger.info(f"Feature cache lookup: {int(hits.sum())}/{len(keys)} hits")
+        record_cache_lookup('feature', int(hits.sum()), int(len(keys) - hits.sum()))
+        return features, hits
+
+    def put(self, keys: Sequence[Optional[str]], features: np.ndarray) -> None:
+        """
+        Store feature rows for keys not already present and persist the index.
+
+        Args:
+            keys: Normalized formula keys (None entries are skipped)
+            features: Array of shape (len(keys), n_features)
+        """
+        with self._lock, self._file_lock(exclusive=True):
+            # Another process may have appended or compacted since the index was loaded
+            self._refresh()
+            new_rows = {}
+            for i, key in enumerate(keys):
+                if key is not None and key not in self._entries and key not in new_rows:
+                    new_rows[key] = i
+            if not new_rows:
+                return
+
+            os.makedirs(self.directory, exist_ok=True)
+            block = np.ascontiguousarray(features[list(new_rows.values())], dtype=np.float32)
+            self._tick += 1
+
+            # Drop the map before touching the file so appends also work on Windows
+            self._features = None
+            # Rows past the stored count belong to no index entry (a writer that died before
+            # saving the index), so they are overwritten rather than truncated away
+            with open(self.features_path, 'r+b' if os.path.exists(self.features_path) else 'wb') as f:
+                f.seek(self._n_rows * self.row_bytes)
+                f.write(block.tobytes())
+            for offset, key in enumerate(new_rows):
+                self._entries[key] = (self._n_rows + offset, self._tick)
+            self._n_rows += len(new_rows)
+
+            if self._n_rows * self.row_bytes > self.max_bytes:
+                self._evict()
+            self._save_index()
+
+        logger.info(f"Feature cache stored {len(new_rows)} new entries, total {len(self._entries)}")
+
+    def _evict(self) -> None:
+        """Keep the most recently used entries that fit in 90% of max_bytes and compact the file."""
+        capacity = int(0.9 * self.max_bytes) // self.row_bytes
+        ranked = sorted(self._entries.items(), key=lambda item: item[1][1], reverse=True)
+        kept = ranked[:capacity]
+
+        stored = np.memmap(self.features_path, dtype=np.float32, mode='r',
+                           shape=(self._n_rows, self.n_features))
+        compacted = np.ascontiguousarray(stored[[slot for _, (slot, _) in kept]])
+        del stored
+
+        with atomic_output(self.features_path) as f:
+            f.write(compacted.tobytes())
+
+        logger.info(f"Feature cache evicted {len(ranked) - len(kept)} entries")
+        self._entries = {key: (slot, tick) for slot, (key, (_, tick)) in enumerate(kept)}
+        self._n_rows = len(kept)
+
+    def clear(self) -> None:
+        """Remove every stored entry."""
+        with self._lock, self._file_lock(exclusive=True):
+            self._features = None
+            self._entries = {}
+            self._n_rows = 0
+            self._touched = set()
+            for path in (self.features_path, self.index_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._index_stamp = None
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+# Set by feature_cache_enabled; None follows FEATURE_CACHE_CONFIG['ENABLED']
+_enabled_override = None
+
+@contextmanager
+def feature_cache_enabled(enabled: bool) -> Iterator[None]:
+    """
+    Turn the process-wide feature cache on or off inside a block, leaving the settings untouched.
+
+    Args:
+        enabled: Whether get_feature_cache returns the cache inside the block
+    """
+    global _enabled_override
+    previous = _enabled_override
+    _enabled_override = enabled
+    try:
+        yield
+    finally:
+        _enabled_override = previous
+
+def get_feature_cache() -> Optional[FeatureCache]:
+    """
+    Get the process-wide magpie feature cache.
+
+    Returns:
+        Shared FeatureCache instance, or None when caching is disabled in settings
+        or by feature_cache_enabled
+    """
+    global _default_cache
+    enabled = FEATURE_CACHE_CONFIG['ENABLED'] if _enabled_override is None else _enabled_override
+    if not enabled:
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = FeatureCache(n_features=len(MagpieFeaturizer().feature_labels()))
+        return _default_cache
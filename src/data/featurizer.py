@@ -0,0 +1,276 @@
+"""
+Vectorized magpie featurization for material compositions.
+"""
+import os
+import json
+import numpy as np
+import pandas as pd
+from functools import lru_cache
+from importlib import metadata
+from typing import Any, List, Optional, Sequence, Tuple
+from scipy import sparse
+
+from src.data.elements import ELEMENT_SYMBOLS, NUM_ELEMENTS
+from src.utils.helpers import atomic_output
+from src.utils.logger import setup_logger
+from config.settings import FEATURE_CACHE_CONFIG
+
+logger = setup_logger("material_analysis.data.featurizer")
+
+# Bump whenever the produced feature values or their order change
+FEATURIZER_VERSION = "magpie-1"
+
+def _preset_path() -> Optional[str]:
+    """Get the file the tabulated magpie preset is kept in, or None when the feature cache is disabled."""
+    if not FEATURE_CACHE_CONFIG['ENABLED']:
+        return None
+    return os.path.join(FEATURE_CACHE_CONFIG['CACHE_DIR'], f"{FEATURIZER_VERSION}-preset.npz")
+
+@lru_cache(maxsize=1)
+def _load_magpie_preset() -> Tuple[List[str], List[str], List[str], np.ndarray]:
+    """
+    Load the magpie preset once and tabulate every elemental property.
+
+    matminer and pymatgen take seconds to import, so the table is kept on disk
+    (per matminer version) and they are only imported to rebuild it.
+
+    Returns:
+        Tuple of (features, stats, feature_labels, property_table) where
+        property_table has shape (NUM_ELEMENTS, len(features))
+    """
+    path = _preset_path()
+    matminer_version = metadata.version('matminer')
+    if path is not None and os.path.exists(path):
+        try:
+            with np.load(path, allow_pickle=False) as preset:
+                names = json.loads(str(preset['names']))
+                if names['matminer'] == matminer_version:
+                    return names['features'], names['stats'], names['labels'], preset['table']
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable magpie preset {path}: {str(e)}")
+
+    features, stats, labels, table = _tabulate_magpie_preset()
+    if path is not None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        names = {'matminer': matminer_version, 'features': features, 'stats': stats, 'labels': labels}
+        with atomic_output(path) as f:
+            np.savez(f, names=np.array(json.dumps(names)), table=table)
+    return features, stats, labels, table
+
+def _tabulate_magpie_preset() -> Tuple[List[str], List[str], List[str], np.ndarray]:
+    """Build the magpie preset table from matminer's data source."""
+    from matminer.featurizers.composition import ElementProperty
+    from pymatgen.core.periodic_table import Element
+
+    ep_featurizer = ElementProperty.from_preset('magpie')
+    features = list(ep_featurizer.features)
+    stats = list(ep_featurizer.stats)
+    labels = ep_featurizer.feature_labels()
+
+    table = np.full((NUM_ELEMENTS, len(features)), np.nan, dtype=np.float64)
+    for i, symbol in enumerate(ELEMENT_SYMBOLS):
+        element = Element(symbol)
+        for j, feature in enumerate(features):
+            try:
+                table[i, j] = ep_featurizer.data_source.get_elemental_property(element, feature)
+            except (KeyError, TypeError, ValueError):
+                pass
+
+    return features, stats, labels, table
+
+def compositions_to_matrix(compositions: Sequence[Any]) -> sparse.csr_matrix:
+    """
+    Build a sparse composition-by-element amount matrix.
+
+    Args:
+        compositions: Sequence of Composition objects (anything else becomes an empty row)
+
+    Returns:
+        CSR matrix of shape (len(compositions), NUM_ELEMENTS) holding element amounts
+    """
+    from pymatgen.core.composition import Composition
+
+    indptr = np.zeros(len(compositions) + 1, dtype=np.int64)
+    indices = []
+    amounts = []
+    for row, comp in enumerate(compositions):
+        if isinstance(comp, Composition):
+            for element, amount in comp.element_composition.items():
+                if amount > 0:
+                    indices.append(element.Z - 1)
+                    amounts.append(amount)
+        indptr[row + 1] = len(indices)
+
+    return sparse.csr_matrix(
+        (np.asarray(amounts, dtype=np.float64), np.asarray(indices, dtype=np.int64), indptr),
+        shape=(len(compositions), NUM_ELEMENTS)
+    )
+
+def formula_keys(matrix: sparse.csr_matrix) -> List[Optional[str]]:
+    """
+    Build normalized formula keys from a composition-by-element amount matrix.
+
+    Elements are ordered by atomic number and amounts are reduced to fractions,
+    so 'Fe2O3', 'Fe4O6' and 'O3Fe2' share the key 'O0.6Fe0.4'.
+
+    Args:
+        matrix: CSR matrix of shape (n_materials, NUM_ELEMENTS) with element amounts
+
+    Returns:
+        List of keys, None for rows without elements
+    """
+    matrix = sparse.csr_matrix(matrix)
+    keys = []
+    for row in range(matrix.shape[0]):
+        start, end = matrix.indptr[row], matrix.indptr[row + 1]
+        if start == end:
+            keys.append(None)
+            continue
+        indices = matrix.indices[start:end]
+        amounts = matrix.data[start:end]
+        order = np.argsort(indices, kind='stable')
+        fractions = amounts[order] / amounts.sum()
+        keys.append(''.join(
+            f"{ELEMENT_SYMBOLS[index]}{fraction:.6g}"
+            for index, fraction in zip(indices[order], fractions)
+        ))
+    return keys
+
+class MagpieFeaturizer:
+    """Batch replacement for matminer's magpie ElementProperty with identical output columns."""
+
+    def __init__(self, cache: Optional[Any] = None):
+        """
+        Initialize the featurizer from the magpie preset.
+
+        Args:
+            cache: Optional FeatureCache; when given, only compositions missing from it are computed
+        """
+        self.features, self.stats, self._labels, self.property_table = _load_magpie_preset()
+        self.cache = cache
+
+    def feature_labels(self) -> List[str]:
+        """
+        Get feature column names in matminer order.
+
+        Returns:
+            List of feature labels
+        """
+        return list(self._labels)
+
+    def featurize_matrix(self, matrix: sparse.csr_matrix, dtype: Any = np.float64) -> np.ndarray:
+        """
+        Featurize a composition-by-element amount matrix, going through the cache if configured.
+
+        Cached values are stored as float32, so with a cache every row is rounded to
+        float32 precision (which is also what CatBoost evaluates on).
+
+        Args:
+            matrix: CSR matrix of shape (n_materials, NUM_ELEMENTS) with element amounts
+            dtype: Output dtype; float32 halves the memory of large feature matrices
+
+        Returns:
+            Feature array of shape (n_materials, n_labels); rows without elements are NaN
+        """
+        matrix = sparse.csr_matrix(matrix)
+        if self.cache is None:
+            return self._compute(matrix).astype(dtype, copy=False)
+
+        keys = formula_keys(matrix)
+        cached, hits = self.cache.get(keys)
+        misses = np.flatnonzero(~hits)
+        if len(misses):
+            computed = self._compute(matrix[misses]).astype(np.float32)
+            cached[misses] = computed
+            self.cache.put([keys[i] for i in misses], computed)
+        return cached.astype(dtype, copy=False)
+
+    def _compute(self, matrix: sparse.csr_matrix) -> np.ndarray:
+        """
+        Compute every magpie statistic for a composition-by-element amount matrix.
+
+        Args:
+            matrix: CSR matrix of shape (n_materials, NUM_ELEMENTS) with element amounts
+
+        Returns:
+            Feature array of shape (n_materials, n_labels); rows without elements are NaN
+        """
+        n_rows = matrix.shape[0]
+        n_features = len(self.features)
+        result = np.full((n_rows, n_features * len(self.stats)), np.nan, dtype=np.float64)
+
+        counts = np.diff(matrix.indptr)
+        valid = counts > 0
+        if not valid.any():
+            return result
+
+        # Segment reductions run over stored entries only, so empty rows are skipped
+        starts = matrix.indptr[:-1][valid]
+        n_valid = len(starts)
+        entry_rows = np.repeat(np.arange(n_valid), counts[valid])
+        weights = matrix.data
+        values = self.property_table[matrix.indices]
+
+        # Row sums go through a sparse indicator so they accumulate in element order,
+        # exactly like np.average does for a single composition
+        segments = sparse.csr_matrix(
+            (np.ones(len(weights)), np.arange(len(weights)), np.append(starts, len(weights))),
+            shape=(n_valid, len(weights))
+        )
+        total_weight = segments @ weights
+
+        minimum = np.minimum.reduceat(values, starts, axis=0)
+        maximum = np.maximum.reduceat(values, starts, axis=0)
+        mean = (matrix[valid] @ self.property_table) / total_weight[:, None]
+        deviation = np.abs(values - mean[entry_rows]) * weights[:, None]
+        avg_dev = (segments @ deviation) / total_weight[:, None]
+
+        # Mode: smallest value among the entries carrying the largest weight
+        max_weight = np.maximum.reduceat(weights, starts)
+        is_mode = np.isclose(weights, max_weight[entry_rows])
+        mode = np.minimum.reduceat(np.where(is_mode[:, None], values, np.inf), starts, axis=0)
+
+        computed = {
+            'minimum': minimum,
+            'maximum': maximum,
+            'range': maximum - minimum,
+            'mean': mean,
+            'avg_dev': avg_dev,
+            'mode': mode,
+        }
+
+        # Interleave as feature-major, stat-minor to match matminer's label order
+        stacked = np.stack([computed[stat] for stat in self.stats], axis=2)
+        result[valid] = stacked.reshape(stacked.shape[0], -1)
+        return result
+
+    def featurize_compositions(self, compositions: Sequence[Any]) -> np.ndarray:
+        """
+        Featurize a sequence of Composition objects.
+
+        Args:
+            compositions: Sequence of Composition objects (or None for unparseable rows)
+
+        Returns:
+            Feature array of shape (len(compositions), n_labels)
+        """
+        return self.featurize_matrix(compositions_to_matrix(compositions))
+
+    def featurize_dataframe(self, df: pd.DataFrame, col_id: str = 'composition') -> pd.DataFrame:
+        """
+        Append magpie feature columns to a DataFrame, like ElementProperty.featurize_dataframe.
+
+        Args:
+            df: Input DataFrame
+            col_id: Name of the column holding Composition objects
+
+        Returns:
+            New DataFrame with the feature columns appended
+        """
+        logger.info(f"Featurizing {len(df)} compositions")
+        features = pd.DataFrame(
+            self.featurize_compositions(df[col_id].tolist()),
+            columns=self.feature_labels(),
+            index=df.index
+        )
+        return pd.concat([df, features], axis=1)
@@ -0,0 +1,260 @@
+"""
+Tabular input/output for CSV, Parquet and Arrow (Feather) files.
+"""
+import os
+import pandas as pd
+from typing import Any, Iterator, List, Optional, Sequence
+
+from src.utils.helpers import ensure_directory_exists, temporary_path
+from config.settings import IO_CONFIG
+
+_PARQUET_EXTENSIONS = ('.parquet', '.pq')
+_ARROW_EXTENSIONS = ('.feather', '.arrow', '.ipc')
+
+def table_format(path: str) -> str:
+    """
+    Infer the table format from a file extension.
+
+    Args:
+        path: File path
+
+    Returns:
+        One of 'csv', 'parquet' or 'arrow'
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in _PARQUET_EXTENSIONS:
+        return 'parquet'
+    if extension in _ARROW_EXTENSIONS:
+        return 'arrow'
+    return 'csv'
+
+def _require_pyarrow():
+    """Import pyarrow, which is only needed for the columnar formats."""
+    try:
+        import pyarrow
+        return pyarrow
+    except ImportError as e:
+        raise ImportError("pyarrow is required for Parquet and Arrow files: pip install pyarrow") from e
+
+def _open_arrow(path: str):
+    """Open an Arrow IPC file through a memory map, so record batches are read without copying."""
+    pa = _require_pyarrow()
+    import pyarrow.ipc
+
+    return pa.ipc.open_file(pa.memory_map(path, 'r'))
+
+def read_table(path: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Read a CSV, Parquet or Arrow file, optionally projecting a subset of columns.
+
+    Args:
+        path: File path
+        columns: Columns to load (None loads all)
+
+    Returns:
+        Loaded DataFrame
+    """
+    columns = list(columns) if columns is not None else None
+    file_format = table_format(path)
+    if file_format == 'parquet':
+        _require_pyarrow()
+        return pd.read_parquet(path, columns=columns)
+    if file_format == 'arrow':
+        table = _open_arrow(path).read_all()
+        if columns is not None:
+            table = table.select(columns)
+        return table.to_pandas()
+    return pd.read_csv(path, usecols=columns)
+
+def iter_table_chunks(path: str, chunk_size: int, columns: Optional[Sequence[str]] = None) -> Iterator[pd.DataFrame]:
+    """
+    Stream a CSV, Parquet or Arrow file in chunks.
+
+    Args:
+        path: File path
+        chunk_size: Maximum rows per chunk
+        columns: Columns to load (None loads all)
+
+    Yields:
+        DataFrames of at most chunk_size rows with a running RangeIndex
+    """
+    columns = list(columns) if columns is not None else None
+    file_format = table_format(path)
+    offset = 0
+    if file_format == 'csv':
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunk_size)
+        return
+
+    if file_format == 'parquet':
+        _require_pyarrow()
+        import pyarrow.parquet as pq
+
+        batches = pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=columns)
+    else:
+        reader = _open_arrow(path)
+        batches = (
+            batch.slice(start, chunk_size)
+            for batch in (reader.get_batch(i) for i in range(reader.num_record_batches))
+            for start in range(0, batch.num_rows, chunk_size)
+        )
+
+    for batch in batches:
+        if columns is not None and file_format == 'arrow':
+            batch = batch.select(columns)
+        frame = batch.to_pandas()
+        frame.index = pd.RangeIndex(offset, offset + len(frame))
+        offset += len(frame)
+        yield frame
+
+class TableWriter:
+    """
+    Append DataFrames to a CSV, Parquet or Arrow file, publishing it atomically on close.
+
+    Parquet and Arrow files have one schema. Unless one is given, it is taken from the
+    first frame, with all-null columns typed as strings, and later frames are cast to it.
+    """
+
+    def __init__(self, path: str, columns: Optional[Sequence[str]] = None, compression: Optional[str] = None,
+                 schema: Optional[Any] = None):
+        """
+        Initialize the writer.
+
+        Args:
+            path: Output file path; the format follows the extension
+            columns: Columns to write (None writes all)
+            compression: Codec for Parquet/Arrow output (defaults from IO_CONFIG)
+            schema: pyarrow.Schema of Parquet/Arrow output (None infers it from the first frame)
+        """
+        self.path = path
+        self.columns = list(columns) if columns is not None else None
+        self.format = table_format(path)
+        self.compression = compression or IO_CONFIG['COMPRESSION']
+        self.rows_written = 0
+        self._schema = schema
+        self._sink = None
+        self._writer = None
+        ensure_directory_exists(path)
+        # Unique per writer, so jobs saving to the same path never share a partial file
+        self.tmp_path = temporary_path(path)
+
+    def write(self, frame: pd.DataFrame) -> None:
+        """
+        Append rows to the output.
+
+        Args:
+            frame: Rows to write
+        """
+        if self.columns is not None:
+            frame = frame[self.columns]
+
+        if self.format == 'csv':
+            header = self._sink is None
+            if header:
+                self._sink = open(self.tmp_path, 'w', newline='', encoding='utf-8')
+            frame.to_csv(self._sink, index=False, header=header)
+        else:
+            pa = _require_pyarrow()
+            if self._schema is None:
+                self._schema = self._infer_schema(pa, frame)
+            try:
+                table = pa.Table.from_pandas(frame, schema=self._schema, preserve_index=False)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                # Pandas typed a column differently in this frame (e.g. numbers in a column
+                # that was empty so far); convert as inferred and cast to the file schema
+                table = pa.Table.from_pandas(frame, preserve_index=False).select(self._schema.names).cast(self._schema)
+            if self._writer is None:
+                self._writer = self._open_columnar_writer(pa, self._schema)
+            self._writer.write_table(table)
+        self.rows_written += len(frame)
+
+    @staticmethod
+    def _infer_schema(pa, frame: pd.DataFrame):
+        """Infer the output schema from a frame, typing columns without any value as strings."""
+        schema = pa.Schema.from_pandas(frame, preserve_index=False)
+        for i, field in enumerate(schema):
+            # An empty CSV column is read as all-NaN floats, so its type says nothing either
+            empty = len(frame) > 0 and frame[field.name].isna().all()
+            if pa.types.is_null(field.type) or empty:
+                schema = schema.set(i, field.with_type(pa.string()))
+        return schema
+
+    def _open_columnar_writer(self, pa, schema):
+        """Create the Parquet or Arrow IPC writer for the temporary file."""
+        if self.format == 'parquet':
+            import pyarrow.parquet as pq
+
+            return pq.ParquetWriter(self.tmp_path, schema, compression=self.compression)
+        import pyarrow.ipc
+
+        options = pa.ipc.IpcWriteOptions(compression=self.compression)
+        return pa.ipc.new_file(self.tmp_path, schema, options=options)
+
+    def close(self) -> None:
+        """Finish the file and move it into place."""
+        if self._sink is None and self._writer is None:
+            # Nothing was ever written: publish a readable empty table rather than nothing
+            self._write_empty()
+        if self._sink is not None:
+            self._sink.close()
+        if self._writer is not None:
+            self._writer.close()
+        os.replace(self.tmp_path, self.path)
+
+    def _write_empty(self) -> None:
+        """Write a table without rows that has the requested schema or columns."""
+        if self.format == 'csv':
+            names = self._schema.names if self._schema is not None else self.columns or []
+            pd.DataFrame(columns=names).to_csv(self.tmp_path, index=False)
+            return
+        pa = _require_pyarrow()
+        schema = self._schema
+        if schema is None:
+            schema = pa.schema([(name, pa.string()) for name in self.columns or []])
+        self._writer = self._open_columnar_writer(pa, schema)
+        self._writer.write_table(schema.empty_table())
+
+    def abort(self) -> None:
+        """Discard the partial output."""
+        if self._sink is not None:
+            self._sink.close()
+        if self._writer is not None:
+            self._writer.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+    def __enter__(self) -> 'TableWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+def write_table(frame: pd.DataFrame, path: str, columns: Optional[Sequence[str]] = None,
+                compression: Optional[str] = None) -> None:
+    """
+    Write a DataFrame atomically as CSV, Parquet or Arrow depending on the extension.
+
+    Args:
+        frame: Rows to write
+        path: Output file path
+        columns: Columns to write (None writes all)
+        compression: Codec for Parquet/Arrow output (defaults from IO_CONFIG)
+    """
+    with TableWriter(path, columns=columns, compression=compression) as writer:
+        writer.write(frame)
+
+def parse_columns(text: Optional[str]) -> Optional[List[str]]:
+    """
+    Parse a comma-separated column list.
+
+    Args:
+        text: Comma-separated column names, or None
+
+    Returns:
+        List of column names, or None when no columns were given
+    """
+    if not text:
+        return None
+    return [column.strip() for column in text.split(',') if column.strip()]
@@ -0,0 +1,202 @@
+"""
+Per-file manifests of stored predictions, so re-screening a changed file only predicts its new rows.
+"""
+import os
+import glob
+import json
+import hashlib
+import threading
+import numpy as np
+from typing import Any, Dict, Optional, Tuple
+
+from src.data.featurizer import FEATURIZER_VERSION
+from src.utils.helpers import atomic_output
+from src.utils.logger import setup_logger
+from config.settings import SCREENING_CONFIG
+
+logger = setup_logger("material_analysis.data.prediction_store")
+
+MANIFEST_VERSION = 1
+
+_versions = {}
+_versions_lock = threading.Lock()
+
+def file_fingerprint(path: str) -> Dict[str, int]:
+    """
+    Fingerprint a file by its size and modification time.
+
+    Args:
+        path: File path
+
+    Returns:
+        Dictionary with 'size' and 'mtime_ns'
+    """
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+def model_version(model_path: str) -> str:
+    """
+    Identify the exact model file that produced a prediction.
+
+    Args:
+        model_path: Model file path
+
+    Returns:
+        First 16 hex digits of the file's SHA-256 digest
+    """
+    from src.models.registry import _file_digest
+
+    fingerprint = file_fingerprint(model_path)
+    key = (os.path.normcase(os.path.abspath(model_path)), fingerprint['size'], fingerprint['mtime_ns'])
+    with _versions_lock:
+        version = _versions.get(key)
+    if version is None:
+        version = _file_digest(model_path)[:16]
+        with _versions_lock:
+            _versions[key] = version
+    return version
+
+def manifest_path(input_path: str, version: str, directory: str = SCREENING_CONFIG['MANIFEST_DIR']) -> str:
+    """
+    Get the manifest path of an input file under one model version.
+
+    Args:
+        input_path: Screening input file
+        version: Model version (see model_version)
+        directory: Manifest directory
+
+    Returns:
+        Path of the .npz manifest
+    """
+    name = hashlib.sha1(os.path.normcase(os.path.abspath(input_path)).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(directory, FEATURIZER_VERSION, f"{name}-{version}.npz")
+
+def discard_manifests(input_path: str, directory: str = SCREENING_CONFIG['MANIFEST_DIR']) -> int:
+    """
+    Delete the stored predictions of an input file under every model version.
+
+    Args:
+        input_path: Screening input file
+        directory: Manifest directory
+
+    Returns:
+        Number of manifests deleted
+    """
+    pattern = manifest_path(input_path, '*', directory)
+    paths = glob.glob(pattern)
+    for path in paths:
+        os.remove(path)
+    return len(paths)
+
+class PredictionManifest:
+    """
+    Predictions of one input file under one model version, keyed by composition hash.
+
+    Predictions depend only on a row's composition, so inserted and edited rows are exactly
+    the rows whose composition hash is missing from the manifest.
+    """
+
+    def __init__(self, path: str, input_path: str, version: str, fingerprint: Optional[Dict[str, int]] = None,
+                 hashes: Optional[np.ndarray] = None, pred: Optional[np.ndarray] = None):
+        """
+        Initialize the manifest.
+
+        Args:
+            path: Manifest file path
+            input_path: Screening input file
+            version: Model version the predictions were made with
+            fingerprint: Input file fingerprint when the manifest was written
+            hashes: Sorted composition hashes
+            pred: Predicted probability per hash
+        """
+        self.path = path
+        self.input_path = input_path
+        self.version = version
+        self.fingerprint = fingerprint
+        self.hashes = hashes if hashes is not None else np.empty(0, dtype=np.uint64)
+        self.pred = pred if pred is not None else np.empty(0, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    @property
+    def unchanged(self) -> bool:
+        """Whether the input file still has the fingerprint it had when the manifest was written."""
+        return self.fingerprint is not None and os.path.exists(self.input_path) \
+            and self.fingerprint == file_fingerprint(self.input_path)
+
+    def lookup(self, hashes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Look up stored predictions.
+
+        Args:
+            hashes: Composition hashes
+
+        Returns:
+            Tuple of (predictions, known mask); predictions of unknown hashes are NaN
+        """
+        position = np.searchsorted(self.hashes, hashes)
+        known = position < len(self.hashes)
+        known[known] = self.hashes[position[known]] == hashes[known]
+        pred = np.full(len(hashes), np.nan, dtype=np.float64)
+        pred[known] = self.pred[position[known]]
+        return pred, known
+
+    def replace(self, hashes: np.ndarray, pred: np.ndarray) -> None:
+        """
+        Replace the contents with the compositions of the current file.
+
+        Compositions of removed or edited rows are dropped, so the manifest tracks the file.
+
+        Args:
+            hashes: Composition hashes
+            pred: Predicted probability per hash
+        """
+        hashes, first = np.unique(hashes, return_index=True)
+        self.hashes = hashes
+        self.pred = np.asarray(pred, dtype=np.float64)[first]
+        self.fingerprint = file_fingerprint(self.input_path)
+
+    def save(self) -> None:
+        """Atomically write the manifest."""
+        metadata = {
+            'version': MANIFEST_VERSION,
+            'input_path': os.path.abspath(self.input_path),
+            'model_version': self.version,
+            'fingerprint': self.fingerprint,
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with atomic_output(self.path) as f:
+            np.savez(f, hashes=self.hashes, pred=self.pred, metadata=np.array(json.dumps(metadata)))
+        logger.info(f"Stored {len(self)} predictions for {self.input_path} (model {self.version})")
+
+    @classmethod
+    def load(cls, input_path: str, model_path: str,
+             directory: str = SCREENING_CONFIG['MANIFEST_DIR']) -> 'PredictionManifest':
+        """
+        Load the manifest of an input file for the current version of a model.
+
+        Args:
+            input_path: Screening input file
+            model_path: Model file path
+            directory: Manifest directory
+
+        Returns:
+            PredictionManifest; empty when none was stored or it is unreadable
+        """
+        version = model_version(model_path)
+        path = manifest_path(input_path, version, directory)
+        manifest = cls(path, input_path, version)
+        if not os.path.exists(path):
+            return manifest
+        try:
+            with np.load(path, allow_pickle=False) as arrays:
+                metadata: Dict[str, Any] = json.loads(str(arrays['metadata']))
+                if metadata.get('version') != MANIFEST_VERSION:
+                    raise ValueError(f"unsupported version {metadata.get('version')}")
+                manifest.hashes = arrays['hashes']
+                manifest.pred = arrays['pred']
+            manifest.fingerprint = metadata.get('fingerprint')
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable prediction manifest {path}: {str(e)}")
+        return manifest
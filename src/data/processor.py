@@ -1,32 +1,186 @@
 """
 Data processing utilities for material property prediction.
 """
+import os
+import hashlib
 import pandas as pd
 import numpy as np
-from typing import Tuple, List, Dict, Any
+from typing import Tuple, List, Dict, Any, Optional
 from sklearn.model_selection import train_test_split
-from matminer.featurizers.composition import ElementProperty
-from pymatgen.core.composition import Composition
 
-from src.utils.helpers import safe_composition_conversion
+from src.data.composition import parse_compositions
+from src.data.featurizer import FEATURIZER_VERSION, MagpieFeaturizer
+from src.data.feature_cache import get_feature_cache
+from src.utils.helpers import atomic_output
 from src.utils.logger import setup_logger
+from config.settings import TRAINING_CONFIG
 
 logger = setup_logger("material_analysis.data.processor")
 
 class DataProcessor:
     """Class for processing material data for training and prediction."""
     
-    def __init__(self):
-        """Initialize the data processor."""
-        self.ep_featurizer = ElementProperty.from_preset('magpie')
-        logger.info("DataProcessor initialized with magpie ElementProperty featurizer")
+    def __init__(self, snapshot_dir: Optional[str] = TRAINING_CONFIG['FEATURE_SNAPSHOT_DIR']):
+        """
+        Initialize the data processor.
+        
+        Args:
+            snapshot_dir: Directory for featurized training snapshots (None disables them)
+        """
+        self.ep_featurizer = MagpieFeaturizer(cache=get_feature_cache())
+        self.snapshot_dir = snapshot_dir
+        # Number of distinct formulas featurized by the last load_training_data call
+        self.new_formulas = 0
+        logger.info("DataProcessor initialized with vectorized magpie featurizer")
+    
+    def _featurize(self, substances: pd.Series) -> pd.DataFrame:
+        """
+        Parse formulas and compute magpie features.
+        
+        Args:
+            substances: Series of formula strings
+            
+        Returns:
+            DataFrame of magpie features aligned with the input index
+        """
+        compositions = parse_compositions(substances)
+        features = self.ep_featurizer.featurize_matrix(compositions.to_matrix())
+        return pd.DataFrame(features, columns=self.ep_featurizer.feature_labels(), index=substances.index)
+    
+    def _snapshot_path(self, file_path: str) -> str:
+        """Get the snapshot file belonging to a training data file."""
+        digest = hashlib.sha256(os.path.abspath(file_path).encode('utf-8')).hexdigest()[:16]
+        name = os.path.splitext(os.path.basename(file_path))[0]
+        return os.path.join(self.snapshot_dir, f"{name}-{digest}.npz")
+    
+    def _load_snapshot(self, path: str) -> Tuple[pd.Index, Optional[np.ndarray]]:
+        """Load the formulas and feature rows of a snapshot, if it was written by this featurizer."""
+        if not os.path.exists(path):
+            return pd.Index([]), None
+        try:
+            with np.load(path, allow_pickle=False) as snapshot:
+                if (str(snapshot['version']) != FEATURIZER_VERSION
+                        or list(snapshot['labels']) != self.ep_featurizer.feature_labels()):
+                    logger.info(f"Ignoring training snapshot {path} from another featurizer")
+                    return pd.Index([]), None
+                return pd.Index(snapshot['substances']), snapshot['features']
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable training snapshot {path}: {str(e)}")
+            return pd.Index([]), None
+    
+    def _featurize_training(self, file_path: str, substances: pd.Series) -> pd.DataFrame:
+        """
+        Featurize training formulas, computing only those missing from the file's snapshot.
+        
+        The snapshot keeps one feature row per distinct formula of the last run, so
+        appending a few labelled rows to a training file featurizes just those rows.
+        
+        Args:
+            file_path: Training data file the formulas come from
+            substances: Series of formula strings
+            
+        Returns:
+            DataFrame of magpie features aligned with the input index
+        """
+        if self.snapshot_dir is None:
+            self.new_formulas = substances.nunique()
+            return self._featurize(substances)
+        
+        path = self._snapshot_path(file_path)
+        known, known_features = self._load_snapshot(path)
+        formulas = pd.Index(substances.astype(str).unique())
+        positions = known.get_indexer(formulas)
+        missing = positions < 0
+        self.new_formulas = int(missing.sum())
+        
+        labels = self.ep_featurizer.feature_labels()
+        features = np.empty((len(formulas), len(labels)), dtype=np.float64)
+        if known_features is not None and not missing.all():
+            features[~missing] = known_features[positions[~missing]]
+        if missing.any():
+            features[missing] = self._featurize(pd.Series(formulas[missing])).to_numpy()
+        logger.info(f"Featurized {self.new_formulas} new of {len(formulas)} distinct training formulas")
+        
+        if self.new_formulas or len(formulas) != len(known):
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+            with atomic_output(path) as f:
+                np.savez(f, version=np.array(FEATURIZER_VERSION), labels=np.array(labels),
+                         substances=formulas.to_numpy(dtype=str), features=features)
+        
+        rows = formulas.get_indexer(substances.astype(str))
+        return pd.DataFrame(features[rows], columns=labels, index=substances.index)
+    
+    def load_training_data(self,
+                           file_path: str,
+                           target_column: str = 'label',
+                           substance_column: str = 'Substance') -> Tuple[pd.DataFrame, pd.Series, pd.Series]:
+        """
+        Load a labelled CSV file and featurize it through the training snapshot.
+        
+        Args:
+            file_path: Path to CSV data file
+            target_column: Name of the target column (default: 'label')
+            substance_column: Name of the substance column containing compositions
+            
+        Returns:
+            Tuple of (X, y, substances)
+        """
+        data = pd.read_csv(file_path)
+        logger.info(f"Loaded {len(data)} samples from {file_path}")
+        
+        # Verify target column exists
+        if target_column not in data.columns:
+            available_columns = ', '.join(data.columns)
+            error_msg = f"Target column '{target_column}' not found in data. Available columns: {available_columns}"
+            logger.error(error_msg)
+            raise ValueError(error_msg)
+        
+        # Generate features using magpie
+        logger.info("Generating magpie features")
+        X = self._featurize_training(file_path, data[substance_column])
+        y = data[target_column]
+        
+        logger.info(f"Feature matrix shape: {X.shape}, Label vector shape: {y.shape}")
+        return X, y, data[substance_column].astype(str)
+    
+    def stable_split(self,
+                     X: pd.DataFrame,
+                     y: pd.Series,
+                     substances: pd.Series,
+                     test_size: float = 0.2) -> Tuple[pd.DataFrame, pd.DataFrame, pd.Series, pd.Series]:
+        """
+        Stratified split by a hash of each formula, so the split depends on the formulas, not on row order.
+        
+        Within each class, the test_size share of rows with the lowest hashes is the test set.
+        Warm-started training relies on this: a random split of the grown file would move
+        many rows the previous model trained on into the test set, whereas appending rows
+        here only shifts each class's boundary by about test_size times the rows appended.
+        
+        Args:
+            X: Features
+            y: Labels
+            substances: Formula of each row
+            test_size: Proportion of each class to use for testing
+            
+        Returns:
+            Tuple of (X_train, X_test, y_train, y_test)
+        """
+        hashes = pd.util.hash_pandas_object(substances.reset_index(drop=True), index=False).to_numpy()
+        labels = np.asarray(y)
+        test = np.zeros(len(labels), dtype=bool)
+        for label in np.unique(labels):
+            rows = np.flatnonzero(labels == label)
+            n_test = int(round(test_size * len(rows)))
+            test[rows[np.argsort(hashes[rows], kind='stable')[:n_test]]] = True
+        return X[~test], X[test], y[~test], y[test]
     
     def load_and_split_data(self, 
                             file_path: str, 
                             target_column: str = 'label',
                             substance_column: str = 'Substance',
                             test_size: float = 0.2, 
-                            random_state: int = 42) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+                            random_state: int = 42,
+                            stable: bool = False) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
         """
         Load data from CSV file, process features, and split into train and test sets.
         
@@ -36,6 +190,7 @@ class DataProcessor:
             substance_column: Name of the substance column containing compositions
             test_size: Proportion of data to use for testing
             random_state: Random state for reproducibility
+            stable: Split by formula hash instead of a random stratified split (see stable_split)
             
         Returns:
             Tuple of (X_train, X_test, y_train, y_test)
@@ -43,35 +198,17 @@ class DataProcessor:
         logger.info(f"Loading data from {file_path}")
         
         try:
-            # Load data
-            data = pd.read_csv(file_path)
-            logger.info(f"Loaded {len(data)} samples from {file_path}")
-            
-            # Verify target column exists
-            if target_column not in data.columns:
-                available_columns = ', '.join(data.columns)
-                error_msg = f"Target column '{target_column}' not found in data. Available columns: {available_columns}"
-                logger.error(error_msg)
-                raise ValueError(error_msg)
-            
-            # Convert composition
-            data['composition'] = data[substance_column].apply(safe_composition_conversion)
-            
-            # Generate features using magpie
-            logger.info("Generating magpie features")
-            df_features = self.ep_featurizer.featurize_dataframe(data, col_id='composition')
-            
-            # Prepare features and target
-            X = df_features.drop([substance_column, 'composition', target_column], axis=1)
-            y = df_features[target_column]
-            
-            logger.info(f"Feature matrix shape: {X.shape}, Label vector shape: {y.shape}")
+            X, y, substances = self.load_training_data(file_path, target_column, substance_column)
             
             # Split data
-            logger.info(f"Splitting data with test_size={test_size}, random_state={random_state}")
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=test_size, random_state=random_state, stratify=y
-            )
+            if stable:
+                logger.info(f"Splitting data by formula hash with test_size={test_size}")
+                X_train, X_test, y_train, y_test = self.stable_split(X, y, substances, test_size)
+            else:
+                logger.info(f"Splitting data with test_size={test_size}, random_state={random_state}")
+                X_train, X_test, y_train, y_test = train_test_split(
+                    X, y, test_size=test_size, random_state=random_state, stratify=y
+                )
             
             logger.info(f"Data split complete: {X_train.shape[0]} training samples, {X_test.shape[0]} test samples")
             
@@ -108,14 +245,8 @@ class DataProcessor:
             data = pd.read_csv(file_path)
             logger.info(f"Loaded {len(data)} samples for prediction")
             
-            # Convert composition
-            data['composition'] = data[substance_column].apply(safe_composition_conversion)
-            
             # Generate features using magpie
-            df_features = self.ep_featurizer.featurize_dataframe(data, col_id='composition')
-            
-            # Prepare features
-            X = df_features.drop([substance_column, 'composition'], axis=1)
+            X = self._featurize(data[substance_column])
             
             return X
         except Exception as e:
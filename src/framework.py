@@ -1,81 +1,212 @@
 """
 SimpleReActFramework implementation for material analysis.
 """
+import time
 import traceback
-from typing import List
-
-from langchain.agents import Tool, AgentType, initialize_agent
-from langchain.memory import ConversationBufferMemory
-from langchain.chat_models import ChatOpenAI
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
 
 from src.tools.material_tools import MaterialTools
+from src.tools.planner import PlanStep, QueryPlanner
+from src.services.metrics import QUERIES, QUERY_DURATION, log_event
 from src.utils.logger import setup_logger
-from config.settings import DEFAULT_BASE_URL, DEFAULT_MODEL_NAME, DEFAULT_TEMPERATURE, AGENT_TYPE, MEMORY_KEY
+from config.settings import DEFAULT_BASE_URL, DEFAULT_MODEL_NAME, DEFAULT_TEMPERATURE, AGENT_TYPE, MEMORY_KEY, LLM_CACHE_CONFIG, PLANNER_CONFIG
+
+if TYPE_CHECKING:
+    from langchain.agents import Tool
+    from langchain_core.language_models.chat_models import BaseChatModel
 
 logger = setup_logger("material_analysis.framework")
 
+# Tools in the order they are offered to the agent
+TOOL_NAMES = ('read_data', 'model_predict', 'ensemble_predict', 'rule_match', 'screen', 'select_top', 'filter_materials',
+              'find_similar', 'save_result')
+
 class SimpleReActFramework:
     """Material analysis reaction framework for reading, predicting, matching, and saving material data."""
     
-    def __init__(self, openai_api_key: str, base_url: str = DEFAULT_BASE_URL, 
-                 model_name: str = DEFAULT_MODEL_NAME, temperature: float = DEFAULT_TEMPERATURE):
+    def __init__(self, openai_api_key: Optional[str] = None, base_url: str = DEFAULT_BASE_URL, 
+                 model_name: str = DEFAULT_MODEL_NAME, temperature: float = DEFAULT_TEMPERATURE,
+                 llm: Optional['BaseChatModel'] = None, llm_cache_mode: str = LLM_CACHE_CONFIG['MODE'],
+                 use_planner: bool = PLANNER_CONFIG['ENABLED']):
         """
         Initialize the reaction framework
         
         Args:
-            openai_api_key: OpenAI API key
+            openai_api_key: OpenAI API key (not needed when llm is given or in replay mode)
             base_url: API base URL
             model_name: Model name to use
             temperature: Model temperature parameter
+            llm: Optional chat model used instead of the OpenAI one (e.g. a local stand-in)
+            llm_cache_mode: Response cache mode: 'off', 'record' or 'replay'
+            use_planner: Run canonical screening requests directly instead of through the agent
         """
         logger.info("Initializing SimpleReActFramework...")
         
-        # Initialize LLM
-        self.llm = ChatOpenAI(
-            openai_api_key=openai_api_key,
-            base_url=base_url,
-            temperature=temperature,
-            model_name=model_name
-        )
+        # The LLM, memory and agent need langchain, which takes seconds to import; they are
+        # built on first use, so start-up and planner-only queries never pay for it
+        self._llm_settings = {
+            'openai_api_key': openai_api_key,
+            'base_url': base_url,
+            'model_name': model_name,
+            'temperature': temperature,
+            'llm_cache_mode': llm_cache_mode
+        }
+        self._llm = llm
+        self._llm_ready = False
+        self._memory = None
+        self._history = []
+        self._tools = None
+        self._agent = None
+        self._llm_metrics = None
         
-        # Initialize memory and tools
-        self.memory = ConversationBufferMemory(memory_key=MEMORY_KEY)
+        # Initialize tools
         self.material_tools = MaterialTools()
-        self.tools = self._setup_tools()
-        
-        # Initialize agent
-        self.agent = self._setup_agent()
+        self._step_callback = None
+        self.tool_functions = {name: self._instrument(name, getattr(self.material_tools, name)) for name in TOOL_NAMES}
+        self.planner = QueryPlanner() if use_planner else None
         
         logger.info("SimpleReActFramework initialization completed")
     
-    def _setup_tools(self) -> List[Tool]:
+    @property
+    def llm(self) -> Optional['BaseChatModel']:
+        """Chat model of the agent, created on first use"""
+        if not self._llm_ready:
+            from src.services.llm_cache import wrap_chat_model
+            
+            settings = self._llm_settings
+            llm = self._llm
+            if llm is None and settings['openai_api_key']:
+                from langchain.chat_models import ChatOpenAI
+                llm = ChatOpenAI(
+                    openai_api_key=settings['openai_api_key'],
+                    base_url=settings['base_url'],
+                    temperature=settings['temperature'],
+                    model_name=settings['model_name']
+                )
+            self._llm = wrap_chat_model(llm, mode=settings['llm_cache_mode'], model_name=settings['model_name'],
+                                        temperature=settings['temperature'], base_url=settings['base_url'])
+            self._llm_ready = True
+        return self._llm
+    
+    @property
+    def memory(self) -> Any:
+        """Conversation memory of the agent, created on first use with the exchanges answered before"""
+        if self._memory is None:
+            from langchain.memory import ConversationBufferMemory
+            
+            self._memory = ConversationBufferMemory(memory_key=MEMORY_KEY)
+            for inputs, outputs in self._history:
+                self._memory.save_context(inputs, outputs)
+            self._history = []
+        return self._memory
+    
+    @property
+    def tools(self) -> List['Tool']:
+        """Tools offered to the agent"""
+        if self._tools is None:
+            self._tools = self._setup_tools()
+        return self._tools
+    
+    @property
+    def agent(self) -> Any:
+        """ReAct agent, created on first use"""
+        if self._agent is None:
+            self._agent = self._setup_agent()
+        return self._agent
+    
+    @property
+    def llm_metrics(self) -> Any:
+        """Callback handler recording LLM calls of the agent"""
+        if self._llm_metrics is None:
+            from src.services.llm_metrics import LLMMetricsHandler
+            
+            self._llm_metrics = LLMMetricsHandler()
+        return self._llm_metrics
+    
+    def _remember(self, query: str, response: str) -> None:
+        """Add an exchange to the conversation history without creating the memory early"""
+        if self._memory is not None:
+            self._memory.save_context({'input': query}, {'output': response})
+        else:
+            self._history.append(({'input': query}, {'output': response}))
+    
+    def _emit_step(self, event: Dict[str, Any]) -> None:
+        """Forward a tool step event to the callback of the current run, if any"""
+        if self._step_callback is not None:
+            self._step_callback(event)
+
+    def _instrument(self, name: str, func: Callable[[str], str]) -> Callable[[str], str]:
+        """Wrap a tool function so each call reports its start, end and duration"""
+        def run_tool(tool_input: str) -> str:
+            self._emit_step({'event': 'tool_start', 'tool': name, 'input': tool_input})
+            start = time.perf_counter()
+            output = func(tool_input)
+            self._emit_step({
+                'event': 'tool_end',
+                'tool': name,
+                'seconds': round(time.perf_counter() - start, 4),
+                'output': output
+            })
+            return output
+        return run_tool
+
+    def _setup_tools(self) -> List['Tool']:
         """Set up the tool list"""
+        from langchain.agents import Tool
+        
         tools = [
             Tool(
                 name="read_data",
-                func=self.material_tools.read_data,
-                description="Read material expressions. Parameter: file_path (str): Data file path."
+                func=self.tool_functions["read_data"],
+                description="Read material expressions from a CSV, Parquet (.parquet) or Arrow (.feather/.arrow) file. Parameter: file_path (str): Data file path."
             ),
             Tool(
                 name="model_predict",
-                func=self.material_tools.model_predict,
+                func=self.tool_functions["model_predict"],
                 description="Predict material properties. Parameter: model_path (str): Model file path"
             ),
+            Tool(
+                name="ensemble_predict",
+                func=self.tool_functions["ensemble_predict"],
+                description="Predict material properties with several models at once (e.g. models trained on different datasets), adding one probability column per model plus pred_mean, pred_vote (share of models predicting positive) and pred_max. Parameter: comma-separated model file paths, or 'model_paths=<paths>; aggregate=<mean, vote or max, the score used to rank and filter>'."
+            ),
             Tool(
                 name="rule_match",
-                func=self.material_tools.rule_match,
-                description="Match materials containing specific elements. Parameter: rule_elements (string): A comma-separated list of element symbols to match (e.g. 'Fe,Co,Ni' or 'Sc,Y,La,Ce')."
+                func=self.tool_functions["rule_match"],
+                description="Match materials by the elements they contain. Parameter: rule_elements (string): An element rule. A comma-separated list matches materials containing any of the elements (e.g. 'Fe,Co,Ni' or 'Sc,Y,La,Ce'). Rules can be combined with & (and), | (or), ! (not) and parentheses, and all(...), none(...) and only(...) match all of, none of or exactly the listed elements (e.g. 'Ce & !Pb' or 'all(Ce,O) & none(Pb,Cd,Hg)')."
+            ),
+            Tool(
+                name="screen",
+                func=self.tool_functions["screen"],
+                description="Screen a large data file in one streaming pass (read, predict, match and save chunk by chunk with bounded memory). Parameter: a string 'file_path=<data file>; model_path=<model file>; save_path=<output CSV>; rule=<optional element rule as for rule_match>; constraints=<optional constraints as for filter_materials, joined by & instead of ;>; top_k=<optional number of best candidates to keep>; threshold=<optional minimum probability>'."
+            ),
+            Tool(
+                name="select_top",
+                func=self.tool_functions["select_top"],
+                description="Keep only the highest-scoring predicted materials (from the rule-matched materials if rule_match was run), e.g. for 'top 50 Ce-containing candidates'. Parameter: a string 'k=<number>' with optional '; threshold=<minimum probability>'."
+            ),
+            Tool(
+                name="filter_materials",
+                func=self.tool_functions["filter_materials"],
+                description="Keep only materials meeting stoichiometry and score constraints (narrows the rule-matched materials if rule_match was run). Parameter: constraints joined by ';', each one of: 'elements <= 3' (number of elements), '0.2 <= Ce <= 0.5' or 'Ce >= 0.1' (atomic fraction of an element), 'oxide' (oxides only), 'nontoxic' (no toxic elements such as Pb, Cd, Hg, As), 'pred >= 0.8' (predicted probability, after model_predict). Example: 'elements <= 3; 0.2 <= Ce <= 0.5; oxide; nontoxic; pred >= 0.8'."
+            ),
+            Tool(
+                name="find_similar",
+                func=self.tool_functions["find_similar"],
+                description="Find the loaded materials most similar to known materials (e.g. 'which candidates are most like CeO2?'), by distance between their magpie composition features. The found materials become the result that save_result writes, with similar_to and distance columns. Parameter: comma-separated formulas, or 'formulas=<formulas>; k=<neighbors per formula, default 10>'."
             ),
             Tool(
                 name="save_result",
-                func=self.material_tools.save_result,
-                description="Save the matched materials to a CSV file. Parameter: save_path (str): The file path to save the result."
+                func=self.tool_functions["save_result"],
+                description="Save the matched materials to a file; the format follows the extension (.csv, .parquet or .feather). Parameter: save_path (str): The file path to save the result. To write only some columns pass 'save_path=<path>; columns=<comma-separated columns>'."
             )
         ]
         return tools
 
     def _setup_agent(self):
         """Set up the agent"""
+        from langchain.agents import AgentType, initialize_agent
+        
         agent = initialize_agent(
             tools=self.tools,
             llm=self.llm,
@@ -85,23 +216,64 @@ class SimpleReActFramework:
         )
         return agent
 
-    def run(self, query: str) -> str:
+    def _run_plan(self, query: str, plan: List[PlanStep]) -> str:
+        """
+        Execute a planned sequence of tool calls without the agent
+        
+        Args:
+            query: User query string
+            plan: Steps produced by the planner
+            
+        Returns:
+            Summary of the tool observations
+        """
+        logger.info(f"Running query through fast path: {plan}")
+        observations = []
+        for step in plan:
+            observation = self.tool_functions[step.tool](step.argument)
+            observations.append(f"{step.tool}: {observation}")
+            # Every tool reports success with 'successfully'; anything else is an error message
+            if 'successfully' not in observation.lower():
+                observations.append("Stopped because the previous step failed")
+                break
+        response = "\n".join(observations)
+        # Keep the conversation history consistent for follow-up questions to the agent
+        self._remember(query, response)
+        return response
+
+    def run(self, query: str, step_callback: Optional[Callable[[Dict[str, Any]], None]] = None) -> str:
         """
         Run a query
         
         Args:
             query: User query string
+            step_callback: Optional function receiving an event dict before and after each tool call
             
         Returns:
             Query result
         """
         logger.info(f"Executing query: {query}")
+        self._step_callback = step_callback
+        path, status = 'agent', 'error'
+        start = time.perf_counter()
         try:
-            response = self.agent.run(query)
+            plan = self.planner.plan(query) if self.planner is not None else None
+            if plan:
+                path = 'planner'
+                response = self._run_plan(query, plan)
+            else:
+                response = self.agent.run(query, callbacks=[self.llm_metrics])
+            status = 'success'
             logger.info("Query execution successful")
             return response
         except Exception as e:
             error_msg = f"Agent execution error: {str(e)}"
             logger.error(f"{error_msg}\n{traceback.format_exc()}")
             return error_msg 
+        finally:
+            self._step_callback = None
+            seconds = time.perf_counter() - start
+            QUERIES.inc(path=path, status=status)
+            QUERY_DURATION.observe(seconds, path=path)
+            log_event('query', path=path, status=status, seconds=round(seconds, 6))
         
@@ -0,0 +1,83 @@
+"""
+Scoring one feature matrix with several models in parallel threads, with aggregated probabilities.
+"""
+import os
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+
+from src.models.registry import get_model
+from config.settings import ENSEMBLE_CONFIG
+
+# Aggregated columns and how they combine the per-model probabilities
+AGGREGATIONS = ('mean', 'vote', 'max')
+
+def model_columns(model_paths: Sequence[str]) -> List[str]:
+    """
+    Name the per-model probability columns after the model files.
+
+    Args:
+        model_paths: Model file paths
+
+    Returns:
+        One 'pred_<file stem>' column per model, numbered when stems repeat
+    """
+    columns = []
+    for path in model_paths:
+        base = f"pred_{os.path.splitext(os.path.basename(path))[0]}"
+        column, n = base, 2
+        while column in columns or column in (f"pred_{name}" for name in AGGREGATIONS):
+            column, n = f"{base}_{n}", n + 1
+        columns.append(column)
+    return columns
+
+def predict_models(features: Any, model_paths: Sequence[str], n_jobs: Optional[int] = ENSEMBLE_CONFIG['N_JOBS']) -> np.ndarray:
+    """
+    Score one feature matrix with every model, one thread per model.
+
+    The matrix is shared by all threads, not copied per model; CatBoost and the NumPy
+    evaluator both release the GIL while scoring.
+
+    Args:
+        features: Feature matrix, shape (n_rows, n_features)
+        model_paths: Model file paths
+        n_jobs: Threads to use; None uses one per model, capped at the CPU count
+
+    Returns:
+        Positive class probabilities, shape (n_models, n_rows)
+    """
+    n_jobs = n_jobs or min(len(model_paths), os.cpu_count() or 1)
+    # Loaded up front, so the registry loads each file once even when paths repeat
+    models = [get_model(path) for path in model_paths]
+    pred = np.empty((len(models), len(features)), dtype=np.float64)
+    if len(features) == 0:
+        return pred
+
+    def score(i: int) -> None:
+        pred[i] = models[i].predict_proba(features)[:, 1]
+
+    if n_jobs <= 1 or len(models) == 1:
+        for i in range(len(models)):
+            score(i)
+    else:
+        with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+            # list() re-raises the first exception of a failed model
+            list(executor.map(score, range(len(models))))
+    return pred
+
+def aggregate(pred: np.ndarray, vote_threshold: float = ENSEMBLE_CONFIG['VOTE_THRESHOLD']) -> Dict[str, np.ndarray]:
+    """
+    Combine per-model probabilities.
+
+    Args:
+        pred: Probabilities, shape (n_models, n_rows)
+        vote_threshold: Probability at which a model votes for the positive class
+
+    Returns:
+        'mean' probability, 'vote' share of models voting positive and 'max' probability per row
+    """
+    return {
+        'mean': pred.mean(axis=0),
+        'vote': (pred >= vote_threshold).mean(axis=0),
+        'max': pred.max(axis=0),
+    }
@@ -0,0 +1,289 @@
+"""
+NumPy evaluator for CatBoost oblivious-tree classifiers and the exporter producing its array artifact.
+"""
+import os
+import json
+import tempfile
+import numpy as np
+from typing import Any, Dict, List, Optional
+
+from src.utils.helpers import atomic_output
+from src.utils.logger import setup_logger
+from config.settings import OBLIVIOUS_MODEL_CONFIG
+
+logger = setup_logger("material_analysis.models.oblivious")
+
+ARTIFACT_VERSION = 1
+
+def artifact_path(model_path: str) -> str:
+    """
+    Get the array artifact path belonging to a CatBoost model file.
+
+    Args:
+        model_path: Path of the .cbm file
+
+    Returns:
+        Path of the .npz file next to it
+    """
+    return f"{os.path.splitext(model_path)[0]}.npz"
+
+class ObliviousTreeModel:
+    """
+    Binary classifier made of symmetric (oblivious) trees, evaluated with NumPy only.
+
+    In an oblivious tree every node of a level tests the same feature against the
+    same border, so the leaf of a row is the bit pattern of its depth comparisons:
+    bit d is set when feature > border at level d.
+    """
+
+    def __init__(self, split_features: np.ndarray, split_borders: np.ndarray, leaf_values: np.ndarray,
+                 scale: float = 1.0, bias: float = 0.0, feature_names: Optional[List[str]] = None,
+                 nan_as_true: Optional[np.ndarray] = None, metadata: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the model.
+
+        Args:
+            split_features: Feature index per tree level, shape (n_trees, max_depth)
+            split_borders: float32 border per tree level, shape (n_trees, max_depth); +inf pads
+                shallower trees so the padded levels never set a bit
+            leaf_values: Leaf values, shape (n_trees, 2 ** max_depth)
+            scale: Scale applied to the summed leaf values
+            bias: Bias added after scaling
+            feature_names: Feature names in model input order
+            nan_as_true: Boolean per feature; NaN compares as greater than every border when set
+            metadata: Extra information stored with the artifact
+        """
+        self.split_features = np.ascontiguousarray(split_features, dtype=np.int32)
+        self.split_borders = np.ascontiguousarray(split_borders, dtype=np.float32)
+        self.leaf_values = np.ascontiguousarray(leaf_values, dtype=np.float64)
+        self.scale = float(scale)
+        self.bias = float(bias)
+        self.feature_names = list(feature_names) if feature_names is not None else None
+        self.metadata = metadata or {}
+        n_features = int(self.split_features.max()) + 1 if self.split_features.size else 0
+        if self.feature_names is not None:
+            n_features = max(n_features, len(self.feature_names))
+        self.nan_as_true = (np.zeros(n_features, dtype=bool) if nan_as_true is None
+                            else np.asarray(nan_as_true, dtype=bool))
+        self.classes_ = np.array([0, 1])
+
+        # Level-wise comparisons share borders across trees; binarize each (feature, border) once
+        pairs = np.stack([self.split_features.ravel(), self.split_borders.view(np.int32).ravel()], axis=1)
+        unique_pairs, inverse = np.unique(pairs, axis=0, return_inverse=True)
+        # Split ids level-major, so each level gathers whole contiguous rows of the binarized block
+        self._level_split_ids = np.ascontiguousarray(inverse.reshape(self.split_features.shape).T, dtype=np.intp)
+        self._unique_features = unique_pairs[:, 0].astype(np.intp)
+        self._unique_borders = unique_pairs[:, 1].astype(np.int32).view(np.float32)
+        self._nan_true = self.nan_as_true[self._unique_features] & np.isfinite(self._unique_borders)
+        self._leaf_offsets = (np.arange(self.n_trees, dtype=np.intp) * self.leaf_values.shape[1])[:, None]
+        self._index_dtype = np.uint8 if self.depth <= 8 else np.uint16 if self.depth <= 16 else np.uint32
+
+    @property
+    def n_trees(self) -> int:
+        """Number of trees."""
+        return self.split_features.shape[0]
+
+    @property
+    def depth(self) -> int:
+        """Maximum tree depth."""
+        return self.split_features.shape[1]
+
+    def _as_matrix(self, X: Any) -> np.ndarray:
+        """Convert input features to a float32 matrix in model feature order."""
+        if self.feature_names is not None and hasattr(X, 'columns') and list(X.columns) != self.feature_names:
+            X = X[self.feature_names]
+        return np.asarray(X, dtype=np.float32)
+
+    def _binarize(self, X: np.ndarray) -> np.ndarray:
+        """Evaluate every distinct split on every row, shape (n_unique_splits, n_rows) as 0/1 bytes."""
+        values = X[:, self._unique_features]
+        binary = values > self._unique_borders
+        # Padding levels (+inf border) must stay 0 even for NaN inputs
+        if self._nan_true.any():
+            binary |= np.isnan(values) & self._nan_true
+        return np.ascontiguousarray(binary.T).view(np.uint8).astype(self._index_dtype, copy=False)
+
+    def predict_raw(self, X: Any, block_rows: int = OBLIVIOUS_MODEL_CONFIG['BLOCK_ROWS']) -> np.ndarray:
+        """
+        Compute raw scores (log-odds).
+
+        Args:
+            X: Feature matrix or DataFrame, shape (n_rows, n_features)
+            block_rows: Rows evaluated at once, bounding the (trees x rows) temporaries
+
+        Returns:
+            Raw scores, shape (n_rows,)
+        """
+        X = self._as_matrix(X)
+        scores = np.empty(len(X), dtype=np.float64)
+        flat_leaves = self.leaf_values.ravel()
+        for start in range(0, len(X), block_rows):
+            binary = self._binarize(X[start:start + block_rows])
+            leaf_index = np.zeros((self.n_trees, binary.shape[1]), dtype=self._index_dtype)
+            for level, split_ids in enumerate(self._level_split_ids):
+                leaf_index |= binary[split_ids] << level
+            scores[start:start + block_rows] = flat_leaves[leaf_index + self._leaf_offsets].sum(axis=0)
+        return scores * self.scale + self.bias
+
+    def predict_proba(self, X: Any) -> np.ndarray:
+        """
+        Compute class probabilities like CatBoostClassifier.predict_proba.
+
+        Args:
+            X: Feature matrix or DataFrame
+
+        Returns:
+            Probabilities, shape (n_rows, 2)
+        """
+        positive = 1.0 / (1.0 + np.exp(-self.predict_raw(X)))
+        return np.column_stack([1.0 - positive, positive])
+
+    def predict(self, X: Any) -> np.ndarray:
+        """
+        Predict class labels.
+
+        Args:
+            X: Feature matrix or DataFrame
+
+        Returns:
+            Labels (0 or 1)
+        """
+        return (self.predict_raw(X) > 0).astype(np.int64)
+
+    def save(self, path: str) -> None:
+        """
+        Write the model as an .npz artifact.
+
+        Args:
+            path: Output path
+        """
+        metadata = dict(self.metadata, version=ARTIFACT_VERSION, scale=self.scale, bias=self.bias,
+                        feature_names=self.feature_names)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with atomic_output(path) as f:
+            np.savez(f, split_features=self.split_features, split_borders=self.split_borders,
+                     leaf_values=self.leaf_values, nan_as_true=self.nan_as_true,
+                     metadata=np.array(json.dumps(metadata)))
+
+    @classmethod
+    def load(cls, path: str) -> 'ObliviousTreeModel':
+        """
+        Read an .npz artifact.
+
+        Args:
+            path: Artifact path
+
+        Returns:
+            ObliviousTreeModel instance
+        """
+        with np.load(path, allow_pickle=False) as arrays:
+            metadata = json.loads(str(arrays['metadata']))
+            if metadata.get('version') != ARTIFACT_VERSION:
+                raise ValueError(f"Unsupported oblivious tree artifact version: {metadata.get('version')}")
+            return cls(arrays['split_features'], arrays['split_borders'], arrays['leaf_values'],
+                       scale=metadata.pop('scale'), bias=metadata.pop('bias'),
+                       feature_names=metadata.pop('feature_names'), nan_as_true=arrays['nan_as_true'],
+                       metadata=metadata)
+
+    @classmethod
+    def from_catboost_json(cls, model_json: Dict[str, Any], metadata: Optional[Dict[str, Any]] = None) -> 'ObliviousTreeModel':
+        """
+        Build the model from CatBoost's JSON export.
+
+        Args:
+            model_json: Parsed output of CatBoost save_model(format='json')
+            metadata: Extra information stored with the artifact
+
+        Returns:
+            ObliviousTreeModel instance
+
+        Raises:
+            ValueError: If the model uses features or losses this evaluator does not support
+        """
+        features_info = model_json.get('features_info', {})
+        if features_info.get('categorical_features') or features_info.get('text_features'):
+            raise ValueError("Only models with float features are supported")
+        float_features = features_info.get('float_features', [])
+        n_features = max((feature['flat_feature_index'] for feature in float_features), default=-1) + 1
+        feature_names = [None] * n_features
+        nan_as_true = np.zeros(n_features, dtype=bool)
+        for feature in float_features:
+            feature_names[feature['flat_feature_index']] = feature.get('feature_id') or str(feature['flat_feature_index'])
+            nan_as_true[feature['flat_feature_index']] = feature.get('nan_value_treatment') == 'AsTrue'
+
+        trees = model_json['oblivious_trees']
+        max_depth = max((len(tree['splits']) for tree in trees), default=0)
+        split_features = np.zeros((len(trees), max_depth), dtype=np.int32)
+        split_borders = np.full((len(trees), max_depth), np.inf, dtype=np.float32)
+        leaf_values = np.zeros((len(trees), 2 ** max_depth), dtype=np.float64)
+        for t, tree in enumerate(trees):
+            splits = tree['splits']
+            if any(split['split_type'] != 'FloatFeature' for split in splits):
+                raise ValueError("Only float feature splits are supported")
+            if len(tree['leaf_values']) != 2 ** len(splits):
+                raise ValueError("Only single-dimension (binary) models are supported")
+            for level, split in enumerate(splits):
+                split_features[t, level] = split['float_feature_index']
+                split_borders[t, level] = split['border']
+            leaf_values[t, :len(tree['leaf_values'])] = tree['leaf_values']
+
+        scale, bias = model_json.get('scale_and_bias', [1.0, [0.0]])
+        bias = bias[0] if isinstance(bias, list) else bias
+        return cls(split_features, split_borders, leaf_values, scale=scale, bias=bias,
+                   feature_names=feature_names, nan_as_true=nan_as_true, metadata=metadata)
+
+def export_catboost_model(model_path: str, output_path: Optional[str] = None) -> str:
+    """
+    Convert a CatBoost .cbm file into an .npz oblivious tree artifact (requires catboost).
+
+    Args:
+        model_path: CatBoost model file
+        output_path: Artifact path (defaults to the model path with an .npz extension)
+
+    Returns:
+        Path of the written artifact
+    """
+    from catboost import CatBoostClassifier
+    from src.models.registry import _file_digest
+
+    output_path = output_path or artifact_path(model_path)
+    model = CatBoostClassifier()
+    model.load_model(model_path)
+    fd, json_path = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+    try:
+        model.save_model(json_path, format='json')
+        with open(json_path, 'r', encoding='utf-8') as f:
+            model_json = json.load(f)
+    finally:
+        os.remove(json_path)
+
+    metadata = {'source': os.path.basename(model_path), 'source_sha256': _file_digest(model_path)}
+    ObliviousTreeModel.from_catboost_json(model_json, metadata=metadata).save(output_path)
+    logger.info(f"Exported {len(model_json['oblivious_trees'])} oblivious trees to {output_path}")
+    return output_path
+
+def load_oblivious_artifact(model_path: str) -> Optional[ObliviousTreeModel]:
+    """
+    Load the array artifact of a CatBoost model if it exists and was exported from this exact file.
+
+    Args:
+        model_path: CatBoost model file
+
+    Returns:
+        ObliviousTreeModel, or None when there is no up-to-date artifact
+    """
+    from src.models.registry import _file_digest
+
+    path = artifact_path(model_path)
+    if not os.path.exists(path):
+        return None
+    try:
+        model = ObliviousTreeModel.load(path)
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Ignoring unreadable oblivious tree artifact {path}: {str(e)}")
+        return None
+    if model.metadata.get('source_sha256') != _file_digest(model_path):
+        logger.warning(f"Ignoring stale oblivious tree artifact {path}; re-export it from {model_path}")
+        return None
+    return model
@@ -0,0 +1,201 @@
+"""
+Process-wide registry of loaded prediction models.
+"""
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Optional, Tuple
+
+from src.services.metrics import record_cache_lookup
+from src.utils.logger import setup_logger
+from config.settings import MODEL_REGISTRY_CONFIG, OBLIVIOUS_MODEL_CONFIG
+
+logger = setup_logger("material_analysis.models.registry")
+
+def load_catboost_model(path: str) -> Any:
+    """
+    Load a CatBoost classifier from disk.
+
+    Args:
+        path: Model file path
+
+    Returns:
+        Loaded CatBoostClassifier
+    """
+    from catboost import CatBoostClassifier
+
+    model = CatBoostClassifier()
+    model.load_model(path)
+    return model
+
+def load_model(path: str) -> Any:
+    """
+    Load a prediction model, preferring the NumPy oblivious tree artifact over CatBoost.
+
+    An .npz path is loaded directly. For a .cbm path the .npz exported next to it is
+    used when it was exported from this exact file, so catboost is never imported.
+
+    Args:
+        path: Model file path
+
+    Returns:
+        Object with a predict_proba method
+    """
+    from src.models.oblivious import ObliviousTreeModel, load_oblivious_artifact
+
+    if path.lower().endswith('.npz'):
+        return ObliviousTreeModel.load(path)
+    if OBLIVIOUS_MODEL_CONFIG['PREFER_ARTIFACT']:
+        model = load_oblivious_artifact(path)
+        if model is not None:
+            logger.info(f"Using NumPy oblivious tree evaluator for {path}")
+            return model
+    return load_catboost_model(path)
+
+def _file_digest(path: str) -> str:
+    """Compute the SHA-256 digest of a file."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class _Entry:
+    """A loaded model together with the file state it was loaded from."""
+
+    def __init__(self, model: Any, stat: Tuple[int, int], digest: Optional[str]):
+        self.model = model
+        self.stat = stat
+        self.digest = digest
+
+class ModelRegistry:
+    """Thread-safe LRU cache of models keyed by absolute path, reloaded when the file changes."""
+
+    def __init__(self,
+                 max_models: int = MODEL_REGISTRY_CONFIG['MAX_MODELS'],
+                 verify_hash: bool = MODEL_REGISTRY_CONFIG['VERIFY_HASH'],
+                 loader: Callable[[str], Any] = load_model):
+        """
+        Initialize the registry.
+
+        Args:
+            max_models: Maximum number of models kept loaded; least recently used are evicted
+            verify_hash: When a file's mtime or size changes, compare content hashes before reloading
+            loader: Function that loads a model from a path
+        """
+        self.max_models = max_models
+        self.verify_hash = verify_hash
+        self.loader = loader
+        self._models = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return os.path.normcase(os.path.abspath(path))
+
+    @staticmethod
+    def _stat(path: str) -> Tuple[int, int]:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self, path: str) -> Any:
+        """
+        Get a loaded model, loading or reloading it if needed.
+
+        Args:
+            path: Model file path
+
+        Returns:
+            Loaded model
+
+        Raises:
+            FileNotFoundError: If the model file does not exist
+        """
+        key = self._key(path)
+        stat = self._stat(key)
+
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is not None and entry.stat != stat and self.verify_hash:
+                # File touched but possibly unchanged: keep the model if the content matches
+                if _file_digest(key) == entry.digest:
+                    entry.stat = stat
+            if entry is not None and entry.stat == stat:
+                self._models.move_to_end(key)
+                self.hits += 1
+                record_cache_lookup('model', 1, 0)
+                return entry.model
+
+            self.misses += 1
+            record_cache_lookup('model', 0, 1)
+            action = "Reloading changed" if entry is not None else "Loading"
+            logger.info(f"{action} model: {key}")
+            model = self.loader(key)
+            digest = _file_digest(key) if self.verify_hash else None
+            self._models[key] = _Entry(model, stat, digest)
+            self._models.move_to_end(key)
+
+            while len(self._models) > self.max_models:
+                evicted, _ = self._models.popitem(last=False)
+                logger.info(f"Evicted model from registry: {evicted}")
+            return model
+
+    def preload(self, paths: Iterable[str]) -> None:
+        """
+        Load models ahead of the first request, skipping missing files.
+
+        Args:
+            paths: Model file paths
+        """
+        for path in paths:
+            if os.path.exists(path):
+                self.get(path)
+            else:
+                logger.warning(f"Skipping preload of missing model: {path}")
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        """
+        Drop one model, or every model when no path is given.
+
+        Args:
+            path: Model file path
+        """
+        with self._lock:
+            if path is None:
+                self._models.clear()
+            else:
+                self._models.pop(self._key(path), None)
+
+    def __contains__(self, path: str) -> bool:
+        with self._lock:
+            return self._key(path) in self._models
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._models)
+
+_default_registry = ModelRegistry()
+
+def get_model_registry() -> ModelRegistry:
+    """
+    Get the process-wide model registry.
+
+    Returns:
+        Shared ModelRegistry instance
+    """
+    return _default_registry
+
+def get_model(path: str) -> Any:
+    """
+    Get a model from the process-wide registry.
+
+    Args:
+        path: Model file path
+
+    Returns:
+        Loaded model
+    """
+    return _default_registry.get(path)
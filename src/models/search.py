@@ -0,0 +1,200 @@
+"""
+Cross-validated hyperparameter search for the CatBoost classifier.
+"""
+import os
+import time
+import json
+import itertools
+import numpy as np
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Tuple
+from sklearn.model_selection import StratifiedKFold
+
+from src.utils.logger import setup_logger
+from src.utils.helpers import ensure_directory_exists
+from config.settings import SEARCH_CONFIG, TRAINING_CONFIG
+
+logger = setup_logger("material_analysis.models.search")
+
+# Training data of a worker process, set once by _init_worker instead of pickled with every task
+_worker_data = {}
+
+def candidate_configs(grid: Dict[str, List[Any]], max_candidates: Optional[int] = None,
+                      seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    List parameter combinations of a grid in random order.
+
+    Args:
+        grid: Candidate values per CatBoost parameter
+        max_candidates: Keep only this many combinations (all when None)
+        seed: Seed of the shuffle
+
+    Returns:
+        Parameter dictionaries
+    """
+    names = sorted(grid)
+    configs = [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+    order = np.random.default_rng(seed).permutation(len(configs))
+    configs = [configs[i] for i in order]
+    return configs[:max_candidates] if max_candidates else configs
+
+def _init_worker(X: np.ndarray, y: np.ndarray) -> None:
+    """Store the training data in a worker process."""
+    _worker_data['X'] = X
+    _worker_data['y'] = y
+
+def _fit_fold(params: Dict[str, Any], train_index: np.ndarray, valid_index: np.ndarray,
+              max_iterations: int, early_stopping_rounds: int, random_state: int) -> Tuple[float, int]:
+    """
+    Fit one candidate on one fold, stopping when the held-out fold stops improving.
+
+    Returns:
+        Tuple of (best validation log loss, number of trees at that point)
+    """
+    from catboost import CatBoostClassifier
+
+    X, y = _worker_data['X'], _worker_data['y']
+    model = CatBoostClassifier(iterations=max_iterations, loss_function='Logloss', eval_metric='Logloss',
+                               random_state=random_state, thread_count=1, verbose=0,
+                               allow_writing_files=False, **params)
+    model.fit(X[train_index], y[train_index], eval_set=(X[valid_index], y[valid_index]),
+              early_stopping_rounds=early_stopping_rounds, use_best_model=True)
+    return float(model.get_best_score()['validation']['Logloss']), int(model.get_best_iteration()) + 1
+
+class HyperparameterSearch:
+    """Stratified k-fold search over a parameter grid, one fold fit per pool task."""
+
+    def __init__(self,
+                 grid: Dict[str, List[Any]] = SEARCH_CONFIG['GRID'],
+                 n_folds: int = SEARCH_CONFIG['N_FOLDS'],
+                 max_iterations: int = SEARCH_CONFIG['MAX_ITERATIONS'],
+                 early_stopping_rounds: int = SEARCH_CONFIG['EARLY_STOPPING_ROUNDS'],
+                 time_budget: Optional[float] = SEARCH_CONFIG['TIME_BUDGET_SECONDS'],
+                 max_candidates: Optional[int] = SEARCH_CONFIG['MAX_CANDIDATES'],
+                 n_jobs: Optional[int] = SEARCH_CONFIG['N_JOBS'],
+                 random_state: int = TRAINING_CONFIG['RANDOM_STATE']):
+        """
+        Initialize the search.
+
+        Args:
+            grid: Candidate values per CatBoost parameter
+            n_folds: Number of stratified folds
+            max_iterations: Iteration cap of a fold fit; early stopping usually ends it sooner
+            early_stopping_rounds: Rounds without improvement on the held-out fold before stopping
+            time_budget: Seconds after which no new fold fits are started (None for no limit);
+                fits already running are allowed to finish
+            max_candidates: Number of grid combinations to try, sampled at random (None for all)
+            n_jobs: Worker processes; None uses all CPUs
+            random_state: Seed of the folds, the candidate order and CatBoost
+        """
+        self.grid = grid
+        self.n_folds = n_folds
+        self.max_iterations = max_iterations
+        self.early_stopping_rounds = early_stopping_rounds
+        self.time_budget = time_budget
+        self.max_candidates = max_candidates
+        self.n_jobs = n_jobs or os.cpu_count() or 1
+        self.random_state = random_state
+
+    def run(self, X: Any, y: Any) -> Dict[str, Any]:
+        """
+        Score every candidate by its mean validation log loss across folds.
+
+        Args:
+            X: Training features
+            y: Training labels
+
+        Returns:
+            Search result with the best parameters, the tree count to train with, and
+            the scores of all fully evaluated candidates (best first)
+
+        Raises:
+            RuntimeError: If the time budget ran out before any candidate finished all folds
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        y = np.asarray(y)
+        candidates = candidate_configs(self.grid, self.max_candidates, self.random_state)
+        folds = list(StratifiedKFold(n_splits=self.n_folds, shuffle=True,
+                                     random_state=self.random_state).split(X, y))
+        tasks = [(c, f) for c in range(len(candidates)) for f in range(len(folds))]
+        logger.info(f"Searching {len(candidates)} candidates x {len(folds)} folds over {self.n_jobs} processes")
+
+        start = time.perf_counter()
+        deadline = start + self.time_budget if self.time_budget else None
+        fold_results: Dict[int, Dict[int, Tuple[float, int]]] = {c: {} for c in range(len(candidates))}
+        pending = {}
+        next_task = 0
+        with ProcessPoolExecutor(max_workers=self.n_jobs, initializer=_init_worker, initargs=(X, y)) as executor:
+            while next_task < len(tasks) or pending:
+                # Keep one task per worker in flight, so the budget check applies to every new fit
+                while (next_task < len(tasks) and len(pending) < self.n_jobs
+                       and (deadline is None or time.perf_counter() < deadline)):
+                    c, f = tasks[next_task]
+                    train_index, valid_index = folds[f]
+                    future = executor.submit(_fit_fold, candidates[c], train_index, valid_index,
+                                             self.max_iterations, self.early_stopping_rounds, self.random_state)
+                    pending[future] = (c, f)
+                    next_task += 1
+                if not pending:
+                    logger.warning(f"Time budget of {self.time_budget}s reached after {next_task} of {len(tasks)} fold fits")
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    c, f = pending.pop(future)
+                    fold_results[c][f] = future.result()
+                    if len(fold_results[c]) == len(folds):
+                        losses = [loss for loss, _ in fold_results[c].values()]
+                        logger.info(f"Candidate {candidates[c]}: mean log loss {np.mean(losses):.4f}")
+
+        scored = []
+        for c, results in fold_results.items():
+            if len(results) < len(folds):
+                continue
+            losses = [results[f][0] for f in range(len(folds))]
+            trees = [results[f][1] for f in range(len(folds))]
+            scored.append({
+                'params': candidates[c],
+                'mean_logloss': float(np.mean(losses)),
+                'std_logloss': float(np.std(losses)),
+                'fold_logloss': losses,
+                'fold_best_iterations': trees,
+            })
+        if not scored:
+            raise RuntimeError("No candidate finished all folds within the time budget")
+        scored.sort(key=lambda result: result['mean_logloss'])
+        best = scored[0]
+        # The final model sees all folds, i.e. n/(n-1) times the data of a fold fit
+        iterations = int(np.ceil(np.mean(best['fold_best_iterations']) * len(folds) / (len(folds) - 1)))
+        return {
+            'best_params': dict(best['params'], iterations=min(iterations, self.max_iterations)),
+            'best_mean_logloss': best['mean_logloss'],
+            'candidates': scored,
+            'candidates_evaluated': len(scored),
+            'candidates_total': len(candidates),
+            'n_folds': len(folds),
+            'elapsed_seconds': round(time.perf_counter() - start, 3),
+        }
+
+def search_result_path(model_path: str) -> str:
+    """
+    Get the path of the search result belonging to a model file.
+
+    Args:
+        model_path: Path of the .cbm file
+
+    Returns:
+        Path of the .search.json file next to it
+    """
+    return f"{os.path.splitext(model_path)[0]}.search.json"
+
+def write_search_result(result: Dict[str, Any], path: str) -> None:
+    """
+    Write a search result as JSON.
+
+    Args:
+        result: Output of HyperparameterSearch.run
+        path: Output file path
+    """
+    ensure_directory_exists(path)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
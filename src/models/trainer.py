@@ -1,16 +1,50 @@
 """
 Model trainer for material property prediction.
 """
+import os
+import json
 import numpy as np
+import pandas as pd
 from typing import Tuple, Dict, Any, List, Optional
 from catboost import CatBoostClassifier
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
 
+from src.utils.helpers import atomic_output, temporary_path
 from src.utils.logger import setup_logger
 from config.settings import TRAINING_CONFIG
 
 logger = setup_logger("material_analysis.models.trainer")
 
+# Parameters that must match for a saved model to be continued instead of retrained
+WARM_START_PARAMS = ('learning_rate', 'depth', 'l2_leaf_reg', 'loss_function')
+
+def manifest_path(model_path: str) -> str:
+    """
+    Get the training manifest path belonging to a model file.
+    
+    Args:
+        model_path: Path of the .cbm file
+        
+    Returns:
+        Path of the .train.json file next to it
+    """
+    return f"{os.path.splitext(model_path)[0]}.train.json"
+
+def row_hashes(X: Any, y: Any) -> np.ndarray:
+    """
+    Hash every (features, label) training row.
+    
+    Args:
+        X: Training features
+        y: Training labels
+        
+    Returns:
+        uint64 hash per row
+    """
+    frame = pd.DataFrame(np.asarray(X, dtype=np.float64))
+    frame['label'] = np.asarray(y)
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
 class ModelTrainer:
     """Class for training and evaluating material property prediction models."""
     
@@ -18,6 +52,7 @@ class ModelTrainer:
                  iterations: int = TRAINING_CONFIG['MODEL_PARAMS']['iterations'],
                  learning_rate: float = TRAINING_CONFIG['MODEL_PARAMS']['learning_rate'],
                  depth: int = TRAINING_CONFIG['MODEL_PARAMS']['depth'],
+                 l2_leaf_reg: float = TRAINING_CONFIG['MODEL_PARAMS']['l2_leaf_reg'],
                  loss_function: str = TRAINING_CONFIG['MODEL_PARAMS']['loss_function'],
                  random_state: int = TRAINING_CONFIG['RANDOM_STATE']):
         """
@@ -27,6 +62,7 @@ class ModelTrainer:
             iterations: Number of boosting iterations
             learning_rate: Learning rate
             depth: Depth of the trees
+            l2_leaf_reg: L2 regularization of the leaf values
             loss_function: Loss function to optimize
             random_state: Random state for reproducibility
         """
@@ -34,23 +70,113 @@ class ModelTrainer:
             iterations=iterations,
             learning_rate=learning_rate,
             depth=depth,
+            l2_leaf_reg=l2_leaf_reg,
             loss_function=loss_function,
             random_state=random_state,
             verbose=TRAINING_CONFIG['VERBOSE']
         )
+        self._row_hashes = None
+        self._feature_names = None
         logger.info("ModelTrainer initialized with CatBoostClassifier")
         
-    def train(self, X_train: np.ndarray, y_train: np.ndarray) -> None:
+    def train(self, X_train: np.ndarray, y_train: np.ndarray, init_model: Optional[CatBoostClassifier] = None) -> None:
         """
         Train the model on the given data.
         
         Args:
             X_train: Training features
             y_train: Training labels
+            init_model: Trained model to continue boosting from; its trees are kept and
+                the configured number of iterations is added on top
         """
         logger.info(f"Training model on {X_train.shape[0]} samples with {X_train.shape[1]} features")
-        self.model.fit(X_train, y_train)
+        if init_model is not None:
+            logger.info(f"Continuing from a model with {init_model.tree_count_} trees")
+        self.model.fit(X_train, y_train, init_model=init_model)
+        self._row_hashes = row_hashes(X_train, y_train)
+        self._feature_names = list(X_train.columns) if hasattr(X_train, 'columns') else None
         logger.info("Model training completed")
+    
+    def _plan_incremental(self, model_path: str, hashes: np.ndarray, feature_names: Optional[List[str]],
+                          added_trees: int, max_changed_fraction: float,
+                          max_trees: int) -> Tuple[str, Optional[CatBoostClassifier], str]:
+        """
+        Decide whether the saved model can be continued on the new training rows.
+        
+        Returns:
+            Tuple of (mode, model to continue from or None, reason) where mode is
+            'warm', 'full' or 'unchanged'
+        """
+        manifest_file = manifest_path(model_path)
+        if not os.path.exists(model_path) or not os.path.exists(manifest_file):
+            return 'full', None, "no previous model with a training manifest"
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        params = self.model.get_params()
+        changed_params = [name for name in WARM_START_PARAMS if manifest['params'].get(name) != params.get(name)]
+        if changed_params:
+            return 'full', None, f"model parameters changed ({', '.join(changed_params)})"
+        if manifest.get('feature_names') != feature_names:
+            return 'full', None, "feature columns changed"
+        
+        previous_hashes = np.asarray(manifest['row_hashes'], dtype=np.uint64)
+        added = int((~np.isin(hashes, previous_hashes)).sum())
+        removed = int((~np.isin(previous_hashes, hashes)).sum())
+        changed_fraction = (added + removed) / max(len(hashes), 1)
+        if added == 0 and removed == 0:
+            return 'unchanged', None, "training rows are unchanged"
+        if changed_fraction > max_changed_fraction:
+            return 'full', None, f"{changed_fraction:.1%} of the training rows changed"
+        if manifest['tree_count'] + added_trees > max_trees:
+            return 'full', None, f"the model would exceed {max_trees} trees"
+        
+        previous = CatBoostClassifier()
+        previous.load_model(model_path)
+        return 'warm', previous, f"{added} rows added and {removed} removed"
+    
+    def train_incremental(self,
+                          X_train: np.ndarray,
+                          y_train: np.ndarray,
+                          model_path: str,
+                          warm_start_iterations: int = TRAINING_CONFIG['WARM_START']['ITERATIONS'],
+                          max_changed_fraction: float = TRAINING_CONFIG['WARM_START']['MAX_CHANGED_FRACTION'],
+                          max_trees: int = TRAINING_CONFIG['WARM_START']['MAX_TREES']) -> str:
+        """
+        Continue the model saved at model_path when only a few training rows changed, else retrain.
+        
+        A row counts as changed when its features or label differ, so a relabelled
+        formula is one row removed and one added.
+        
+        Args:
+            X_train: Training features
+            y_train: Training labels
+            model_path: Model saved by a previous run (with its training manifest)
+            warm_start_iterations: Trees added when continuing
+            max_changed_fraction: Largest share of added plus removed rows that is continued
+            max_trees: Tree count above which a full retrain compacts the model again
+            
+        Returns:
+            'warm' if the previous model was continued, 'full' if it was retrained, 'unchanged'
+            if the training rows are the same as last time (the previous model is loaded as is)
+        """
+        hashes = row_hashes(X_train, y_train)
+        feature_names = list(X_train.columns) if hasattr(X_train, 'columns') else None
+        mode, previous, reason = self._plan_incremental(model_path, hashes, feature_names, warm_start_iterations,
+                                                        max_changed_fraction, max_trees)
+        if mode == 'unchanged':
+            logger.info(f"Keeping the model at {model_path}: {reason}")
+            self.model.load_model(model_path)
+            self._row_hashes, self._feature_names = hashes, feature_names
+            return mode
+        if mode == 'full':
+            logger.info(f"Retraining from scratch: {reason}")
+            self.train(X_train, y_train)
+            return mode
+        
+        logger.info(f"Warm-starting with {warm_start_iterations} iterations: {reason}")
+        self.model.set_params(iterations=warm_start_iterations)
+        self.train(X_train, y_train, init_model=previous)
+        return mode
         
     def evaluate(self, X_test: np.ndarray, y_test: np.ndarray, log_metrics: bool = True) -> Optional[Tuple[float, float, float, float]]:
         """
@@ -92,7 +218,28 @@ class ModelTrainer:
             path: Path to save the model
         """
         logger.info(f"Saving model to {path}")
-        self.model.save_model(path)
+        # The registry reloads models whose file changed, so a running service must never see
+        # a partly written file; the model is in place before the manifest that describes it
+        tmp_path = temporary_path(path)
+        try:
+            self.model.save_model(tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        if self._row_hashes is not None:
+            # Lets the next train_incremental call tell which rows are new
+            params = self.model.get_params()
+            manifest = {
+                'params': {name: params.get(name) for name in WARM_START_PARAMS},
+                'feature_names': self._feature_names,
+                'tree_count': self.model.tree_count_,
+                'row_hashes': self._row_hashes.tolist(),
+            }
+            # A partial manifest would make the next incremental run misjudge which rows are new
+            with atomic_output(manifest_path(path), 'w', encoding='utf-8') as f:
+                json.dump(manifest, f)
         logger.info("Model saved successfully")
     
     def predict(self, X: np.ndarray) -> np.ndarray:
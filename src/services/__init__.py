@@ -0,0 +1,3 @@
+"""
+Long-lived services shared by the web and command line entry points.
+""" 
\ No newline at end of file
@@ -0,0 +1,241 @@
+"""
+Local daemon that keeps frameworks, datasets and models warm between command line queries.
+"""
+import os
+import json
+import signal
+import socket
+import threading
+import socketserver
+from typing import Any, Dict, Optional
+
+from src.utils.logger import setup_logger
+from config.settings import API_KEY, DAEMON_CONFIG, MODEL_REGISTRY_CONFIG
+
+logger = setup_logger("material_analysis.services.daemon")
+
+class DaemonError(Exception):
+    """The daemon was reached but could not answer the request."""
+
+def daemon_available() -> bool:
+    """
+    Check whether this platform supports the Unix socket daemon.
+
+    Returns:
+        True if Unix domain sockets are available
+    """
+    return hasattr(socket, 'AF_UNIX')
+
+def _send(sock: socket.socket, message: Dict[str, Any]) -> None:
+    sock.sendall(json.dumps(message).encode('utf-8') + b'\n')
+
+def _receive(stream: Any) -> Optional[Dict[str, Any]]:
+    """Read one newline-terminated JSON message, or None at end of stream."""
+    line = stream.readline(DAEMON_CONFIG['MAX_MESSAGE_BYTES'] + 1)
+    if not line:
+        return None
+    if len(line) > DAEMON_CONFIG['MAX_MESSAGE_BYTES']:
+        raise ValueError("Message too large")
+    return json.loads(line)
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Answers the requests of one client connection, one JSON line each."""
+
+    def handle(self) -> None:
+        while True:
+            try:
+                request = _receive(self.rfile)
+            except ValueError as e:
+                _send(self.connection, {'status': 'error', 'error': f"Invalid request: {str(e)}"})
+                return
+            if request is None:
+                return
+            _send(self.connection, self.server.daemon.handle(request))
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+class QueryDaemon:
+    """Serves queries over a Unix socket with frameworks kept warm in a FrameworkPool."""
+
+    def __init__(self, socket_path: str = DAEMON_CONFIG['SOCKET_PATH']):
+        """
+        Initialize the daemon.
+
+        Args:
+            socket_path: Path of the Unix socket to listen on
+        """
+        from src.framework import SimpleReActFramework
+        from src.services.framework_pool import FrameworkPool
+
+        self.socket_path = socket_path
+        self.framework_factory = lambda api_key: SimpleReActFramework(openai_api_key=api_key)
+        # Named sessions keep their conversation and loaded data between queries
+        self.framework_pool = FrameworkPool(self.framework_factory)
+        self.server = None
+        self.queries = 0
+        self._queries_lock = threading.Lock()
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Answer one request.
+
+        Args:
+            request: {'command': 'ping'}, {'command': 'shutdown'} or
+                {'command': 'query', 'query': ..., 'session': ..., 'api_key': ..., 'cwd': ...};
+                relative paths in the query are resolved against the client's 'cwd'
+
+        Returns:
+            Response with 'status' 'ok' or 'error'
+        """
+        command = request.get('command', 'query')
+        if command == 'ping':
+            return {'status': 'ok', 'pid': os.getpid(), 'queries': self.queries}
+        if command == 'shutdown':
+            logger.info("Shutdown requested by client")
+            # shutdown() waits for serve_forever, which runs on another thread
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return {'status': 'ok'}
+        if command != 'query' or not isinstance(request.get('query'), str):
+            return {'status': 'error', 'error': f"Unknown request: {command}"}
+
+        cwd = request.get('cwd')
+        if cwd is not None and not (isinstance(cwd, str) and os.path.isabs(cwd) and os.path.isdir(cwd)):
+            return {'status': 'error', 'error': f"Client directory is not an absolute directory path: {cwd}"}
+
+        with self._queries_lock:
+            self.queries += 1
+        api_key = request.get('api_key') or API_KEY
+        session = request.get('session')
+        try:
+            if session:
+                with self.framework_pool.session(api_key, session) as framework:
+                    # A session may be continued from another directory
+                    framework.material_tools.base_dir = cwd
+                    result = framework.run(request['query'])
+            else:
+                # Without a session every query starts a fresh conversation, like an in-process run;
+                # datasets and models are still shared through their process-wide stores
+                framework = self.framework_factory(api_key)
+                framework.material_tools.base_dir = cwd
+                result = framework.run(request['query'])
+            return {'status': 'ok', 'result': result}
+        except Exception as e:
+            logger.error(f"Daemon query failed: {str(e)}")
+            return {'status': 'error', 'error': str(e)}
+
+    def serve_forever(self) -> None:
+        """
+        Listen on the socket until a shutdown request, SIGTERM or Ctrl+C.
+
+        Raises:
+            DaemonError: If another daemon is already listening on the socket
+        """
+        if ping(self.socket_path) is not None:
+            raise DaemonError(f"A daemon is already listening on {self.socket_path}")
+        if os.path.exists(self.socket_path):
+            # Left behind by a daemon that did not exit cleanly
+            os.remove(self.socket_path)
+        os.makedirs(os.path.dirname(os.path.abspath(self.socket_path)), exist_ok=True)
+
+        if MODEL_REGISTRY_CONFIG['PRELOAD']:
+            from src.models.registry import get_model_registry
+            get_model_registry().preload(MODEL_REGISTRY_CONFIG['PRELOAD_PATHS'])
+
+        # Only the owner may connect: requests can carry an API key
+        previous_umask = os.umask(0o177)
+        try:
+            self.server = _UnixServer(self.socket_path, _RequestHandler)
+        finally:
+            os.umask(previous_umask)
+        self.server.daemon = self
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=self.server.shutdown,
+                                                                                 daemon=True).start())
+        logger.info(f"Daemon listening on {self.socket_path} (pid {os.getpid()})")
+        try:
+            self.server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.server.server_close()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+            logger.info(f"Daemon stopped after {self.queries} queries")
+
+def request(message: Dict[str, Any], socket_path: str = DAEMON_CONFIG['SOCKET_PATH']) -> Optional[Dict[str, Any]]:
+    """
+    Send one request to the daemon.
+
+    Args:
+        message: Request dictionary
+        socket_path: Path of the daemon's Unix socket
+
+    Returns:
+        The daemon's response, or None when no daemon is listening
+
+    Raises:
+        DaemonError: If the connection broke before a response arrived
+    """
+    if not daemon_available() or not os.path.exists(socket_path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(DAEMON_CONFIG['CONNECT_TIMEOUT_SECONDS'])
+        try:
+            sock.connect(socket_path)
+        except (ConnectionRefusedError, FileNotFoundError, socket.timeout):
+            return None
+        # Queries may run for minutes once accepted
+        sock.settimeout(None)
+        _send(sock, message)
+        with sock.makefile('rb') as stream:
+            response = _receive(stream)
+        if response is None:
+            raise DaemonError("Daemon closed the connection without a response")
+        return response
+    finally:
+        sock.close()
+
+def ping(socket_path: str = DAEMON_CONFIG['SOCKET_PATH']) -> Optional[Dict[str, Any]]:
+    """
+    Check whether a daemon is listening.
+
+    Args:
+        socket_path: Path of the daemon's Unix socket
+
+    Returns:
+        Daemon status (pid and query count), or None when no daemon is listening
+    """
+    try:
+        return request({'command': 'ping'}, socket_path)
+    except DaemonError:
+        return None
+
+def send_query(query: str, session: Optional[str] = None, api_key: Optional[str] = None,
+               socket_path: str = DAEMON_CONFIG['SOCKET_PATH']) -> Optional[str]:
+    """
+    Run a query in the daemon.
+
+    The daemon resolves relative paths in the query against this process's working
+    directory, as an in-process run would.
+
+    Args:
+        query: User query
+        session: Named session whose conversation and loaded data are kept between queries
+        api_key: API key for the agent (the daemon's own key when None)
+        socket_path: Path of the daemon's Unix socket
+
+    Returns:
+        Query result, or None when no daemon is listening
+
+    Raises:
+        DaemonError: If the daemon could not answer the query
+    """
+    response = request({'command': 'query', 'query': query, 'session': session, 'api_key': api_key,
+                        'cwd': os.getcwd()}, socket_path)
+    if response is None:
+        return None
+    if response.get('status') != 'ok':
+        raise DaemonError(response.get('error', 'Unknown daemon error'))
+    return response['result']
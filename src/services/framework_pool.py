@@ -0,0 +1,111 @@
+"""
+Pool of warm framework instances keyed by session.
+"""
+import time
+import hashlib
+import threading
+from contextlib import contextmanager
+from collections import OrderedDict
+from typing import Any, Callable, Iterator, Optional
+
+from src.utils.logger import setup_logger
+from config.settings import FRAMEWORK_POOL_CONFIG
+
+logger = setup_logger("material_analysis.services.framework_pool")
+
+def session_key(api_key: str, session_id: Optional[str] = None) -> str:
+    """
+    Build a pool key without keeping the raw API key around.
+
+    Args:
+        api_key: User API key
+        session_id: Optional browser session identifier
+
+    Returns:
+        Hex digest identifying the session
+    """
+    return hashlib.sha256(f"{api_key}\0{session_id or ''}".encode('utf-8')).hexdigest()
+
+class _PooledFramework:
+    """A framework instance with its usage lock and last-use time."""
+
+    def __init__(self, framework: Any):
+        self.framework = framework
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+
+class FrameworkPool:
+    """Keeps one warm framework per session and drops sessions that stay idle too long."""
+
+    def __init__(self,
+                 factory: Callable[[str], Any],
+                 max_frameworks: int = FRAMEWORK_POOL_CONFIG['MAX_FRAMEWORKS'],
+                 idle_timeout: float = FRAMEWORK_POOL_CONFIG['IDLE_TIMEOUT_SECONDS']):
+        """
+        Initialize the pool.
+
+        Args:
+            factory: Creates a framework from an API key
+            max_frameworks: Maximum number of warm frameworks; least recently used are dropped
+            idle_timeout: Seconds after which an unused framework is dropped
+        """
+        self.factory = factory
+        self.max_frameworks = max_frameworks
+        self.idle_timeout = idle_timeout
+        self._frameworks = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict_idle(self) -> None:
+        """Drop frameworks past the idle timeout or beyond the size limit (caller holds the lock)."""
+        now = time.monotonic()
+        for key in [key for key, entry in self._frameworks.items()
+                    if now - entry.last_used > self.idle_timeout and not entry.lock.locked()]:
+            del self._frameworks[key]
+            logger.info("Dropped idle framework from pool")
+        while len(self._frameworks) > self.max_frameworks:
+            key = next((key for key, entry in self._frameworks.items() if not entry.lock.locked()), None)
+            if key is None:
+                break
+            del self._frameworks[key]
+            logger.info("Dropped least recently used framework from pool")
+
+    @contextmanager
+    def session(self, api_key: str, session_id: Optional[str] = None) -> Iterator[Any]:
+        """
+        Borrow the session's framework, creating it on first use.
+
+        A framework serves one request at a time; concurrent requests from the
+        same session wait for each other.
+
+        Args:
+            api_key: User API key
+            session_id: Optional browser session identifier
+
+        Yields:
+            Framework instance
+        """
+        key = session_key(api_key, session_id)
+        with self._lock:
+            self._evict_idle()
+            entry = self._frameworks.get(key)
+            if entry is not None:
+                self._frameworks.move_to_end(key)
+
+        if entry is None:
+            logger.info("Creating framework for new session")
+            created = _PooledFramework(self.factory(api_key))
+            with self._lock:
+                # Another request of the same session may have won the race
+                entry = self._frameworks.setdefault(key, created)
+                self._frameworks.move_to_end(key)
+                self._evict_idle()
+
+        with entry.lock:
+            try:
+                yield entry.framework
+            finally:
+                entry.last_used = time.monotonic()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._frameworks)
@@ -0,0 +1,222 @@
+"""
+Background job queue for long-running agent queries with progress events.
+"""
+import time
+import uuid
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from src.utils.logger import setup_logger
+from config.settings import JOB_CONFIG
+
+logger = setup_logger("material_analysis.services.jobs")
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+class JobCancelled(Exception):
+    """Raised inside a running job at its next progress step after cancellation was requested."""
+
+class Job:
+    """State, progress events and result of one submitted query."""
+
+    def __init__(self, description: str):
+        """
+        Initialize a queued job.
+
+        Args:
+            description: Short human-readable description (e.g. the query)
+        """
+        self.id = uuid.uuid4().hex
+        self.description = description
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_requested = False
+        self.events: List[Dict[str, Any]] = []
+        self._condition = threading.Condition(threading.RLock())
+        self._future: Optional[Future] = None
+
+    def add_event(self, event: Dict[str, Any]) -> None:
+        """
+        Record a progress event and wake any stream waiting for it.
+
+        Args:
+            event: Event fields; 'elapsed' seconds since submission is added
+        """
+        with self._condition:
+            self.events.append(dict(event, elapsed=round(time.time() - self.submitted_at, 4)))
+            self._condition.notify_all()
+
+    def wait_for_events(self, after: int, timeout: float) -> List[Dict[str, Any]]:
+        """
+        Block until there are events past an index, the job finishes, or the timeout passes.
+
+        Args:
+            after: Number of events the caller has already seen
+            timeout: Maximum seconds to wait
+
+        Returns:
+            Events after the given index (possibly empty)
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: len(self.events) > after or self.finished, timeout=timeout)
+            return self.events[after:]
+
+    def finish(self, status: str, **fields: Any) -> None:
+        """
+        Move the job to a final state and record the closing event in one step.
+
+        Args:
+            status: Final status
+            **fields: Extra fields for the closing event
+        """
+        with self._condition:
+            self.status = status
+            self.finished_at = time.time()
+            self.add_event(dict(fields, event=status))
+
+    @property
+    def finished(self) -> bool:
+        """Whether the job reached a final state."""
+        return self.status in FINISHED_STATES
+
+    def to_dict(self, include_events: bool = True) -> Dict[str, Any]:
+        """
+        Serialize the job for status endpoints.
+
+        Args:
+            include_events: Whether to include the progress events
+
+        Returns:
+            JSON-serializable dictionary
+        """
+        data = {
+            'id': self.id,
+            'description': self.description,
+            'status': self.status,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'error': self.error,
+        }
+        if include_events:
+            with self._condition:
+                data['events'] = list(self.events)
+        return data
+
+class JobManager:
+    """Runs submitted jobs on a bounded pool of worker threads."""
+
+    def __init__(self,
+                 max_workers: int = JOB_CONFIG['MAX_WORKERS'],
+                 result_ttl: float = JOB_CONFIG['RESULT_TTL_SECONDS']):
+        """
+        Initialize the manager.
+
+        Args:
+            max_workers: Maximum number of jobs running at the same time
+            result_ttl: Seconds a finished job stays queryable
+        """
+        self.result_ttl = result_ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, description: str, func: Callable[[Callable[[Dict[str, Any]], None]], Any]) -> Job:
+        """
+        Queue a job.
+
+        Args:
+            description: Short description of the job
+            func: Work to run; called with a progress callback that records an event and
+                raises JobCancelled once cancellation was requested
+
+        Returns:
+            The queued Job
+        """
+        job = Job(description)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        job.add_event({'event': 'queued'})
+        job._future = self._executor.submit(self._run, job, func)
+        logger.info(f"Submitted job {job.id}")
+        return job
+
+    def _run(self, job: Job, func: Callable) -> None:
+        """Execute a job on a worker thread and record its outcome."""
+        if job.cancel_requested:
+            return
+
+        def progress(event: Dict[str, Any]) -> None:
+            if job.cancel_requested:
+                raise JobCancelled(f"Job {job.id} was cancelled")
+            job.add_event(event)
+
+        job.status = RUNNING
+        job.started_at = time.time()
+        job.add_event({'event': 'started'})
+        status = FAILED
+        try:
+            job.result = func(progress)
+            status = CANCELLED if job.cancel_requested else SUCCEEDED
+        except JobCancelled:
+            status = CANCELLED
+        except Exception as e:
+            job.error = str(e)
+            logger.error(f"Job {job.id} failed: {str(e)}")
+        finally:
+            job.finish(status, seconds=round(time.time() - job.started_at, 4))
+            logger.info(f"Job {job.id} {job.status}")
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """
+        Look up a job.
+
+        Args:
+            job_id: Job identifier
+
+        Returns:
+            The Job, or None if unknown or expired
+        """
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Request cancellation; queued jobs never start, running jobs stop at their next step.
+
+        Args:
+            job_id: Job identifier
+
+        Returns:
+            True if the job exists and had not finished yet
+        """
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return False
+        job.cancel_requested = True
+        if job._future is not None and job._future.cancel():
+            job.finish(CANCELLED)
+        logger.info(f"Cancellation requested for job {job_id}")
+        return True
+
+    def _prune(self) -> None:
+        """Forget finished jobs older than the result TTL (caller holds the lock)."""
+        now = time.time()
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.finished and now - job.finished_at > self.result_ttl]:
+            del self._jobs[job_id]
+
+    def shutdown(self) -> None:
+        """Stop accepting jobs and wait for running ones."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
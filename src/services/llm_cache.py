@@ -0,0 +1,308 @@
+"""
+On-disk cache of chat model responses with record and replay modes, plus local stand-in chat models.
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from src.services.metrics import record_cache_lookup
+from src.utils.logger import setup_logger
+from config.settings import DEFAULT_MODEL_NAME, DEFAULT_TEMPERATURE, LLM_CACHE_CONFIG
+
+logger = setup_logger("material_analysis.services.llm_cache")
+
+LLM_CACHE_MODES = ('off', 'record', 'replay')
+
+class ReplayMiss(Exception):
+    """Raised in replay mode when a prompt has no recorded response."""
+
+def serialize_messages(messages: Sequence[BaseMessage]) -> List[Dict[str, str]]:
+    """
+    Turn chat messages into plain role/content records.
+
+    Args:
+        messages: Chat messages sent to the model
+
+    Returns:
+        List of {'role', 'content'} dictionaries
+    """
+    return [{'role': message.type, 'content': message.content} for message in messages]
+
+def prompt_key(messages: Sequence[BaseMessage], model_name: str, temperature: float,
+               stop: Optional[Sequence[str]] = None, base_url: Optional[str] = None) -> str:
+    """
+    Build the cache key of a chat call from the full prompt and the model settings.
+
+    Args:
+        messages: Chat messages sent to the model
+        model_name: Model name
+        temperature: Sampling temperature
+        stop: Stop sequences
+        base_url: API base URL, since one model name can mean different models on different endpoints
+
+    Returns:
+        Hex digest identifying the call
+    """
+    payload = json.dumps({
+        'base_url': base_url,
+        'model': model_name,
+        'temperature': temperature,
+        'stop': list(stop) if stop else None,
+        'messages': serialize_messages(messages),
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class ResponseCache:
+    """Directory of recorded responses, one JSON file per prompt, trimmed least recently used first."""
+
+    def __init__(self,
+                 cache_dir: str = LLM_CACHE_CONFIG['CACHE_DIR'],
+                 max_bytes: int = LLM_CACHE_CONFIG['MAX_BYTES']):
+        """
+        Initialize the cache, measuring any responses already on disk.
+
+        Args:
+            cache_dir: Directory holding the recorded responses
+            max_bytes: Total size limit before least recently used responses are evicted
+        """
+        self.directory = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._sizes = {}
+        os.makedirs(self.directory, exist_ok=True)
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                self._sizes[name[:-len('.json')]] = os.path.getsize(os.path.join(self.directory, name))
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+    @property
+    def total_bytes(self) -> int:
+        """Size of all recorded responses in bytes."""
+        return sum(self._sizes.values())
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a recorded response.
+
+        Args:
+            key: Key from prompt_key
+
+        Returns:
+            Response text, or None if the prompt was never recorded
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                record = json.load(f)
+            # The modification time doubles as the last-use time for eviction
+            os.utime(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            record_cache_lookup('llm', 0, 1)
+            return None
+        with self._lock:
+            self.hits += 1
+        record_cache_lookup('llm', 1, 0)
+        return record['response']
+
+    def put(self, key: str, response: str, messages: Optional[Sequence[BaseMessage]] = None,
+            model_name: Optional[str] = None, temperature: Optional[float] = None,
+            base_url: Optional[str] = None) -> None:
+        """
+        Record a response together with its prompt so the transcript stays readable.
+
+        Args:
+            key: Key from prompt_key
+            response: Response text
+            messages: Prompt messages
+            model_name: Model name
+            temperature: Sampling temperature
+            base_url: API base URL
+        """
+        record = {
+            'base_url': base_url,
+            'model': model_name,
+            'temperature': temperature,
+            'messages': serialize_messages(messages) if messages is not None else None,
+            'response': response,
+            'recorded_at': time.time(),
+        }
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(record, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._sizes[key] = os.path.getsize(path)
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Delete least recently used responses down to 90% of the size limit (caller holds the lock)."""
+        def last_used(key):
+            try:
+                return os.path.getmtime(self._path(key))
+            except OSError:
+                return 0.0
+
+        target = int(self.max_bytes * 0.9)
+        total = self.total_bytes
+        for key in sorted(self._sizes, key=last_used):
+            if total <= target:
+                break
+            total -= self._sizes.pop(key)
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+        logger.info(f"Evicted LLM responses, {len(self._sizes)} remain")
+
+    def clear(self) -> None:
+        """Delete every recorded response."""
+        with self._lock:
+            for key in list(self._sizes):
+                try:
+                    os.remove(self._path(key))
+                except OSError:
+                    pass
+            self._sizes.clear()
+
+class CachedChatModel(BaseChatModel):
+    """Chat model that answers from a ResponseCache and records what the wrapped model says."""
+
+    llm: Optional[BaseChatModel] = None
+    response_cache: Any = None
+    model_name: str = DEFAULT_MODEL_NAME
+    temperature: float = DEFAULT_TEMPERATURE
+    base_url: Optional[str] = None
+    replay: bool = False
+
+    @property
+    def _llm_type(self) -> str:
+        return "cached-chat"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        key = prompt_key(messages, self.model_name, self.temperature, stop, self.base_url)
+        text = self.response_cache.get(key)
+        if text is None:
+            if self.replay:
+                raise ReplayMiss(f"No recorded response for prompt {key[:12]} in replay mode")
+            if self.llm is None:
+                raise ReplayMiss(f"No recorded response for prompt {key[:12]} and no chat model to ask; "
+                                 f"give an API key to record new responses")
+            text = self.llm.invoke(messages, stop=stop, **kwargs).content
+            self.response_cache.put(key, text, messages, self.model_name, self.temperature, self.base_url)
+        else:
+            logger.info(f"LLM response served from cache: {key[:12]}")
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+class TranscriptChatModel(BaseChatModel):
+    """Local stand-in chat model that plays back a fixed list of responses in order."""
+
+    responses: List[str]
+    cycle: bool = False
+    position: int = 0
+
+    @classmethod
+    def from_file(cls, path: str, cycle: bool = False) -> 'TranscriptChatModel':
+        """
+        Load a transcript: a JSON list of response strings or records with a 'response'
+        field, a single record (one file of a ResponseCache directory, which stores one
+        JSON file per prompt), or JSON lines of such records.
+
+        Args:
+            path: Transcript file path
+            cycle: Start over after the last response instead of failing
+
+        Returns:
+            TranscriptChatModel instance
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        try:
+            records = json.loads(text)
+            records = records if isinstance(records, list) else [records]
+        except ValueError:
+            records = [json.loads(line) for line in text.splitlines() if line.strip()]
+        responses = [record['response'] if isinstance(record, dict) else record for record in records]
+        return cls(responses=responses, cycle=cycle)
+
+    @property
+    def _llm_type(self) -> str:
+        return "transcript-chat"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        if self.position >= len(self.responses):
+            if not self.cycle or not self.responses:
+                raise ReplayMiss("Transcript has no more recorded responses")
+            self.position = 0
+        text = self.responses[self.position]
+        self.position += 1
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def get_response_cache() -> ResponseCache:
+    """
+    Get the process-wide LLM response cache.
+
+    Returns:
+        Shared ResponseCache instance
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache()
+        return _default_cache
+
+def wrap_chat_model(llm: Optional[BaseChatModel], mode: str = LLM_CACHE_CONFIG['MODE'],
+                    model_name: str = DEFAULT_MODEL_NAME,
+                    temperature: float = DEFAULT_TEMPERATURE,
+                    base_url: Optional[str] = None) -> BaseChatModel:
+    """
+    Put the response cache in front of a chat model according to the cache mode.
+
+    Args:
+        llm: Chat model doing the real work (may be None in replay mode)
+        mode: 'off' uses llm directly, 'record' answers repeated prompts from the cache and
+            records new ones, 'replay' answers only from the cache and never calls llm
+        model_name: Model name, part of the cache key
+        temperature: Sampling temperature, part of the cache key
+        base_url: API base URL, part of the cache key
+
+    Returns:
+        Chat model to hand to the agent
+    """
+    if mode not in LLM_CACHE_MODES:
+        raise ValueError(f"Unknown LLM cache mode '{mode}', expected one of {', '.join(LLM_CACHE_MODES)}")
+    if mode == 'off':
+        if llm is None:
+            raise ValueError("A chat model is required when the LLM cache is off")
+        return llm
+    return CachedChatModel(
+        llm=llm,
+        response_cache=get_response_cache(),
+        model_name=model_name,
+        temperature=temperature,
+        base_url=base_url,
+        replay=(mode == 'replay'),
+    )
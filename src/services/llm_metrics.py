@@ -0,0 +1,52 @@
+"""
+LangChain callback handler feeding chat model calls into the process-wide metrics.
+"""
+import time
+import threading
+from typing import Any, Dict, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from src.services.metrics import LLM_CALLS, LLM_DURATION, LLM_TOKENS, log_event
+
+class LLMMetricsHandler(BaseCallbackHandler):
+    """LangChain callback handler recording chat model latency, outcomes and token usage."""
+
+    def __init__(self):
+        self._starts: Dict[Any, float] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id: Any) -> None:
+        with self._lock:
+            self._starts[run_id] = time.perf_counter()
+
+    def _finish(self, run_id: Any) -> Optional[float]:
+        with self._lock:
+            start = self._starts.pop(run_id, None)
+        return time.perf_counter() - start if start is not None else None
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs) -> None:
+        self._start(run_id)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs) -> None:
+        self._start(run_id)
+
+    def on_llm_end(self, response, *, run_id, **kwargs) -> None:
+        seconds = self._finish(run_id)
+        LLM_CALLS.inc(status='success')
+        if seconds is not None:
+            LLM_DURATION.observe(seconds)
+        usage = (response.llm_output or {}).get('token_usage') or {}
+        for kind in ('prompt_tokens', 'completion_tokens'):
+            if usage.get(kind):
+                LLM_TOKENS.inc(usage[kind], kind=kind.split('_')[0])
+        log_event('llm_call', status='success', seconds=round(seconds, 6) if seconds is not None else None,
+                  prompt_tokens=usage.get('prompt_tokens'), completion_tokens=usage.get('completion_tokens'))
+
+    def on_llm_error(self, error, *, run_id, **kwargs) -> None:
+        seconds = self._finish(run_id)
+        LLM_CALLS.inc(status='error')
+        if seconds is not None:
+            LLM_DURATION.observe(seconds)
+        log_event('llm_call', status='error', seconds=round(seconds, 6) if seconds is not None else None,
+                  error=str(error))
@@ -0,0 +1,389 @@
+"""
+Process-wide metrics for tool calls, LLM calls and caches, exported in Prometheus text format.
+"""
+import os
+import json
+import time
+import bisect
+import threading
+import functools
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from src.utils.logger import setup_logger
+from config.settings import METRICS_CONFIG
+
+logger = setup_logger("material_analysis.services.metrics")
+# Structured events go to their own logger so they can be routed or filtered separately
+event_logger = setup_logger("material_analysis.events")
+
+LabelValues = Tuple[str, ...]
+
+def current_rss() -> Optional[int]:
+    """
+    Get the resident set size of this process.
+
+    Returns:
+        RSS in bytes, or None where it cannot be measured
+    """
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+class _RssMonitor:
+    """One background thread sampling RSS for every active RssSampler; it exits when none is left."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samplers = set()
+        self._thread = None
+
+    def add(self, sampler: 'RssSampler') -> None:
+        with self._lock:
+            self._samplers.add(sampler)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='rss-monitor', daemon=True)
+                self._thread.start()
+
+    def remove(self, sampler: 'RssSampler') -> None:
+        # Once removed, a sampler is never updated again, so its peak is final after __exit__
+        with self._lock:
+            self._samplers.discard(sampler)
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                if not self._samplers:
+                    self._thread = None
+                    return
+                interval = min(sampler.interval for sampler in self._samplers)
+            time.sleep(interval)
+            rss = current_rss()
+            with self._lock:
+                for sampler in self._samplers:
+                    sampler._observe(rss)
+
+_monitor = _RssMonitor()
+
+class RssSampler:
+    """
+    Tracks the highest RSS seen while a block of code runs.
+
+    All samplers share one background thread, so concurrent and back-to-back tool calls
+    do not start a thread each.
+    """
+
+    def __init__(self, interval: float = METRICS_CONFIG['RSS_SAMPLE_INTERVAL']):
+        """
+        Initialize the sampler.
+
+        Args:
+            interval: Seconds between samples
+        """
+        self.interval = interval
+        self.start_rss = current_rss()
+        self.peak = self.start_rss
+
+    def _observe(self, rss: Optional[int]) -> None:
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+
+    def __enter__(self) -> 'RssSampler':
+        if self.start_rss is not None:
+            _monitor.add(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback) -> None:
+        _monitor.remove(self)
+        self._observe(current_rss())
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values)) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class _Metric:
+    """Base class holding per-label-set values."""
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"Metric {self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return '\n'.join(lines)
+
+class Counter(_Metric):
+    """Monotonically increasing value."""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        """
+        Increase the counter.
+
+        Args:
+            amount: Non-negative increment
+            **labels: Label values
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        """Current value for a label set."""
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}" for key, value in items]
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    kind = 'gauge'
+
+    def set(self, value: float, **labels: Any) -> None:
+        """
+        Set the gauge.
+
+        Args:
+            value: New value
+            **labels: Label values
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_max(self, value: float, **labels: Any) -> None:
+        """Raise the gauge to value if it is higher than the current one."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = max(self._values.get(key, value), value)
+
+class Histogram(_Metric):
+    """Distribution of observations in cumulative buckets."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = METRICS_CONFIG['DURATION_BUCKETS']):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        """
+        Record an observation.
+
+        Args:
+            value: Observed value
+            **labels: Label values
+        """
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * len(self.buckets), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted((key, (list(counts), total[0])) for key, (counts, total) in self._values.items())
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = ('le', _format_value(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    """Named collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.label_names != metric.label_names:
+                    raise ValueError(f"Metric {metric.name} is already registered differently")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        """Get or create a counter."""
+        return self._register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Gauge:
+        """Get or create a gauge."""
+        return self._register(Gauge(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = METRICS_CONFIG['DURATION_BUCKETS']) -> Histogram:
+        """Get or create a histogram."""
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            Exposition text
+        """
+        rss = current_rss()
+        if rss is not None:
+            PROCESS_RSS.set(rss)
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+_default_registry = MetricsRegistry()
+
+def get_metrics() -> MetricsRegistry:
+    """
+    Get the process-wide metrics registry.
+
+    Returns:
+        Shared MetricsRegistry instance
+    """
+    return _default_registry
+
+TOOL_CALLS = _default_registry.counter('material_tool_calls_total', 'Tool calls by outcome', ('tool', 'status'))
+TOOL_DURATION = _default_registry.histogram('material_tool_duration_seconds', 'Tool call wall time', ('tool',))
+TOOL_ROWS = _default_registry.counter('material_tool_rows_total', 'Rows going into and out of tool calls',
+                                      ('tool', 'direction'))
+TOOL_PEAK_RSS = _default_registry.gauge('material_tool_peak_rss_bytes', 'Highest RSS seen during a tool call',
+                                        ('tool',))
+LLM_CALLS = _default_registry.counter('material_llm_calls_total', 'Chat model calls by outcome', ('status',))
+LLM_DURATION = _default_registry.histogram('material_llm_duration_seconds', 'Chat model call wall time')
+LLM_TOKENS = _default_registry.counter('material_llm_tokens_total', 'Tokens reported by the chat model', ('kind',))
+CACHE_LOOKUPS = _default_registry.counter('material_cache_lookups_total', 'Cache lookups by cache and result',
+                                          ('cache', 'result'))
+QUERIES = _default_registry.counter('material_queries_total', 'Framework queries by execution path and outcome',
+                                    ('path', 'status'))
+QUERY_DURATION = _default_registry.histogram('material_query_duration_seconds', 'Framework query wall time',
+                                             ('path',))
+PROCESS_RSS = _default_registry.gauge('material_process_rss_bytes', 'Resident set size of the process')
+
+def record_cache_lookup(cache: str, hits: int, misses: int) -> None:
+    """
+    Count cache hits and misses.
+
+    Args:
+        cache: Cache name, e.g. 'feature', 'model', 'dataset' or 'llm'
+        hits: Number of hits
+        misses: Number of misses
+    """
+    if hits:
+        CACHE_LOOKUPS.inc(hits, cache=cache, result='hit')
+    if misses:
+        CACHE_LOOKUPS.inc(misses, cache=cache, result='miss')
+
+def log_event(event: str, **fields: Any) -> None:
+    """
+    Write a structured event as one JSON log line.
+
+    Args:
+        event: Event name
+        **fields: Event fields
+    """
+    if METRICS_CONFIG['JSON_EVENTS']:
+        event_logger.info(json.dumps(dict(fields, event=event, time=round(time.time(), 6)), default=str))
+
+RowCount = Union[str, Callable[[Any], Optional[int]], None]
+
+def _count_rows(owner: Any, source: RowCount) -> Optional[int]:
+    """Resolve a row count from an attribute name or a function of the tool owner."""
+    if source is None:
+        return None
+    value = source(owner) if callable(source) else getattr(owner, source, None)
+    if value is None:
+        return None
+    return value if isinstance(value, int) else len(value)
+
+def instrumented_tool(name: str, rows_in: RowCount = None, rows_out: RowCount = None):
+    """
+    Decorate a tool method to record its wall time, rows, peak RSS and outcome.
+
+    Tools report success with a message containing 'successfully'; any other
+    message counts as an error.
+
+    Args:
+        name: Tool name used as the metric label
+        rows_in: Attribute name (measured with len) or function of the instance giving the
+            input rows; evaluated after a successful call, like rows_out
+        rows_out: Same for the output rows
+
+    Returns:
+        Decorator
+    """
+    def decorator(method: Callable[..., str]) -> Callable[..., str]:
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs) -> str:
+            if not METRICS_CONFIG['ENABLED']:
+                return method(self, *args, **kwargs)
+            start = time.perf_counter()
+            status = 'error'
+            try:
+                with RssSampler() as sampler:
+                    output = method(self, *args, **kwargs)
+                status = 'success' if 'successfully' in str(output).lower() else 'error'
+                return output
+            finally:
+                seconds = time.perf_counter() - start
+                count_in = _count_rows(self, rows_in) if status == 'success' else None
+                count_out = _count_rows(self, rows_out) if status == 'success' else None
+                TOOL_CALLS.inc(tool=name, status=status)
+                TOOL_DURATION.observe(seconds, tool=name)
+                if count_in is not None:
+                    TOOL_ROWS.inc(count_in, tool=name, direction='in')
+                if count_out is not None:
+                    TOOL_ROWS.inc(count_out, tool=name, direction='out')
+                if sampler.peak is not None:
+                    TOOL_PEAK_RSS.set_max(sampler.peak, tool=name)
+                log_event('tool_call', tool=name, status=status, seconds=round(seconds, 6),
+                          rows_in=count_in, rows_out=count_out, peak_rss=sampler.peak)
+        return wrapper
+    return decorator
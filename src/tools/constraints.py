@@ -0,0 +1,158 @@
+"""
+Stoichiometry and score constraints evaluated over composition arrays in one vectorized pass.
+"""
+import re
+import operator
+import numpy as np
+from typing import Callable, List, Optional
+
+from src.data.composition import CompositionArrays
+from src.data.elements import ELEMENT_INDEX
+from src.tools.rules import element_bits
+from config.settings import FILTER_CONFIG
+
+_NUMBER = r'(\d+(?:\.\d*)?|\.\d+)'
+_COMPARISON = r'(<=|>=|==|!=|<|>|=)'
+_CLAUSE_SEPARATOR = re.compile(r'\s*(?:;|&|\band\b)\s*', re.IGNORECASE)
+# 'Ce >= 0.2', '0.2 <= Ce <= 0.5', 'elements <= 3', 'pred > 0.8'
+_BOUND_PATTERN = re.compile(rf'^(?:{_NUMBER}\s*{_COMPARISON}\s*)?([A-Za-z_]+)(?:\s*{_COMPARISON}\s*{_NUMBER})?$')
+
+_OPERATORS = {
+    '<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge,
+    '=': operator.eq, '==': operator.eq, '!=': operator.ne,
+}
+# Operator with its sides swapped, for bounds written number-first
+_MIRRORED = {'<': '>', '<=': '>=', '>': '<', '>=': '<=', '=': '=', '==': '==', '!=': '!='}
+# Fractions are amount / total in floating point, so Ce0.3Zr0.7O2 stores Ce as 0.09999999999999999;
+# bounds on fractions are compared with this slack in the direction that admits the boundary
+FRACTION_TOLERANCE = 1e-9
+_TOLERANT_OPERATORS = {
+    '<': lambda values, bound: values < bound - FRACTION_TOLERANCE,
+    '<=': lambda values, bound: values <= bound + FRACTION_TOLERANCE,
+    '>': lambda values, bound: values > bound + FRACTION_TOLERANCE,
+    '>=': lambda values, bound: values >= bound - FRACTION_TOLERANCE,
+    '=': lambda values, bound: np.abs(values - bound) <= FRACTION_TOLERANCE,
+    '==': lambda values, bound: np.abs(values - bound) <= FRACTION_TOLERANCE,
+    '!=': lambda values, bound: np.abs(values - bound) > FRACTION_TOLERANCE,
+}
+_COUNT_NAMES = ('elements', 'n_elements', 'nelements')
+_SCORE_NAMES = ('pred', 'probability', 'score')
+_KEYWORDS = {
+    'oxide': 'oxide', 'oxides': 'oxide', 'oxides_only': 'oxide', 'only_oxides': 'oxide',
+    'nontoxic': 'nontoxic', 'non_toxic': 'nontoxic', 'no_toxic': 'nontoxic', 'no_toxic_elements': 'nontoxic',
+}
+
+# Evaluated with the compositions, their element bitmasks and the predictions (or None)
+Predicate = Callable[[CompositionArrays, np.ndarray, Optional[np.ndarray]], np.ndarray]
+
+class StoichiometryFilter:
+    """
+    Compiled list of constraints that must all hold.
+
+    Clauses are separated by ';', '&' or 'and'::
+
+        elements <= 3            number of distinct elements
+        0.2 <= Ce <= 0.5         atomic fraction of an element (fractions sum to 1, compared
+                                 within FRACTION_TOLERANCE; symbols are case-insensitive)
+        O > 0                    element present
+        oxide                    contains O plus other elements, none of them another anion
+                                 (FILTER_CONFIG['OXIDE_EXCLUDED'])
+        nontoxic                 none of FILTER_CONFIG['TOXIC_ELEMENTS']
+        pred >= 0.8              predicted probability (requires model prediction)
+
+    Example: 'elements <= 3; 0.2 <= Ce <= 0.5; oxide; nontoxic; pred >= 0.8'.
+    """
+
+    def __init__(self, expression: str):
+        """
+        Compile a constraint expression.
+
+        Args:
+            expression: Constraint string
+
+        Raises:
+            ValueError: If a clause is malformed or names an unknown element
+        """
+        self.expression = expression
+        self.needs_prediction = False
+        clauses = [clause for clause in _CLAUSE_SEPARATOR.split(expression.strip()) if clause]
+        if not clauses:
+            raise ValueError("Constraint is empty")
+        self._predicates: List[Predicate] = [self._compile_clause(clause) for clause in clauses]
+
+    def _compile_clause(self, clause: str) -> Predicate:
+        keyword = _KEYWORDS.get(clause.lower().replace('-', '_').replace(' ', '_'))
+        if keyword == 'oxide':
+            oxygen = element_bits(['O'])
+            excluded = element_bits(FILTER_CONFIG['OXIDE_EXCLUDED'])
+            return lambda compositions, masks, pred: (
+                (((masks[:, 0] & oxygen[0]) | (masks[:, 1] & oxygen[1])) != 0)
+                & (((masks[:, 0] & excluded[0]) | (masks[:, 1] & excluded[1])) == 0)
+                & (compositions.counts >= 2))
+        if keyword == 'nontoxic':
+            toxic = element_bits(FILTER_CONFIG['TOXIC_ELEMENTS'])
+            return lambda compositions, masks, pred: ((masks[:, 0] & toxic[0]) | (masks[:, 1] & toxic[1])) == 0
+
+        match = _BOUND_PATTERN.match(clause)
+        if match is None or (match.group(1) is None and match.group(5) is None):
+            raise ValueError(f"Invalid constraint '{clause}'; expected e.g. 'elements <= 3', "
+                             f"'0.2 <= Ce <= 0.5', 'oxide', 'nontoxic' or 'pred >= 0.8'")
+        low, low_op, name, high_op, high = match.groups()
+        operators = _OPERATORS
+        if name.lower() in _COUNT_NAMES:
+            value = lambda compositions, pred: compositions.counts
+        elif name.lower() in _SCORE_NAMES:
+            self.needs_prediction = True
+            value = lambda compositions, pred: pred
+        elif name.capitalize() in ELEMENT_INDEX:
+            index = ELEMENT_INDEX[name.capitalize()]
+            value = lambda compositions, pred: compositions.element_fraction(index)
+            operators = _TOLERANT_OPERATORS
+        else:
+            raise ValueError(f"Unknown element or quantity '{name}' in constraint '{clause}'")
+
+        bounds = []
+        if low is not None:
+            bounds.append((operators[_MIRRORED[low_op]], float(low)))
+        if high is not None:
+            bounds.append((operators[high_op], float(high)))
+
+        def predicate(compositions: CompositionArrays, masks: np.ndarray, pred: Optional[np.ndarray]) -> np.ndarray:
+            values = value(compositions, pred)
+            return np.logical_and.reduce([compare(values, bound) for compare, bound in bounds])
+        return predicate
+
+    def evaluate(self, compositions: CompositionArrays, element_masks: np.ndarray,
+                 pred: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Evaluate every constraint for every material.
+
+        Args:
+            compositions: Parsed compositions
+            element_masks: uint64 array of shape (n_materials, 2) from CompositionArrays.element_masks
+            pred: Predicted probability per material; required when a clause tests it
+
+        Returns:
+            Boolean mask of parsed materials meeting all constraints
+
+        Raises:
+            ValueError: If a clause tests the prediction but pred is None
+        """
+        if self.needs_prediction and pred is None:
+            raise ValueError("Constraint tests the prediction; perform model prediction first")
+        keep = compositions.valid
+        for predicate in self._predicates:
+            keep = keep & predicate(compositions, element_masks, pred)
+        return keep
+
+def compile_constraints(expression: str) -> StoichiometryFilter:
+    """
+    Compile a constraint string after stripping quotes and backticks an agent may add.
+
+    Args:
+        expression: Constraint string
+
+    Returns:
+        Compiled StoichiometryFilter
+    """
+    return StoichiometryFilter(expression.strip().strip('`\'"'))
@@ -3,63 +3,218 @@ Tool implementations for SimpleReActFramework.
 """
 import os
 import traceback
+import numpy as np
 import pandas as pd
-from matminer.featurizers.composition import ElementProperty
-from catboost import CatBoostClassifier
-from pymatgen.core.composition import Composition
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 
-from src.utils.helpers import sanitize_path, safe_composition_conversion, ensure_directory_exists
+from src.data.composition import parse_compositions
+from src.data.dataset_store import get_dataset_store
+from src.data.featurizer import MagpieFeaturizer
+from src.data.feature_cache import get_feature_cache
+from src.data.prediction_store import PredictionManifest
+from src.data.io import write_table, parse_columns
+from src.models.ensemble import AGGREGATIONS, aggregate, model_columns, predict_models
+from src.services.metrics import instrumented_tool
+from src.tools.constraints import compile_constraints
+from src.tools.rules import compile_rule
+from src.tools.screening import ScreeningPipeline
+from src.tools.selection import top_k_indices
+from src.tools.similarity import get_similarity_index
+from src.utils.helpers import sanitize_path, parse_tool_arguments
 from src.utils.logger import setup_logger
+from config.settings import ENSEMBLE_CONFIG, SCREENING_CONFIG, SIMILARITY_CONFIG
 
 logger = setup_logger("material_analysis.tools.material_tools")
 
+def _path_and_options(text: str, path_key: str) -> Tuple[str, Dict[str, str]]:
+    """
+    Split a tool input that is either a bare path or 'key=value' pairs.
+    
+    Args:
+        text: Raw tool input
+        path_key: Name of the path parameter in the key=value form
+        
+    Returns:
+        Tuple of (sanitized path, remaining options)
+    """
+    if '=' not in text:
+        return sanitize_path(text), {}
+    options = parse_tool_arguments(text)
+    return sanitize_path(options.pop(path_key, '')), options
+
 class MaterialTools:
-    """Tools for material analysis operations."""
+    """
+    Tools for material analysis operations.
     
-    def __init__(self):
-        """Initialize tools with empty state."""
+    The loaded dataset is shared read-only with other sessions. A session only owns
+    one score per row, one rule flag per row and the positions of its current
+    selection; result frames are built from those positions when they are needed.
+    """
+    
+    def __init__(self, base_dir: Optional[str] = None):
+        """
+        Initialize tools with empty state.
+        
+        Args:
+            base_dir: Directory relative file paths are resolved against (None uses the
+                current directory; the daemon sets the client's)
+        """
+        self.base_dir = base_dir
+        self.dataset = None
         self.data = None
-        self.df_magpie = None
-        self.X = None
-        self.rule_match_materials = None
+        self.compositions = None
+        self.element_masks = None
+        self.pred = None
+        self.ensemble = None
+        self.rule_mask = None
+        # Rows meeting the last filter_materials constraints (within the rule match, if any)
+        self.filter_mask = None
+        self.selection = None
+        # Extra result columns aligned with selection (e.g. similarity distances), or None
+        self.selection_columns = None
+        self.screen_summary = None
+    
+    def _resolve(self, path: str) -> str:
+        """Resolve a relative tool path against base_dir."""
+        if self.base_dir and path and not os.path.isabs(path):
+            return os.path.join(self.base_dir, path)
+        return path
+    
+    def _view(self, positions: np.ndarray, rule_flags: bool = True) -> pd.DataFrame:
+        """
+        Build the result frame of some rows: input columns plus this session's scores and rule flags.
+        
+        Args:
+            positions: Row positions into the dataset
+            rule_flags: Whether to add the 'rule_match' and 'filter_match' columns of earlier
+                rule matching and filtering
+            
+        Returns:
+            New DataFrame holding only the given rows
+        """
+        frame = self.data.iloc[positions].copy()
+        if self.pred is not None:
+            frame['pred'] = self.pred[positions]
+        if self.ensemble is not None:
+            feature_rows = self.dataset.feature_index[positions]
+            for column, values in self.ensemble.items():
+                frame[column] = values[feature_rows]
+        if rule_flags and self.rule_mask is not None:
+            frame['rule_match'] = self.rule_mask[positions]
+        if rule_flags and self.filter_mask is not None:
+            frame['filter_match'] = self.filter_mask[positions]
+        return frame
+    
+    def _candidates(self) -> np.ndarray:
+        """Positions select_top chooses from: the filtered, else the rule-matched, else all rows."""
+        if self.filter_mask is not None:
+            return np.flatnonzero(self.filter_mask)
+        if self.rule_mask is not None:
+            return np.flatnonzero(self.rule_mask)
+        return np.arange(len(self.data))
+    
+    @property
+    def X(self) -> Optional[np.ndarray]:
+        """Feature matrix of the distinct compositions of the loaded data, built on first use."""
+        return self.dataset.features if self.dataset is not None else None
     
+    @property
+    def rule_match_materials(self) -> Optional[pd.DataFrame]:
+        """Rows selected by the last rule match, filter, top candidate selection or similarity search, or None."""
+        if self.selection is None:
+            return None
+        # Similarity neighbors (the only selection with its own columns) are not drawn from the
+        # rule-matched rows, so a rule flag left over from an earlier match would be misleading
+        frame = self._view(self.selection, rule_flags=self.selection_columns is None)
+        for column, values in (self.selection_columns or {}).items():
+            frame[column] = values
+        return frame
+    
+    @instrumented_tool('read_data', rows_out='data')
     def read_data(self, file_path: str) -> str:
         """
-        Read material expression data
+        Read material expression data from a CSV, Parquet or Arrow file
         
         Args:
-            file_path: Data file path
+            file_path: Data file path, or 'file_path=...; columns=Substance,...' to load
+                only some columns
             
         Returns:
             Operation result message
         """
-        file_path = sanitize_path(file_path)
         logger.info(f"Reading data file: {file_path}")
         
         try:
+            file_path, options = _path_and_options(file_path, 'file_path')
+            file_path = self._resolve(file_path)
             if not os.path.exists(file_path):
                 error_msg = f"File does not exist: {file_path}"
                 logger.error(error_msg)
                 return error_msg
                 
-            self.data = pd.read_csv(file_path)
-            # Convert composition column
-            self.data['composition'] = self.data['Substance'].apply(
-                lambda x: safe_composition_conversion(x)
-            )
-            # Use magpie feature extractor
-            ep_featurizer = ElementProperty.from_preset('magpie')
-            self.df_magpie = ep_featurizer.featurize_dataframe(self.data, col_id='composition')
-            self.X = self.df_magpie.drop(['Substance', 'composition'], axis=1)
+            columns = parse_columns(options.get('columns'))
+            if columns is not None and 'Substance' not in columns:
+                columns.insert(0, 'Substance')
+            # Input columns, compositions and features are shared read-only with other sessions
+            dataset = get_dataset_store().get(file_path, columns=columns)
+            self.dataset = dataset
+            self.data = dataset.frame
+            self.compositions = dataset.compositions
+            self.element_masks = dataset.element_masks
+            self.pred = None
+            self.ensemble = None
+            self.rule_mask = None
+            self.filter_mask = None
+            self.selection = None
+            self.selection_columns = None
             
             logger.info(f"Successfully read material expressions, shape: {self.data.shape}")
-            return f"Successfully read material expressions, total {len(self.data)} records"
+            return (f"Successfully read material expressions, total {len(self.data)} records "
+                    f"({dataset.n_distinct} distinct compositions, dedup ratio {dataset.dedup_ratio:.2f})")
         except Exception as e:
             error_msg = f"Failed to read data: {str(e)}"
             logger.error(f"{error_msg}\n{traceback.format_exc()}")
             return error_msg
         
+    def _predict_distinct(self, model_paths: List[str]) -> Tuple[np.ndarray, int]:
+        """
+        Score every distinct composition of the loaded data with one or more models.
+
+        Compositions found in the models' prediction manifests are not featurized again; the
+        rest are featurized once and scored by all models in parallel threads.
+
+        Args:
+            model_paths: Model file paths
+
+        Returns:
+            Tuple of (probabilities of shape (n_models, n_distinct), compositions scored now)
+        """
+        dataset = self.dataset
+        hashes = dataset.composition_hashes
+        pred = np.empty((len(model_paths), len(hashes)), dtype=np.float64)
+        manifests = []
+        missing = np.zeros(len(hashes), dtype=bool)
+        for i, model_path in enumerate(model_paths):
+            if SCREENING_CONFIG['INCREMENTAL']:
+                # Compositions predicted by this model version in an earlier run of the same file
+                manifest = PredictionManifest.load(dataset.path, model_path)
+                pred[i], known = manifest.lookup(hashes)
+                missing |= ~known
+            else:
+                manifest = None
+                missing[:] = True
+            manifests.append(manifest)
+
+        new = np.flatnonzero(missing)
+        if len(new):
+            pred[:, new] = predict_models(dataset.featurize(new), model_paths)
+        for i, manifest in enumerate(manifests):
+            if manifest is not None and (len(new) or len(manifest) != len(hashes)):
+                manifest.replace(hashes, pred[i])
+                manifest.save()
+        return pred, len(new)
+
+    @instrumented_tool('model_predict', rows_in='data', rows_out='data')
     def model_predict(self, model_path: str) -> str:
         """
         Predict material properties
@@ -70,11 +225,11 @@ class MaterialTools:
         Returns:
             Operation result message
         """
-        model_path = sanitize_path(model_path)
+        model_path = self._resolve(sanitize_path(model_path))
         logger.info(f"Using model for prediction: {model_path}")
         
         try:
-            if self.data is None or self.X is None:
+            if self.dataset is None:
                 error_msg = "Please read data first"
                 logger.error(error_msg)
                 return error_msg
@@ -84,25 +239,86 @@ class MaterialTools:
                 logger.error(error_msg)
                 return error_msg
                 
-            loaded_model = CatBoostClassifier()
-            loaded_model.load_model(model_path)
-            y_pred = loaded_model.predict_proba(self.X)[:,1]
-            self.data['pred'] = y_pred
-            self.data = self.data.sort_values(by=['pred'], ascending=False)
-            
-            logger.info("Model prediction completed")
-            return "Model prediction completed successfully"
+            unique_pred, n_new = self._predict_distinct([model_path])
+            # Scored once per distinct composition and broadcast to every row;
+            # rows stay in file order and only small selections are sorted by score
+            self.pred = unique_pred[0][self.dataset.feature_index]
+            self.ensemble = None
+            
+            n_distinct = self.dataset.n_distinct
+            logger.info(f"Model prediction completed, {n_new} compositions predicted, "
+                        f"{n_distinct - n_new} reused from earlier runs")
+            return (f"Model prediction completed successfully ({n_new} of {n_distinct} distinct compositions "
+                    f"predicted, the rest reused from earlier runs of this file and model)")
         except Exception as e:
             error_msg = f"Model prediction failed: {str(e)}"
             logger.error(f"{error_msg}\n{traceback.format_exc()}")
             return error_msg
         
+    @instrumented_tool('ensemble_predict', rows_in='data', rows_out='data')
+    def ensemble_predict(self, arguments: str) -> str:
+        """
+        Score the loaded data with several models at once
+        
+        Args:
+            arguments: Comma-separated model paths, or 'model_paths=a.cbm,b.cbm' with an
+                optional 'aggregate=mean|vote|max' choosing the score used as 'pred'
+            
+        Returns:
+            Operation result message
+        """
+        logger.info(f"Ensemble prediction with arguments: {arguments}")
+        
+        try:
+            params = parse_tool_arguments(arguments) if '=' in arguments else {'model_paths': arguments}
+            model_paths = [self._resolve(sanitize_path(path))
+                           for path in (params.get('model_paths') or '').split(',') if path.strip()]
+            method = (params.get('aggregate') or ENSEMBLE_CONFIG['AGGREGATE']).lower()
+            if self.dataset is None:
+                error_msg = "Please read data first"
+                logger.error(error_msg)
+                return error_msg
+            
+            if not model_paths:
+                error_msg = "Please give at least one model path"
+                logger.error(error_msg)
+                return error_msg
+            
+            if method not in AGGREGATIONS:
+                error_msg = f"Unknown aggregate '{method}', expected one of {', '.join(AGGREGATIONS)}"
+                logger.error(error_msg)
+                return error_msg
+            
+            missing = [path for path in model_paths if not os.path.exists(path)]
+            if missing:
+                error_msg = f"Model file does not exist: {', '.join(missing)}"
+                logger.error(error_msg)
+                return error_msg
+            
+            unique_pred, n_new = self._predict_distinct(model_paths)
+            aggregated = aggregate(unique_pred)
+            # Columns stay per distinct composition and are broadcast only for the rows written out
+            self.ensemble = dict(zip(model_columns(model_paths), unique_pred))
+            self.ensemble.update((f"pred_{name}", values) for name, values in aggregated.items())
+            self.pred = aggregated[method][self.dataset.feature_index]
+            
+            columns = ', '.join(self.ensemble)
+            logger.info(f"Ensemble prediction completed, {n_new} compositions predicted by {len(model_paths)} models")
+            return (f"Ensemble prediction completed successfully with {len(model_paths)} models, 'pred' is the "
+                    f"{method} of the model probabilities; result columns: {columns}")
+        except Exception as e:
+            error_msg = f"Ensemble prediction failed: {str(e)}"
+            logger.error(f"{error_msg}\n{traceback.format_exc()}")
+            return error_msg
+        
+    @instrumented_tool('rule_match', rows_in='data', rows_out='selection')
     def rule_match(self, rule_elements: str) -> str:
         """
-        Match materials containing specific elements
+        Match materials against an element rule
         
         Args:
-            rule_elements: A comma-separated list of element symbols, e.g., 'Fe,Co,Ni'
+            rule_elements: Element rule, e.g. 'Fe,Co,Ni' (any of), 'Ce & !Pb',
+                'all(Ce, O) & none(Pb, Cd)' or 'only(Ce, O)'; see ElementRule for the grammar
             
         Returns:
             Operation result message
@@ -114,58 +330,274 @@ class MaterialTools:
                 logger.error(error_msg)
                 return error_msg
                 
-            rule_elements = [element.strip() for element in rule_elements.split(',')]
+            rule = compile_rule(rule_elements)
             
-            def contains_element(comp):
-                if not isinstance(comp, Composition):
-                    return False
-                
-                elements = comp.elements
-                
-                for element in elements:
-                    if element.symbol in rule_elements:
-                        return True
-                
-                return False
-
-            self.data['rule_match'] = self.data['composition'].apply(contains_element)
-            self.rule_match_materials = self.data[self.data['rule_match'] == True]
+            self.rule_mask = rule.evaluate(self.element_masks) & self.compositions.valid
+            # A new rule match starts a new candidate set
+            self.filter_mask = None
+            self.selection = np.flatnonzero(self.rule_mask)
+            self.selection_columns = None
+            if self.pred is not None:
+                self.selection = self.selection[top_k_indices(self.pred[self.selection])]
             
-            match_count = len(self.rule_match_materials)
+            match_count = len(self.selection)
             logger.info(f"Rule matching completed, found {match_count} matching materials")
-            return f"Rule matching completed successfully, found {match_count} materials containing specified elements"
+            return f"Rule matching completed successfully, found {match_count} materials matching the rule"
         except Exception as e:
             error_msg = f"Rule matching failed: {str(e)}"
             logger.error(f"{error_msg}\n{traceback.format_exc()}")
             return error_msg
     
+    @instrumented_tool('select_top', rows_in=lambda tools: len(tools._candidates()), rows_out='selection')
+    def select_top(self, arguments: str) -> str:
+        """
+        Keep the highest-scoring candidates without sorting the full dataset
+        
+        Args:
+            arguments: 'k=50' with an optional 'threshold=0.9'; selects from the
+                rule-matched and filtered materials when rule matching or filtering has been performed
+            
+        Returns:
+            Operation result message
+        """
+        logger.info(f"Selecting top candidates: {arguments}")
+        try:
+            if self.data is None or self.pred is None:
+                error_msg = "Please read data and perform model prediction first"
+                logger.error(error_msg)
+                return error_msg
+            
+            params = parse_tool_arguments(arguments) if '=' in arguments else {'k': arguments}
+            k = int(params['k']) if params.get('k') else None
+            threshold = float(params['threshold']) if params.get('threshold') else None
+            if k is None and threshold is None:
+                error_msg = "Please give k and/or threshold"
+                logger.error(error_msg)
+                return error_msg
+            
+            candidates = self._candidates()
+            self.selection = candidates[top_k_indices(self.pred[candidates], k, threshold)]
+            self.selection_columns = None
+            
+            selected = len(self.selection)
+            logger.info(f"Selected {selected} of {len(candidates)} candidates")
+            return f"Top candidate selection completed successfully, kept {selected} of {len(candidates)} materials"
+        except Exception as e:
+            error_msg = f"Top candidate selection failed: {str(e)}"
+            logger.error(f"{error_msg}\n{traceback.format_exc()}")
+            return error_msg
+    
+    @instrumented_tool('filter_materials', rows_in='data', rows_out='selection')
+    def filter_materials(self, constraints: str) -> str:
+        """
+        Keep the materials meeting stoichiometry and score constraints
+        
+        Args:
+            constraints: Clauses joined by ';', e.g. 'elements <= 3; 0.2 <= Ce <= 0.5; oxide;
+                nontoxic; pred >= 0.8'; see StoichiometryFilter for the grammar
+            
+        Returns:
+            Operation result message
+        """
+        logger.info(f"Filtering materials: {constraints}")
+        try:
+            if self.data is None:
+                error_msg = "Please read data first"
+                logger.error(error_msg)
+                return error_msg
+            
+            constraint_filter = compile_constraints(constraints)
+            if constraint_filter.needs_prediction and self.pred is None:
+                error_msg = "Please perform model prediction first to filter by pred"
+                logger.error(error_msg)
+                return error_msg
+            
+            keep = constraint_filter.evaluate(self.compositions, self.element_masks, self.pred)
+            candidates = len(self.data)
+            if self.rule_mask is not None:
+                # Narrows an earlier rule match, so select_top and save_result see the filtered set
+                candidates = int(self.rule_mask.sum())
+                keep &= self.rule_mask
+            self.filter_mask = keep
+            self.selection = np.flatnonzero(keep)
+            self.selection_columns = None
+            if self.pred is not None:
+                self.selection = self.selection[top_k_indices(self.pred[self.selection])]
+            
+            logger.info(f"Filtering completed, {len(self.selection)} of {candidates} materials kept")
+            return (f"Filtering completed successfully, {len(self.selection)} of {candidates} materials "
+                    f"meet the constraints")
+        except Exception as e:
+            error_msg = f"Filtering failed: {str(e)}"
+            logger.error(f"{error_msg}\n{traceback.format_exc()}")
+            return error_msg
+    
+    @instrumented_tool('find_similar', rows_in='data', rows_out='selection')
+    def find_similar(self, arguments: str) -> str:
+        """
+        Find the loaded materials most similar to given formulas in magpie feature space
+        
+        Args:
+            arguments: Comma-separated formulas, or 'formulas=CeO2,Fe3O4' with an optional
+                'k=<neighbors per formula>'
+            
+        Returns:
+            Operation result message listing the nearest materials of each formula
+        """
+        logger.info(f"Searching materials similar to: {arguments}")
+        
+        try:
+            params = parse_tool_arguments(arguments) if '=' in arguments else {'formulas': arguments}
+            formulas = [formula.strip() for formula in (params.get('formulas') or '').split(',') if formula.strip()]
+            if self.dataset is None:
+                error_msg = "Please read data first"
+                logger.error(error_msg)
+                return error_msg
+            
+            k = int(params['k']) if params.get('k') else SIMILARITY_CONFIG['DEFAULT_K']
+            if not formulas or k < 1:
+                error_msg = "Please give at least one formula and k >= 1"
+                logger.error(error_msg)
+                return error_msg
+            
+            queries = parse_compositions(formulas)
+            if not queries.valid.any():
+                error_msg = f"Could not parse any of the formulas: {', '.join(formulas)}"
+                logger.error(error_msg)
+                return error_msg
+            
+            dataset = self.dataset
+            index = get_similarity_index(dataset)
+            valid = np.flatnonzero(queries.valid)
+            query_features = MagpieFeaturizer(cache=get_feature_cache()).featurize_matrix(
+                queries.take(valid).to_matrix(), dtype=np.float32)
+            # One extra neighbor, since a formula present in the data is its own nearest neighbor
+            neighbors, distances = index.search(query_features, k + 1)
+            query_hashes = queries.take(valid).row_hashes()
+            # First row of each distinct composition stands for all its duplicates
+            _, representative = np.unique(dataset.feature_index, return_index=True)
+            
+            substances = self.data['Substance'].to_numpy()
+            positions, names, neighbor_distances, lines = [], [], [], []
+            for i, query in enumerate(valid):
+                keep = dataset.composition_hashes[neighbors[i]] != query_hashes[i]
+                rows = representative[neighbors[i][keep][:k]]
+                positions.append(rows)
+                names.extend([formulas[query]] * len(rows))
+                neighbor_distances.append(distances[i][keep][:k])
+                described = []
+                for row, distance in list(zip(rows, neighbor_distances[-1]))[:5]:
+                    score = f", pred {self.pred[row]:.3f}" if self.pred is not None else ""
+                    described.append(f"{substances[row]} (distance {distance:.2f}{score})")
+                lines.append(f"{formulas[query]}: {', '.join(described)}")
+            self.selection = np.concatenate(positions)
+            self.selection_columns = {'similar_to': np.array(names, dtype=object),
+                                      'distance': np.concatenate(neighbor_distances)}
+            
+            skipped = [formulas[i] for i in np.flatnonzero(~queries.valid)]
+            logger.info(f"Similarity search completed, {len(self.selection)} neighbors of {len(valid)} formulas")
+            message = (f"Similarity search completed successfully, selected {len(self.selection)} materials "
+                       f"(up to {k} per formula). Nearest: " + '; '.join(lines))
+            if skipped:
+                message += f". Could not parse: {', '.join(skipped)}"
+            return message
+        except Exception as e:
+            error_msg = f"Similarity search failed: {str(e)}"
+            logger.error(f"{error_msg}\n{traceback.format_exc()}")
+            return error_msg
+    
+    @instrumented_tool('save_result', rows_in='selection', rows_out='selection')
     def save_result(self, save_path: str) -> str:
         """
-        Save matched materials to a CSV file
+        Save matched materials to a CSV, Parquet or Arrow file
         
         Args:
-            save_path: File path to save the result
+            save_path: File path to save the result (format follows the extension),
+                or 'save_path=...; columns=Substance,pred' to write only some columns
             
         Returns:
             Operation result message
         """
-        save_path = sanitize_path(save_path)
         logger.info(f"Saving results to: {save_path}")
         
         try:
-            if self.rule_match_materials is None:
-                error_msg = "Please perform rule matching first"
+            save_path, options = _path_and_options(save_path, 'save_path')
+            save_path = self._resolve(save_path)
+            if self.selection is None:
+                error_msg = "Please perform rule matching or top candidate selection first"
                 logger.error(error_msg)
                 return error_msg
                 
-            # Ensure directory exists
-            ensure_directory_exists(save_path)
-            
-            self.rule_match_materials.to_csv(save_path, index=False)
+            # Written to a temporary file and renamed, so readers never see a partial result
+            write_table(self.rule_match_materials, save_path, columns=parse_columns(options.get('columns')))
             
             logger.info(f"Results saved to {save_path}")
-            return f"Results successfully saved to {save_path}, total {len(self.rule_match_materials)} records"
+            return f"Results successfully saved to {save_path}, total {len(self.selection)} records"
         except Exception as e:
             error_msg = f"Failed to save results: {str(e)}"
             logger.error(f"{error_msg}\n{traceback.format_exc()}")
-            return error_msg 
\ No newline at end of file
+            return error_msg
+
+    @instrumented_tool('screen', rows_in=lambda tools: tools.screen_summary['rows_read'],
+                       rows_out=lambda tools: tools.screen_summary['rows_written'])
+    def screen(self, arguments: str) -> str:
+        """
+        Stream a large file through prediction and rule matching with bounded memory
+        
+        Args:
+            arguments: 'file_path=...; model_path=...; save_path=...' with optional
+                'rule=...', 'constraints=...', 'top_k=...', 'threshold=...', 'columns=...',
+                'chunk_size=...' and 'max_memory_mb=...'
+            
+        Returns:
+            Operation result message
+        """
+        logger.info(f"Screening with arguments: {arguments}")
+        
+        try:
+            params = parse_tool_arguments(arguments)
+            missing = [name for name in ('file_path', 'model_path', 'save_path') if not params.get(name)]
+            if missing:
+                error_msg = f"Missing screening parameters: {', '.join(missing)}"
+                logger.error(error_msg)
+                return error_msg
+            
+            file_path = self._resolve(sanitize_path(params['file_path']))
+            model_path = self._resolve(sanitize_path(params['model_path']))
+            save_path = self._resolve(sanitize_path(params['save_path']))
+            for path in (file_path, model_path):
+                if not os.path.exists(path):
+                    error_msg = f"File does not exist: {path}"
+                    logger.error(error_msg)
+                    return error_msg
+            
+            options = {}
+            if params.get('chunk_size'):
+                options['chunk_size'] = int(params['chunk_size'])
+            if params.get('max_memory_mb'):
+                options['max_memory_mb'] = float(params['max_memory_mb'])
+            if params.get('top_k'):
+                options['top_k'] = int(params['top_k'])
+            if params.get('threshold'):
+                options['threshold'] = float(params['threshold'])
+            if params.get('columns'):
+                options['output_columns'] = parse_columns(params['columns'])
+            if params.get('constraints'):
+                options['constraints'] = params['constraints']
+            pipeline = ScreeningPipeline(model_path, rule=params.get('rule') or None, **options)
+            summary = pipeline.run(file_path, save_path)
+            self.screen_summary = summary
+            
+            logger.info(f"Screening completed: {summary}")
+            if summary['rows_distinct'] is not None:
+                predicted = (f"{summary['compositions_predicted']} of {summary['rows_distinct']} distinct "
+                             f"compositions predicted, the rest reused")
+            else:
+                predicted = f"{summary['compositions_predicted']} compositions predicted"
+            return (f"Screening completed successfully, {summary['rows_matched']} of {summary['rows_read']} "
+                    f"materials matched, {summary['rows_written']} saved to {save_path} ({summary['chunks']} chunks, "
+                    f"{predicted})")
+        except Exception as e:
+            error_msg = f"Screening failed: {str(e)}"
+            logger.error(f"{error_msg}\n{traceback.format_exc()}")
+            return error_msg
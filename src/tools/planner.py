@@ -0,0 +1,206 @@
+"""
+Deterministic planner that turns canonical screening requests into direct tool calls.
+"""
+import re
+from typing import List, Optional, Tuple, Union
+
+from src.data.elements import ELEMENT_INDEX
+from src.tools.rules import compile_rule
+
+# Verbs of the compact query DSL and the tools they run
+DSL_VERBS = {
+    'read': 'read_data',
+    'load': 'read_data',
+    'predict': 'model_predict',
+    'ensemble': 'ensemble_predict',
+    'match': 'rule_match',
+    'rule': 'rule_match',
+    'top': 'select_top',
+    'select': 'select_top',
+    'save': 'save_result',
+    'screen': 'screen',
+    'similar': 'find_similar',
+    'filter': 'filter_materials',
+    'where': 'filter_materials',
+}
+DSL_SEPARATOR = re.compile(r'\s*(?:->|=>|>>|\n)\s*')
+
+_DATA_PATH = r'''['"`]?([\w./\\:~-]+\.(?:csv|parquet|pq|feather|arrow|ipc))['"`]?'''
+_MODEL_PATH = re.compile(r'''['"`]?([\w./\\:~-]+\.cbm)['"`]?''', re.IGNORECASE)
+_SAVE_PATH = re.compile(r'\b(?:save|write|export|store)\b.{0,80}?\b(?:to|as|into|in)\s+' + _DATA_PATH, re.IGNORECASE)
+_READ_PATH = re.compile(_DATA_PATH, re.IGNORECASE)
+_TOP_K = re.compile(r'\btop[\s-]*(\d+)\b|\b(\d+)\s+(?:best|highest)\b', re.IGNORECASE)
+_THRESHOLD = re.compile(r'\b(?:threshold|probability|score)\s*(?:of|>=|>|above|over|at least|:|=)?\s*(0?\.\d+|1\.0*)\b',
+                        re.IGNORECASE)
+_QUOTED_RULE = re.compile(r'''\brule\s*[:=]?\s*(['"`])(.+?)\1''', re.IGNORECASE)
+_ELEMENT_LIST = re.compile(r'\b(?:elements?|containing|contains?|with)\s*[:=]?\s*'
+                           r'([A-Z][a-z]?\b(?:\s*(?:,|\bor\b)\s*[A-Z][a-z]?\b)*)(\s+and\s+[A-Z][a-z]?\b)?')
+# Wording that, left over once the recognized parts of a request are taken out, would be
+# silently dropped: negations, constraints, numbers and rule verbs
+_UNCONSUMED = re.compile(
+    r"\b(?:not|no|none|nor|neither|never|without|exclud\w*|except\w*|other\s+than|besides|only|all|both|"
+    r"match\w*|rules?|filter\w*|where|similar|like|ensemble|oxides?|\w*toxic|binary|ternary|quaternary|"
+    r"ratio|fraction|percent|stoichiometr\w*|less|more|fewer|greater|between|at\s+(?:most|least))\b"
+    r"|n't\b|\d|[<>=%!&|]",
+    re.IGNORECASE)
+_SYMBOL = re.compile(r'\b[A-Z][a-z]?\b')
+
+class PlanStep:
+    """One tool call of a plan."""
+
+    def __init__(self, tool: str, argument: str):
+        """
+        Initialize the step.
+
+        Args:
+            tool: MaterialTools method name
+            argument: Tool input string
+        """
+        self.tool = tool
+        self.argument = argument
+
+    def __repr__(self) -> str:
+        return f"PlanStep({self.tool!r}, {self.argument!r})"
+
+class QueryPlanner:
+    """
+    Recognizes the read -> predict -> match -> select -> save requests the agent would
+    otherwise work out step by step, either written in the compact DSL::
+
+        read data/test.csv -> predict model/catboost_model.cbm -> match Ce & !Pb -> top 50 -> save out.csv
+
+    or as a plain request that names the data file, model file, elements and output file.
+    Anything else returns no plan and is left to the agent.
+    """
+
+    def plan(self, query: str) -> Optional[List[PlanStep]]:
+        """
+        Build a plan for a query.
+
+        Args:
+            query: User query
+
+        Returns:
+            List of steps, or None if the query needs the agent
+        """
+        query = query.strip()
+        if not query:
+            return None
+        return self._plan_dsl(query) or self._plan_request(query)
+
+    def _plan_dsl(self, query: str) -> Optional[List[PlanStep]]:
+        """Parse a query written in the step DSL."""
+        segments = [segment for segment in DSL_SEPARATOR.split(query) if segment]
+        steps = []
+        for segment in segments:
+            verb, _, argument = segment.partition(' ')
+            tool = DSL_VERBS.get(verb.lower())
+            if tool is None or not argument.strip():
+                return None
+            steps.append(PlanStep(tool, argument.strip()))
+        # A lone step only counts as DSL when it cannot be ordinary prose
+        if len(steps) == 1 and not (steps[0].tool == 'screen' and '=' in steps[0].argument):
+            return None
+        return steps
+
+    def _plan_request(self, query: str) -> Optional[List[PlanStep]]:
+        """
+        Extract a canonical screening request from plain text.
+
+        Every part of the request that changes the result must be recognized; a request
+        with more than one input file, a negation, a constraint or an element the
+        patterns did not take up returns None rather than a plan that ignores it.
+        """
+        if '?' in query:
+            return None
+
+        save_match = _SAVE_PATH.search(query)
+        save_path = save_match.group(1) if save_match else None
+        read_matches = [match for match in _READ_PATH.finditer(query) if match.group(1) != save_path]
+        model_matches = list(_MODEL_PATH.finditer(query))
+        model_paths = list(dict.fromkeys(match.group(1) for match in model_matches))
+        rule, rule_match = self._extract_rule(query)
+        if rule is False:
+            return None
+        top_match = _TOP_K.search(query)
+        threshold_match = _THRESHOLD.search(query)
+
+        if len({match.group(1) for match in read_matches}) != 1 or save_path is None:
+            return None
+        if not model_paths and rule is None:
+            return None
+        if (top_match or threshold_match) and not model_paths:
+            return None
+        if rule is None and not (top_match or threshold_match):
+            # Nothing would pick the rows save_result writes
+            return None
+        consumed = [save_match, rule_match, top_match, threshold_match] + read_matches + model_matches
+        if self._has_unconsumed(query, [match.span() for match in consumed if match is not None]):
+            return None
+        read_path = read_matches[0].group(1)
+
+        steps = [PlanStep('read_data', read_path)]
+        if len(model_paths) > 1:
+            steps.append(PlanStep('ensemble_predict', ','.join(model_paths)))
+        elif model_paths:
+            steps.append(PlanStep('model_predict', model_paths[0]))
+        if rule is not None:
+            steps.append(PlanStep('rule_match', rule))
+        if top_match or threshold_match:
+            selection = []
+            if top_match:
+                selection.append(f"k={top_match.group(1) or top_match.group(2)}")
+            if threshold_match:
+                selection.append(f"threshold={threshold_match.group(1)}")
+            steps.append(PlanStep('select_top', '; '.join(selection)))
+        steps.append(PlanStep('save_result', save_path))
+        return steps
+
+    @staticmethod
+    def _has_unconsumed(query: str, spans: List[Tuple[int, int]]) -> bool:
+        """
+        Check whether a request says more than its recognized parts.
+
+        Args:
+            query: User query
+            spans: Character ranges of the recognized parts
+
+        Returns:
+            True if the rest of the query has a negation, constraint wording, a number or an
+            element symbol ('I' is taken as the pronoun)
+        """
+        rest = list(query)
+        for start, end in spans:
+            rest[start:end] = ' ' * (end - start)
+        rest = ''.join(rest)
+        if _UNCONSUMED.search(rest):
+            return True
+        return any(symbol in ELEMENT_INDEX and symbol != 'I' for symbol in _SYMBOL.findall(rest))
+
+    @staticmethod
+    def _extract_rule(query: str) -> Tuple[Union[str, None, bool], Optional[re.Match]]:
+        """
+        Find the element rule of a request.
+
+        Returns:
+            Tuple of (rule, match of the rule text). The rule is a rule string, None if the
+            request names no elements, or False if the element list is ambiguous (e.g.
+            'Fe and Co' could mean either or both)
+        """
+        quoted = _QUOTED_RULE.search(query)
+        if quoted:
+            try:
+                compile_rule(quoted.group(2))
+            except ValueError:
+                return False, quoted
+            return quoted.group(2), quoted
+
+        match = _ELEMENT_LIST.search(query)
+        if match is None:
+            return None, None
+        if match.group(2):
+            return False, match
+        symbols = [symbol for symbol in re.split(r'\s*(?:,|\bor\b)\s*', match.group(1)) if symbol]
+        if not all(symbol in ELEMENT_INDEX for symbol in symbols):
+            return False, match
+        return ','.join(symbols), match
@@ -0,0 +1,177 @@
+"""
+Boolean element rules evaluated against packed element bitmasks.
+"""
+import re
+import numpy as np
+from typing import Callable, List, Optional, Sequence
+
+from src.data.elements import ELEMENT_INDEX
+
+# Element symbol, set function name, operator/punctuation
+_TOKEN_PATTERN = re.compile(r'\s*(?:([A-Z][a-z]?)|(any|all|none|only)\b|([&|,!()]))')
+_SET_FUNCTIONS = ('any', 'all', 'none', 'only')
+
+MaskFunction = Callable[[np.ndarray], np.ndarray]
+
+def element_bits(symbols: Sequence[str]) -> np.ndarray:
+    """
+    Pack element symbols into a two-word uint64 bitmask.
+
+    Args:
+        symbols: Element symbols
+
+    Returns:
+        Array of shape (2,) with bit (Z - 1) set for every element
+
+    Raises:
+        ValueError: If a symbol is not a known element
+    """
+    bits = np.zeros(2, dtype=np.uint64)
+    for symbol in symbols:
+        index = ELEMENT_INDEX.get(symbol)
+        if index is None:
+            raise ValueError(f"Unknown element symbol: {symbol}")
+        bits[index // 64] |= np.uint64(1) << np.uint64(index % 64)
+    return bits
+
+def _any_of(bits: np.ndarray) -> MaskFunction:
+    return lambda masks: ((masks[:, 0] & bits[0]) | (masks[:, 1] & bits[1])) != 0
+
+def _all_of(bits: np.ndarray) -> MaskFunction:
+    return lambda masks: ((masks[:, 0] & bits[0]) == bits[0]) & ((masks[:, 1] & bits[1]) == bits[1])
+
+def _none_of(bits: np.ndarray) -> MaskFunction:
+    return lambda masks: ((masks[:, 0] & bits[0]) | (masks[:, 1] & bits[1])) == 0
+
+def _only(bits: np.ndarray) -> MaskFunction:
+    return lambda masks: (masks[:, 0] == bits[0]) & (masks[:, 1] == bits[1])
+
+class ElementRule:
+    """
+    Compiled element rule.
+
+    Grammar (loosest binding first)::
+
+        expr   := term (('|' | ',') term)*
+        term   := factor ('&' factor)*
+        factor := '!' factor | '(' expr ')' | SYMBOL | SETFN '(' SYMBOL (',' SYMBOL)* ')'
+        SETFN  := any | all | none | only
+
+    A comma at the top level means "or", so the original 'Fe,Co,Ni' form still
+    matches materials containing any of the listed elements. Examples:
+    'Ce & !Pb', 'all(Ce, O) & none(Pb, Cd, Hg)', 'only(Ce, O)'.
+    """
+
+    def __init__(self, expression: str):
+        """
+        Compile a rule expression.
+
+        Args:
+            expression: Rule string
+
+        Raises:
+            ValueError: If the expression is malformed or names unknown elements
+        """
+        self.expression = expression
+        self._tokens = self._tokenize(expression)
+        self._position = 0
+        self._evaluate = self._parse_expr()
+        if self._position != len(self._tokens):
+            raise ValueError(f"Unexpected '{self._tokens[self._position]}' in rule: {expression}")
+
+    @staticmethod
+    def _tokenize(expression: str) -> List[str]:
+        tokens = []
+        position = 0
+        expression = expression.rstrip()
+        while position < len(expression):
+            match = _TOKEN_PATTERN.match(expression, position)
+            if match is None or match.end() == position:
+                raise ValueError(f"Invalid rule syntax near '{expression[position:]}'")
+            tokens.append(next(group for group in match.groups() if group is not None))
+            position = match.end()
+        if not tokens:
+            raise ValueError("Rule is empty")
+        return tokens
+
+    def _peek(self) -> str:
+        return self._tokens[self._position] if self._position < len(self._tokens) else ''
+
+    def _take(self, expected: Optional[str] = None) -> str:
+        token = self._peek()
+        if not token or (expected is not None and token != expected):
+            raise ValueError(f"Expected '{expected}' in rule: {self.expression}")
+        self._position += 1
+        return token
+
+    def _take_symbol(self) -> str:
+        token = self._peek()
+        if token not in ELEMENT_INDEX:
+            raise ValueError(f"Expected an element symbol but found '{token}' in rule: {self.expression}")
+        self._position += 1
+        return token
+
+    def _parse_expr(self) -> MaskFunction:
+        terms = [self._parse_term()]
+        while self._peek() in ('|', ','):
+            self._take()
+            terms.append(self._parse_term())
+        if len(terms) == 1:
+            return terms[0]
+        return lambda masks: np.logical_or.reduce([term(masks) for term in terms])
+
+    def _parse_term(self) -> MaskFunction:
+        factors = [self._parse_factor()]
+        while self._peek() == '&':
+            self._take()
+            factors.append(self._parse_factor())
+        if len(factors) == 1:
+            return factors[0]
+        return lambda masks: np.logical_and.reduce([factor(masks) for factor in factors])
+
+    def _parse_factor(self) -> MaskFunction:
+        token = self._peek()
+        if token == '!':
+            self._take()
+            inner = self._parse_factor()
+            return lambda masks: ~inner(masks)
+        if token == '(':
+            self._take()
+            inner = self._parse_expr()
+            self._take(')')
+            return inner
+        if token in _SET_FUNCTIONS:
+            self._take()
+            self._take('(')
+            symbols = [self._take_symbol()]
+            while self._peek() == ',':
+                self._take()
+                symbols.append(self._take_symbol())
+            self._take(')')
+            bits = element_bits(symbols)
+            return {'any': _any_of, 'all': _all_of, 'none': _none_of, 'only': _only}[token](bits)
+        return _any_of(element_bits([self._take_symbol()]))
+
+    def evaluate(self, element_masks: np.ndarray) -> np.ndarray:
+        """
+        Evaluate the rule for every material.
+
+        Args:
+            element_masks: uint64 array of shape (n_materials, 2) from CompositionArrays.element_masks
+
+        Returns:
+            Boolean mask of matching materials
+        """
+        return np.asarray(self._evaluate(element_masks), dtype=bool)
+
+def compile_rule(expression: str) -> ElementRule:
+    """
+    Compile a rule string after stripping quotes, backticks and stray commas an agent may add.
+
+    Args:
+        expression: Rule string
+
+    Returns:
+        Compiled ElementRule
+    """
+    return ElementRule(expression.strip().strip('`\'"').strip(' ,'))
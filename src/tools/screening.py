@@ -0,0 +1,275 @@
+"""
+Chunked streaming screening pipeline with bounded memory.
+"""
+import time
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.data.composition import CompositionArrays, parse_compositions
+from src.data.prediction_store import PredictionManifest
+from src.data.io import TableWriter, iter_table_chunks
+from src.data.featurizer import MagpieFeaturizer
+from src.data.feature_cache import get_feature_cache
+from src.models.registry import get_model
+from src.tools.constraints import compile_constraints
+from src.tools.rules import compile_rule
+from src.tools.selection import TopKAccumulator
+from src.utils.logger import setup_logger
+from config.settings import SCREENING_CONFIG
+
+logger = setup_logger("material_analysis.tools.screening")
+
+# Rough per-row working set: float64 features, their DataFrame and CatBoost's float32 copy,
+# plus parsed composition arrays and the raw input columns
+_BYTES_PER_FEATURE = 8 + 8 + 4
+_BYTES_PER_ROW_OVERHEAD = 512
+# Remembered composition: hash, prediction and whether the current run has seen it
+_BYTES_PER_MEMO_ENTRY = 8 + 8 + 1
+
+class ScreeningPipeline:
+    """Read, featurize, predict, match and write a screening file one chunk at a time."""
+
+    def __init__(self,
+                 model_path: str,
+                 rule: Optional[str] = None,
+                 constraints: Optional[str] = None,
+                 substance_column: str = 'Substance',
+                 top_k: Optional[int] = None,
+                 threshold: Optional[float] = None,
+                 output_columns: Optional[List[str]] = None,
+                 chunk_size: int = SCREENING_CONFIG['CHUNK_SIZE'],
+                 max_memory_mb: float = SCREENING_CONFIG['MAX_MEMORY_MB'],
+                 incremental: bool = SCREENING_CONFIG['INCREMENTAL']):
+        """
+        Initialize the pipeline.
+
+        Args:
+            model_path: Model file path
+            rule: Optional element rule (see ElementRule); without one every row is kept
+            constraints: Optional stoichiometry and score constraints (see StoichiometryFilter)
+            substance_column: Name of the column holding formulas
+            top_k: Keep only the k highest-scoring matches, written sorted at the end
+            threshold: Minimum predicted probability to keep
+            output_columns: Columns to write (None writes all)
+            chunk_size: Upper bound on rows per chunk
+            max_memory_mb: Working memory budget, shared between the chunks and the predictions
+                remembered across chunks (SCREENING_CONFIG['MEMO_MEMORY_FRACTION'])
+            incremental: Reuse the predictions stored by earlier runs over the same file and
+                model version, and store this run's predictions for the next one
+        """
+        self.model_path = model_path
+        self.rule = compile_rule(rule) if rule else None
+        self.constraints = compile_constraints(constraints) if constraints else None
+        self.substance_column = substance_column
+        self.top_k = top_k
+        self.threshold = threshold
+        self.output_columns = output_columns
+        self.featurizer = MagpieFeaturizer(cache=get_feature_cache())
+        memo_mb = max_memory_mb * SCREENING_CONFIG['MEMO_MEMORY_FRACTION']
+        self.chunk_size = self._rows_per_chunk(chunk_size, max_memory_mb - memo_mb)
+        self.memo_capacity = int(memo_mb * 1024 * 1024 // _BYTES_PER_MEMO_ENTRY)
+        self.incremental = incremental
+        self._reset_memo()
+        self.compositions_predicted = 0
+
+    def _rows_per_chunk(self, chunk_size: int, max_memory_mb: float) -> int:
+        """Cap the chunk size so one chunk's working set fits in the memory budget."""
+        row_bytes = len(self.featurizer.feature_labels()) * _BYTES_PER_FEATURE + _BYTES_PER_ROW_OVERHEAD
+        budget_rows = int(max_memory_mb * 1024 * 1024 // row_bytes)
+        return max(1, min(chunk_size, budget_rows))
+
+    def _reset_memo(self, hashes: Optional[np.ndarray] = None, pred: Optional[np.ndarray] = None) -> None:
+        """Start the memo of predictions by sorted composition hash, optionally from stored ones."""
+        self._known_hashes = hashes if hashes is not None else np.empty(0, dtype=np.uint64)
+        self._known_pred = pred if pred is not None else np.empty(0, dtype=np.float64)
+        self._known_seen = np.zeros(len(self._known_hashes), dtype=bool)
+        # False once a composition did not fit; the memo then no longer covers every one seen
+        self._memo_complete = True
+
+    def _remember(self, hashes: np.ndarray, pred: np.ndarray) -> None:
+        """
+        Merge newly predicted compositions into the memo.
+
+        Both sides are sorted, so the merge is linear in the memo size, which memo_capacity
+        bounds. At capacity, stored predictions not seen in this run are dropped first; if the
+        memo is still full, later compositions are no longer remembered.
+
+        Args:
+            hashes: Sorted hashes of compositions not in the memo
+            pred: Predicted probability per hash
+        """
+        if not self._memo_complete:
+            return
+        if len(self._known_hashes) + len(hashes) > self.memo_capacity:
+            seen = self._known_seen
+            self._known_hashes, self._known_pred, self._known_seen = \
+                self._known_hashes[seen], self._known_pred[seen], seen[seen]
+        if len(self._known_hashes) + len(hashes) > self.memo_capacity:
+            logger.warning(f"Only {self.memo_capacity} distinct compositions fit in the memory budget; "
+                           f"later ones are predicted per chunk and this run's predictions are not stored")
+            self._memo_complete = False
+            return
+
+        inserted = np.searchsorted(self._known_hashes, hashes) + np.arange(len(hashes))
+        kept = np.ones(len(self._known_hashes) + len(hashes), dtype=bool)
+        kept[inserted] = False
+        merged = []
+        for existing, new in ((self._known_hashes, hashes), (self._known_pred, pred),
+                              (self._known_seen, np.ones(len(hashes), dtype=bool))):
+            values = np.empty(len(kept), dtype=existing.dtype)
+            values[kept] = existing
+            values[inserted] = new
+            merged.append(values)
+        self._known_hashes, self._known_pred, self._known_seen = merged
+
+    def iter_chunks(self, input_path: str) -> Iterator[pd.DataFrame]:
+        """
+        Stream the input file in chunks.
+
+        Args:
+            input_path: Input CSV, Parquet or Arrow path
+
+        Yields:
+            DataFrames of at most chunk_size rows
+        """
+        yield from iter_table_chunks(input_path, self.chunk_size)
+
+    def _predict_compositions(self, compositions: CompositionArrays) -> np.ndarray:
+        """
+        Predict each distinct composition once, reusing predictions from earlier chunks and runs.
+
+        Args:
+            compositions: Parsed compositions of a chunk
+
+        Returns:
+            Predicted probability per row
+        """
+        hashes = compositions.row_hashes()
+        unique_hashes, first, inverse = np.unique(hashes, return_index=True, return_inverse=True)
+        position = np.searchsorted(self._known_hashes, unique_hashes)
+        known = position < len(self._known_hashes)
+        known[known] = self._known_hashes[position[known]] == unique_hashes[known]
+        self._known_seen[position[known]] = True
+
+        unique_pred = np.empty(len(unique_hashes), dtype=np.float64)
+        unique_pred[known] = self._known_pred[position[known]]
+        new = np.flatnonzero(~known)
+        if len(new):
+            features = pd.DataFrame(
+                self.featurizer.featurize_matrix(compositions.take(first[new]).to_matrix()),
+                columns=self.featurizer.feature_labels()
+            )
+            unique_pred[new] = get_model(self.model_path).predict_proba(features)[:, 1]
+            del features
+            self._remember(unique_hashes[new], unique_pred[new])
+        self.compositions_predicted += len(new)
+        return unique_pred[inverse.reshape(-1)]
+
+    def process_chunk(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """
+        Featurize, predict and match one chunk.
+
+        Repeated compositions, within the chunk or seen in an earlier one, are
+        featurized and predicted only once.
+
+        Args:
+            chunk: Input rows
+
+        Returns:
+            The chunk with 'pred' and 'rule_match' columns, filtered to matching rows
+            that meet the constraints and the threshold
+        """
+        compositions = parse_compositions(chunk[self.substance_column])
+        chunk['pred'] = self._predict_compositions(compositions)
+
+        element_masks = compositions.element_masks() if self.rule or self.constraints else None
+        if self.rule is None:
+            chunk['rule_match'] = compositions.valid
+        else:
+            chunk['rule_match'] = self.rule.evaluate(element_masks) & compositions.valid
+        keep = chunk['rule_match']
+        if self.constraints is not None:
+            keep &= self.constraints.evaluate(compositions, element_masks, chunk['pred'].to_numpy())
+        if self.threshold is not None:
+            keep &= chunk['pred'] >= self.threshold
+        return chunk[keep]
+
+    def run(self, input_path: str, output_path: str) -> Dict[str, Any]:
+        """
+        Screen a file end to end.
+
+        Without top_k, matches are appended to the output as each chunk finishes; with
+        top_k, a running top-k is kept across chunks and written sorted at the end.
+
+        Args:
+            input_path: Input CSV, Parquet or Arrow path
+            output_path: Output path; the format follows the extension
+
+        Returns:
+            Summary with row counts, distinct compositions, chunk count and elapsed seconds;
+            the distinct count and dedup ratio are None when the compositions did not all
+            fit in the memo
+        """
+        start = time.perf_counter()
+        manifest = PredictionManifest.load(input_path, self.model_path) if self.incremental else None
+        if manifest is not None and len(manifest) > self.memo_capacity:
+            logger.warning(f"Not reusing {len(manifest)} stored predictions for {input_path}: "
+                           f"more than fit in the memory budget")
+            self._reset_memo()
+        elif manifest is not None and len(manifest):
+            logger.info(f"Reusing {len(manifest)} stored predictions for {input_path}"
+                        f"{' (file unchanged)' if manifest.unchanged else ''}")
+            self._reset_memo(manifest.hashes, manifest.pred)
+        else:
+            self._reset_memo()
+        self.compositions_predicted = 0
+        rows_read = 0
+        rows_matched = 0
+        rows_written = 0
+        n_chunks = 0
+
+        top = TopKAccumulator(self.top_k) if self.top_k is not None else None
+        # Column layout of the matches, so an output without any still has the right schema
+        no_matches = None
+
+        logger.info(f"Screening {input_path} in chunks of {self.chunk_size} rows")
+        with TableWriter(output_path, columns=self.output_columns) as output:
+            for chunk in self.iter_chunks(input_path):
+                matched = self.process_chunk(chunk)
+                if no_matches is None:
+                    no_matches = matched.iloc[:0]
+                if top is None:
+                    output.write(matched)
+                    rows_written += len(matched)
+                else:
+                    top.add(matched)
+                rows_read += len(chunk)
+                rows_matched += len(matched)
+                n_chunks += 1
+                logger.info(f"Screened chunk {n_chunks}: {rows_read} rows read, {rows_matched} matched")
+            if top is not None and top.result() is not None:
+                output.write(top.result())
+                rows_written = len(top.result())
+            elif top is not None and no_matches is not None:
+                output.write(no_matches)
+
+        rows_distinct = int(self._known_seen.sum()) if self._memo_complete else None
+        if manifest is not None and rows_distinct is not None \
+                and (self.compositions_predicted or len(manifest) != rows_distinct):
+            # Only compositions still in the file are kept, so edited and removed rows drop out
+            manifest.replace(self._known_hashes[self._known_seen], self._known_pred[self._known_seen])
+            manifest.save()
+        self._reset_memo()
+
+        return {
+            'rows_read': rows_read,
+            'rows_matched': rows_matched,
+            'rows_written': rows_written,
+            'rows_distinct': rows_distinct,
+            'compositions_predicted': self.compositions_predicted,
+            'dedup_ratio': round(rows_read / max(rows_distinct, 1), 3) if rows_distinct is not None else None,
+            'chunks': n_chunks,
+            'chunk_size': self.chunk_size,
+            'seconds': time.perf_counter() - start,
+        }
@@ -0,0 +1,84 @@
+"""
+Top-k candidate selection without sorting full prediction frames.
+"""
+import numpy as np
+import pandas as pd
+from typing import Optional
+
+def top_k_indices(scores: np.ndarray, k: Optional[int] = None, threshold: Optional[float] = None) -> np.ndarray:
+    """
+    Select the positions of the highest scores, best first.
+
+    Only the selected positions are sorted; the rest are split off with argpartition.
+
+    Args:
+        scores: 1-D array of scores
+        k: Number of positions to keep (None keeps all that pass the threshold)
+        threshold: Minimum score to keep
+
+    Returns:
+        Positions into scores ordered by descending score
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    candidates = np.arange(len(scores)) if threshold is None else np.flatnonzero(scores >= threshold)
+    if k is not None and len(candidates) > k:
+        if k <= 0:
+            return candidates[:0]
+        candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+def select_top(frame: pd.DataFrame, k: Optional[int] = None, threshold: Optional[float] = None,
+               column: str = 'pred') -> pd.DataFrame:
+    """
+    Select the top rows of a frame by score.
+
+    Args:
+        frame: DataFrame holding a score column
+        k: Number of rows to keep (None keeps all that pass the threshold)
+        threshold: Minimum score to keep
+        column: Score column name
+
+    Returns:
+        Selected rows ordered by descending score
+    """
+    return frame.iloc[top_k_indices(frame[column].to_numpy(), k, threshold)]
+
+class TopKAccumulator:
+    """Running top-k over a stream of chunks; holds at most k rows between chunks."""
+
+    def __init__(self, k: Optional[int], threshold: Optional[float] = None, column: str = 'pred'):
+        """
+        Initialize the accumulator.
+
+        Args:
+            k: Number of rows to keep (None keeps every row above the threshold)
+            threshold: Minimum score to keep
+            column: Score column name
+        """
+        self.k = k
+        self.threshold = threshold
+        self.column = column
+        self.rows_seen = 0
+        self._best = None
+
+    def add(self, chunk: pd.DataFrame) -> None:
+        """
+        Merge a chunk into the running selection.
+
+        Args:
+            chunk: DataFrame holding the score column
+        """
+        self.rows_seen += len(chunk)
+        selected = select_top(chunk, self.k, self.threshold, self.column)
+        if self._best is not None:
+            selected = select_top(pd.concat([self._best, selected]), self.k, column=self.column)
+        self._best = selected
+
+    def result(self) -> Optional[pd.DataFrame]:
+        """
+        Get the selection so far.
+
+        Returns:
+            Selected rows ordered by descending score, or None if nothing was added
+        """
+        return self._best
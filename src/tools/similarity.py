@@ -0,0 +1,268 @@
+"""
+Nearest-neighbor search over standardized, optionally PCA-reduced magpie feature vectors.
+"""
+import os
+import json
+import warnings
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from src.data.featurizer import FEATURIZER_VERSION
+from src.data.prediction_store import file_fingerprint
+from src.utils.helpers import atomic_output
+from src.utils.logger import setup_logger
+from config.settings import DATASET_STORE_CONFIG, SIMILARITY_CONFIG
+
+logger = setup_logger("material_analysis.tools.similarity")
+
+INDEX_VERSION = 1
+
+def index_path(dataset_path: str) -> str:
+    """
+    Get the similarity index path belonging to a dataset file.
+
+    Args:
+        dataset_path: Screening input file
+
+    Returns:
+        Path of the .similarity.npz file next to it
+    """
+    return f"{os.path.splitext(dataset_path)[0]}.similarity.npz"
+
+class SimilarityIndex:
+    """
+    Euclidean k-nearest-neighbor index over feature rows.
+
+    Every feature is standardized to zero mean and unit variance, so properties on large
+    scales (melting points, atomic numbers) do not dominate the distance. Missing values
+    become the column mean. Rows without any features (unparsed formulas) are left out.
+    """
+
+    def __init__(self, rows: np.ndarray, vectors: np.ndarray, mean: np.ndarray, scale: np.ndarray,
+                 components: Optional[np.ndarray] = None, metadata: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the index.
+
+        Args:
+            rows: Feature row of each indexed vector
+            vectors: float32 indexed vectors, shape (n_rows, n_dimensions)
+            mean: Feature means used for standardization
+            scale: Feature standard deviations (1 for constant features)
+            components: PCA projection, shape (n_features, n_dimensions); None keeps all features
+            metadata: Extra information stored with the index
+        """
+        self.rows = rows
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.mean = mean
+        self.scale = scale
+        self.components = components
+        self.metadata = metadata or {}
+        self._norms = np.einsum('ij,ij->i', self.vectors, self.vectors)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def dimensions(self) -> int:
+        """Dimensions of the indexed vectors."""
+        return self.vectors.shape[1]
+
+    @classmethod
+    def build(cls, features: np.ndarray, n_components: Optional[int] = SIMILARITY_CONFIG['N_COMPONENTS'],
+              block_rows: int = SIMILARITY_CONFIG['BLOCK_ROWS'],
+              metadata: Optional[Dict[str, Any]] = None) -> 'SimilarityIndex':
+        """
+        Build the index from a feature matrix.
+
+        Args:
+            features: Feature matrix, shape (n_rows, n_features)
+            n_components: Principal components to keep (None or at least n_features keeps every feature)
+            block_rows: Rows standardized and projected at once
+            metadata: Extra information stored with the index
+
+        Returns:
+            SimilarityIndex instance
+        """
+        rows = np.flatnonzero(~np.isnan(features).all(axis=1))
+        # Left-out rows are all NaN, so the NaN-aware statistics already ignore them
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            mean = np.nan_to_num(np.nanmean(features, axis=0, dtype=np.float64))
+            scale = np.nan_to_num(np.nanstd(features, axis=0, dtype=np.float64))
+        scale = np.where(scale > 0, scale, 1.0)
+        index = cls(rows, np.empty((0, features.shape[1]), dtype=np.float32), mean, scale, metadata=metadata)
+
+        if n_components is not None and n_components < features.shape[1] and len(rows):
+            # Covariance accumulated block by block, so the standardized matrix is never held in float64
+            covariance = np.zeros((features.shape[1], features.shape[1]))
+            for start in range(0, len(rows), block_rows):
+                block = index._standardize(features[rows[start:start + block_rows]]).astype(np.float64)
+                covariance += block.T @ block
+            eigenvalues, eigenvectors = np.linalg.eigh(covariance / len(rows))
+            order = np.argsort(eigenvalues)[::-1][:n_components]
+            index.components = np.ascontiguousarray(eigenvectors[:, order], dtype=np.float32)
+            explained = eigenvalues[order].sum() / max(eigenvalues.sum(), 1e-12)
+            index.metadata['explained_variance'] = round(float(explained), 4)
+
+        vectors = np.empty((len(rows), index.components.shape[1] if index.components is not None
+                            else features.shape[1]), dtype=np.float32)
+        for start in range(0, len(rows), block_rows):
+            vectors[start:start + block_rows] = index.transform(features[rows[start:start + block_rows]])
+        return cls(rows, vectors, mean, scale, index.components, index.metadata)
+
+    def _standardize(self, features: np.ndarray) -> np.ndarray:
+        """Standardize feature rows to float32, replacing missing values with the mean."""
+        standardized = ((features - self.mean) / self.scale).astype(np.float32)
+        return np.nan_to_num(standardized, nan=0.0, copy=False)
+
+    def transform(self, features: np.ndarray) -> np.ndarray:
+        """
+        Map feature rows into the index space.
+
+        Args:
+            features: Feature matrix, shape (n_rows, n_features)
+
+        Returns:
+            float32 vectors, shape (n_rows, n_dimensions)
+        """
+        standardized = self._standardize(np.asarray(features))
+        return standardized @ self.components if self.components is not None else standardized
+
+    def search(self, features: np.ndarray, k: int,
+               block_rows: int = SIMILARITY_CONFIG['BLOCK_ROWS']) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the nearest indexed rows of a batch of queries.
+
+        Squared distances are computed as |q|^2 - 2 q.x + |x|^2 one block of indexed rows
+        at a time, keeping only a running top k per query between blocks.
+
+        Args:
+            features: Query feature rows, shape (n_queries, n_features)
+            k: Neighbors per query
+            block_rows: Indexed rows compared at once, bounding the (queries x rows) temporaries
+
+        Returns:
+            Tuple of (feature rows, distances), both shape (n_queries, min(k, len(index))),
+            nearest first
+        """
+        queries = self.transform(features)
+        k = min(k, len(self))
+        query_norms = np.einsum('ij,ij->i', queries, queries)[:, None]
+        best_distance = np.empty((len(queries), 0), dtype=np.float32)
+        best_position = np.empty((len(queries), 0), dtype=np.intp)
+        for start in range(0, len(self), block_rows):
+            block = self.vectors[start:start + block_rows]
+            distance = query_norms - 2 * (queries @ block.T) + self._norms[start:start + block_rows]
+            if distance.shape[1] > k:
+                position = np.argpartition(distance, k - 1, axis=1)[:, :k]
+                distance = np.take_along_axis(distance, position, axis=1)
+                position += start
+            else:
+                position = np.broadcast_to(np.arange(start, start + len(block)), distance.shape)
+            # Merge the block's top k with the running top k
+            distance = np.concatenate([best_distance, distance], axis=1)
+            position = np.concatenate([best_position, position], axis=1)
+            if distance.shape[1] > k:
+                keep = np.argpartition(distance, k - 1, axis=1)[:, :k]
+                distance = np.take_along_axis(distance, keep, axis=1)
+                position = np.take_along_axis(position, keep, axis=1)
+            best_distance, best_position = distance, position
+
+        # The expanded form loses precision for nearby points; recompute the k survivors directly
+        best_distance = np.linalg.norm(self.vectors[best_position] - queries[:, None, :], axis=2)
+        order = np.argsort(best_distance, axis=1, kind='stable')
+        best_distance = np.take_along_axis(best_distance, order, axis=1)
+        best_position = np.take_along_axis(best_position, order, axis=1)
+        return self.rows[best_position], best_distance
+
+    def save(self, path: str) -> None:
+        """
+        Write the index as an .npz file.
+
+        Args:
+            path: Output path
+        """
+        arrays = {'rows': self.rows, 'vectors': self.vectors, 'mean': self.mean, 'scale': self.scale,
+                  'metadata': np.array(json.dumps(dict(self.metadata, version=INDEX_VERSION)))}
+        if self.components is not None:
+            arrays['components'] = self.components
+        with atomic_output(path) as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> 'SimilarityIndex':
+        """
+        Read an index written by save.
+
+        Args:
+            path: Index path
+
+        Returns:
+            SimilarityIndex instance
+        """
+        with np.load(path, allow_pickle=False) as arrays:
+            metadata = json.loads(str(arrays['metadata']))
+            if metadata.pop('version', None) != INDEX_VERSION:
+                raise ValueError("Unsupported similarity index version")
+            components = arrays['components'] if 'components' in arrays.files else None
+            return cls(arrays['rows'], arrays['vectors'], arrays['mean'], arrays['scale'], components, metadata)
+
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+def get_similarity_index(dataset: Any, n_components: Optional[int] = SIMILARITY_CONFIG['N_COMPONENTS']) -> SimilarityIndex:
+    """
+    Get the index of a loaded dataset: from memory, from the file next to the dataset, or built.
+
+    A stored index is used only when it was built from the same file contents (size and
+    modification time), featurizer version and number of components.
+
+    Args:
+        dataset: LoadedDataset
+        n_components: Principal components to keep (None keeps every feature)
+
+    Returns:
+        Shared SimilarityIndex; callers must not modify it
+    """
+    expected = {
+        'fingerprint': file_fingerprint(dataset.path),
+        'featurizer': FEATURIZER_VERSION,
+        'n_components': n_components,
+        'n_distinct': dataset.n_distinct,
+    }
+    key = (os.path.normcase(os.path.abspath(dataset.path)), json.dumps(expected, sort_keys=True))
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+            return index
+
+    path = index_path(dataset.path)
+    index = None
+    if os.path.exists(path):
+        try:
+            index = SimilarityIndex.load(path)
+            if any(index.metadata.get(name) != value for name, value in expected.items()):
+                logger.info(f"Similarity index {path} is out of date, rebuilding")
+                index = None
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable similarity index {path}: {str(e)}")
+            index = None
+    if index is None:
+        logger.info(f"Building similarity index over {dataset.n_distinct} compositions")
+        index = SimilarityIndex.build(dataset.features, n_components, metadata=dict(expected))
+        if SIMILARITY_CONFIG['PERSIST']:
+            try:
+                index.save(path)
+                logger.info(f"Saved similarity index to {path}")
+            except OSError as e:
+                logger.warning(f"Could not save similarity index next to the dataset: {str(e)}")
+
+    with _indexes_lock:
+        _indexes[key] = index
+        _indexes.move_to_end(key)
+        while len(_indexes) > DATASET_STORE_CONFIG['MAX_DATASETS']:
+            _indexes.popitem(last=False)
+    return index
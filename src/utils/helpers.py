@@ -2,8 +2,17 @@
 Helper utility functions for material analysis framework.
 """
 import os
-from typing import Any, Optional
-from pymatgen.core.composition import Composition
+import json
+import tempfile
+from contextlib import contextmanager
+from typing import IO, TYPE_CHECKING, Any, Dict, Iterator, Optional
+
+if TYPE_CHECKING:
+    from pymatgen.core.composition import Composition
+
+# mkstemp creates files readable by the owner only; give outputs the usual umask permissions
+_UMASK = os.umask(0)
+os.umask(_UMASK)
 
 def sanitize_path(path: str) -> str:
     """
@@ -17,7 +26,37 @@ def sanitize_path(path: str) -> str:
     """
     return path.strip().replace('\n', '').replace('`', '')
 
-def safe_composition_conversion(x: Any) -> Optional[Composition]:
+def parse_tool_arguments(text: str) -> Dict[str, str]:
+    """
+    Parse a multi-parameter tool input into a dictionary.
+    
+    Accepts either a JSON object or 'key=value' pairs separated by semicolons,
+    e.g. 'file_path=./data/test.csv; rule=Fe,Co'.
+    
+    Args:
+        text: Raw tool input
+        
+    Returns:
+        Dictionary of parameter names to string values
+        
+    Raises:
+        ValueError: If a pair has no '=' separator
+    """
+    text = text.strip().strip('`')
+    if text.startswith('{'):
+        return {key: str(value) for key, value in json.loads(text).items()}
+    
+    arguments = {}
+    for pair in text.split(';'):
+        if not pair.strip():
+            continue
+        if '=' not in pair:
+            raise ValueError(f"Expected key=value but got '{pair.strip()}'")
+        key, value = pair.split('=', 1)
+        arguments[key.strip()] = value.strip().strip('\'"')
+    return arguments
+
+def safe_composition_conversion(x: Any) -> Optional['Composition']:
     """
     Safely convert a string to a Composition object.
     
@@ -29,6 +68,8 @@ def safe_composition_conversion(x: Any) -> Optional[Composition]:
     """
     if not isinstance(x, str):
         return None
+    # pymatgen takes about a second to import, so only load it when a conversion is needed
+    from pymatgen.core.composition import Composition
     try:
         return Composition(x)
     except Exception:
@@ -42,4 +83,49 @@ def ensure_directory_exists(file_path: str) -> None:
         file_path: Path to the file
     """
     directory = os.path.dirname(os.path.abspath(file_path))
-    os.makedirs(directory, exist_ok=True) 
\ No newline at end of file
+    os.makedirs(directory, exist_ok=True) 
+
+def temporary_path(path: str) -> str:
+    """
+    Create an empty, uniquely named temporary file in the directory of a path.
+    
+    The file has the permissions a newly created file would get, so it can be moved over
+    path with os.replace once written.
+    
+    Args:
+        path: Final file path
+        
+    Returns:
+        Path of the temporary file
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix='.tmp', dir=directory)
+    os.close(fd)
+    os.chmod(tmp_path, 0o666 & ~_UMASK)
+    return tmp_path
+
+@contextmanager
+def atomic_output(path: str, mode: str = 'wb', encoding: Optional[str] = None) -> Iterator[IO]:
+    """
+    Write a file through a uniquely named temporary file in the same directory.
+    
+    The temporary file replaces path only when the block completes, so readers never see a
+    partial file and concurrent writers (threads or processes) never share a temporary file.
+    
+    Args:
+        path: Final file path
+        mode: File mode of the temporary file
+        encoding: Text encoding for text modes
+        
+    Yields:
+        Open temporary file
+    """
+    tmp_path = temporary_path(path)
+    try:
+        with open(tmp_path, mode, encoding=encoding) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -1,12 +1,50 @@
 """
 Logging configuration for material analysis framework.
 """
+import queue
+import atexit
 import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener
 from config.settings import DEFAULT_LOG_FILE
 
+_queue_handler = None
+_queue_lock = threading.Lock()
+
+def _get_queue_handler():
+    """
+    Get the shared handler that hands records to a background writer thread.
+    
+    Console and file output happen on the listener thread, so logging calls on the
+    request and tool paths never wait for disk or terminal I/O.
+    
+    Returns:
+        Process-wide QueueHandler
+    """
+    global _queue_handler
+    with _queue_lock:
+        if _queue_handler is None:
+            # Create formatters
+            formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+            
+            # Create handlers
+            console_handler = logging.StreamHandler()
+            console_handler.setFormatter(formatter)
+            
+            file_handler = logging.FileHandler(DEFAULT_LOG_FILE)
+            file_handler.setFormatter(formatter)
+            
+            log_queue = queue.SimpleQueue()
+            listener = QueueListener(log_queue, console_handler, file_handler, respect_handler_level=True)
+            listener.start()
+            # Flush whatever is still queued when the interpreter exits
+            atexit.register(listener.stop)
+            _queue_handler = QueueHandler(log_queue)
+        return _queue_handler
+
 def setup_logger(name="material_analysis"):
     """
-    Configure and return a logger with both console and file handlers.
+    Configure and return a logger whose records are written by a background thread.
     
     Args:
         name: Logger name
@@ -19,19 +57,6 @@ def setup_logger(name="material_analysis"):
     # Only set up handlers if they don't exist already
     if not logger.handlers:
         logger.setLevel(logging.INFO)
-        
-        # Create formatters
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        
-        # Create handlers
-        console_handler = logging.StreamHandler()
-        console_handler.setFormatter(formatter)
-        
-        file_handler = logging.FileHandler(DEFAULT_LOG_FILE)
-        file_handler.setFormatter(formatter)
-        
-        # Add handlers to logger
-        logger.addHandler(console_handler)
-        logger.addHandler(file_handler)
+        logger.addHandler(_get_queue_handler())
     
-    return logger 
\ No newline at end of file
+    return logger
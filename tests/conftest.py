@@ -0,0 +1,17 @@
+"""
+Shared pytest setup: make the repository root importable and keep caches out of the checkout.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture(scope='session', autouse=True)
+def isolated_cwd(tmp_path_factory):
+    """Run the session in a scratch directory, since the caches live under ./cache."""
+    previous = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp('cwd'))
+    yield
+    os.chdir(previous)
@@ -0,0 +1,77 @@
+"""
+Tests for stoichiometry and score constraints.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.composition import parse_compositions
+from src.tools.constraints import compile_constraints
+from src.tools.material_tools import MaterialTools
+
+FORMULAS = ['Ce0.3Zr0.7O2', 'CeO2', 'Fe2O3', 'CePbO3', 'CeOF', 'Ce', 'LaCeFeO3', 'not a formula']
+
+@pytest.fixture(scope='module')
+def compositions():
+    return parse_compositions(FORMULAS)
+
+def matching(expression, compositions, pred=None):
+    keep = compile_constraints(expression).evaluate(compositions, compositions.element_masks(), pred)
+    return [formula for formula, kept in zip(FORMULAS, keep) if kept]
+
+@pytest.mark.parametrize('expression, expected', [
+    ('elements <= 2', ['CeO2', 'Fe2O3', 'Ce']),
+    ('2 < elements', ['Ce0.3Zr0.7O2', 'CePbO3', 'CeOF', 'LaCeFeO3']),
+    ('O > 0', ['Ce0.3Zr0.7O2', 'CeO2', 'Fe2O3', 'CePbO3', 'CeOF', 'LaCeFeO3']),
+    ('0.3 <= Ce <= 0.4', ['CeO2', 'CeOF']),
+    ('oxide', ['Ce0.3Zr0.7O2', 'CeO2', 'Fe2O3', 'CePbO3', 'LaCeFeO3']),
+    ('nontoxic & Ce > 0', ['Ce0.3Zr0.7O2', 'CeO2', 'CeOF', 'Ce', 'LaCeFeO3']),
+    ('oxide; non-toxic and elements == 3', ['Ce0.3Zr0.7O2']),
+])
+def test_constraints(compositions, expression, expected):
+    assert matching(expression, compositions) == expected
+
+@pytest.mark.parametrize('expression', ['0.1 <= Ce', 'Ce == 0.1', 'Ce <= 0.1', '0.1 <= Ce <= 0.1'])
+def test_fraction_bounds_tolerate_rounding(compositions, expression):
+    # Ce0.3Zr0.7O2 stores its Ce fraction as 0.09999999999999999
+    assert 'Ce0.3Zr0.7O2' in matching(expression, compositions)
+
+@pytest.mark.parametrize('expression', ['Ce < 0.1', 'Ce > 0.1', 'Ce != 0.1'])
+def test_strict_fraction_bounds_exclude_the_boundary(compositions, expression):
+    assert 'Ce0.3Zr0.7O2' not in matching(expression, compositions)
+
+def test_element_symbols_are_case_insensitive(compositions):
+    assert matching('ce >= 0.3', compositions) == matching('CE >= 0.3', compositions) == matching('Ce >= 0.3', compositions)
+
+def test_unparsed_formulas_never_match(compositions):
+    assert 'not a formula' not in matching('elements >= 0', compositions)
+
+def test_prediction_bounds(compositions):
+    pred = np.linspace(0, 1, len(FORMULAS))
+    constraint = compile_constraints('pred >= 0.5')
+    assert constraint.needs_prediction
+    # The unparsed last row is excluded even though its prediction passes
+    assert matching('pred >= 0.5', compositions, pred) == ['CeOF', 'Ce', 'LaCeFeO3']
+
+def test_prediction_bounds_need_a_prediction(compositions):
+    with pytest.raises(ValueError):
+        compile_constraints('pred >= 0.5').evaluate(compositions, compositions.element_masks())
+
+@pytest.mark.parametrize('expression', ['', 'Xx > 0', 'Ce >', '> 0.2', 'elements <= three', 'oxides only please'])
+def test_malformed_constraints_raise(expression):
+    with pytest.raises(ValueError):
+        compile_constraints(expression)
+
+def test_filter_materials_keeps_the_rule_match(tmp_path):
+    path = tmp_path / 'materials.csv'
+    pd.DataFrame({'Substance': FORMULAS}).to_csv(path, index=False)
+    tools = MaterialTools()
+    tools.read_data(str(path))
+    assert 'successfully' in tools.rule_match('Ce')
+    assert 'successfully' in tools.filter_materials('oxide; nontoxic')
+
+    result = tools.rule_match_materials
+    assert result['Substance'].tolist() == ['Ce0.3Zr0.7O2', 'CeO2', 'LaCeFeO3']
+    assert result['rule_match'].all() and result['filter_match'].all()
+    # The rule mask still holds the rule match, not the filtered rows
+    assert tools.rule_mask.sum() == 6
@@ -0,0 +1,75 @@
+"""
+Tests for the query daemon's socket round trip.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from src.services.daemon import DaemonError, QueryDaemon, daemon_available, ping, request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+pytestmark = pytest.mark.skipif(not daemon_available(), reason="Unix sockets are not available")
+
+@pytest.fixture
+def socket_path():
+    # Kept short: Unix socket paths are limited to about 100 bytes
+    with tempfile.TemporaryDirectory(prefix='mad-') as directory:
+        path = os.path.join(directory, 'd.sock')
+        daemon = QueryDaemon(path)
+        thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+        thread.start()
+        for _ in range(200):
+            if ping(path) is not None:
+                break
+            time.sleep(0.05)
+        else:
+            pytest.fail("Daemon did not start")
+        yield path
+        request({'command': 'shutdown'}, path)
+        thread.join(timeout=10)
+        assert not thread.is_alive()
+        assert not os.path.exists(path)
+
+def run_client(query, cwd, socket_path):
+    """Send a query from a separate process working in cwd, as the CLI does."""
+    code = ("import sys; sys.path.insert(0, sys.argv[1]); from src.services.daemon import send_query; "
+            "print(send_query(sys.argv[2], socket_path=sys.argv[3]))")
+    return subprocess.run([sys.executable, '-c', code, ROOT, query, socket_path],
+                          cwd=cwd, capture_output=True, text=True, timeout=120)
+
+def test_ping(socket_path):
+    status = ping(socket_path)
+    assert status['status'] == 'ok'
+    assert status['pid'] == os.getpid()
+    assert status['queries'] == 0
+
+def test_second_daemon_is_refused(socket_path):
+    with pytest.raises(DaemonError):
+        QueryDaemon(socket_path).serve_forever()
+
+def test_query_paths_follow_the_client_directory(socket_path, tmp_path):
+    pd.DataFrame({'Substance': ['CeO2', 'Fe3O4', 'CeZrO4', 'NiO']}).to_csv(tmp_path / 'in.csv', index=False)
+    client = run_client('read in.csv -> match Ce -> save out.csv', str(tmp_path), socket_path)
+    assert client.returncode == 0, client.stderr
+    assert 'successfully' in client.stdout
+
+    saved = pd.read_csv(tmp_path / 'out.csv')
+    assert saved['Substance'].tolist() == ['CeO2', 'CeZrO4']
+    assert not os.path.exists('out.csv')
+    assert ping(socket_path)['queries'] == 1
+
+@pytest.mark.parametrize('cwd', ['relative/dir', '/no/such/directory', 42])
+def test_bad_client_directory_is_rejected(socket_path, cwd):
+    response = request({'command': 'query', 'query': 'read in.csv', 'cwd': cwd}, socket_path)
+    assert response['status'] == 'error'
+    assert 'Client directory' in response['error']
+
+def test_unknown_command(socket_path):
+    assert request({'command': 'reload'}, socket_path)['status'] == 'error'
@@ -0,0 +1,60 @@
+"""
+Tests for composition hashing and per-composition deduplication.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.composition import parse_compositions
+from src.data.dataset_store import load_dataset
+from src.data.featurizer import MagpieFeaturizer
+
+def test_hash_ignores_how_a_formula_is_written():
+    hashes = parse_compositions(['Fe2O3', 'Fe4O6', 'O3Fe2', 'Fe0.4O0.6']).row_hashes()
+    assert len(set(hashes.tolist())) == 1
+
+def test_hash_tells_compositions_apart():
+    hashes = parse_compositions(['Fe2O3', 'FeO', 'Fe3O4', 'CeO2', 'Ce2O3', 'Ce0.5Zr0.5O2', 'Ce0.6Zr0.4O2']).row_hashes()
+    assert len(set(hashes.tolist())) == 7
+
+def test_unparsed_rows_hash_to_zero():
+    hashes = parse_compositions(['Fe2O3', 'not a formula', '', None]).row_hashes()
+    assert hashes[0] != 0
+    assert hashes[1:].tolist() == [0, 0, 0]
+
+def test_hash_does_not_depend_on_the_batch():
+    alone = parse_compositions(['CeO2']).row_hashes()[0]
+    batch = parse_compositions(['Fe2O3', 'CeO2', 'NiO']).row_hashes()[1]
+    assert alone == batch
+
+def test_unique_broadcasts_back_to_every_row():
+    compositions = parse_compositions(['Fe2O3', 'CeO2', 'Fe4O6', 'CeO2', 'NiO'])
+    first, inverse = compositions.unique()
+    assert len(first) == 3
+    distinct = compositions.take(first)
+    assert (distinct.row_hashes()[inverse] == compositions.row_hashes()).all()
+
+def test_loaded_dataset_featurizes_each_composition_once(tmp_path):
+    formulas = ['Fe2O3', 'CeO2', 'Fe4O6', 'O2Ce', 'NiO', 'not a formula', 'CeO2']
+    path = tmp_path / 'materials.csv'
+    pd.DataFrame({'Substance': formulas}).to_csv(path, index=False)
+    dataset = load_dataset(str(path))
+
+    # Fe2O3, CeO2, NiO and the unparsed row
+    assert dataset.n_distinct == 4
+    assert dataset.dedup_ratio == pytest.approx(7 / 4)
+    assert (np.diff(dataset.composition_hashes.astype(np.float64)) > 0).all()
+    assert dataset.feature_index[0] == dataset.feature_index[2]
+    assert len({dataset.feature_index[i] for i in (1, 3, 6)}) == 1
+
+    # Broadcasting the per-composition features gives what featurizing every row would
+    per_row = MagpieFeaturizer().featurize_matrix(dataset.compositions.to_matrix(), dtype=np.float32)
+    np.testing.assert_array_equal(dataset.features[dataset.feature_index], per_row)
+
+def test_featurize_subset_matches_full_matrix(tmp_path):
+    path = tmp_path / 'materials.csv'
+    pd.DataFrame({'Substance': ['Fe2O3', 'CeO2', 'NiO', 'LaFeO3']}).to_csv(path, index=False)
+    dataset = load_dataset(str(path))
+    rows = np.array([3, 1])
+    subset = dataset.featurize(rows)
+    np.testing.assert_array_equal(subset, dataset.features[rows])
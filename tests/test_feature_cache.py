@@ -0,0 +1,61 @@
+"""
+Tests for the on-disk feature cache shared between processes.
+"""
+import numpy as np
+import pytest
+
+from src.data.feature_cache import FeatureCache
+
+def rows(*values):
+    return np.array([[value] * 3 for value in values], dtype=np.float32)
+
+@pytest.fixture
+def directory(tmp_path):
+    return str(tmp_path / 'features')
+
+def test_round_trip(directory):
+    cache = FeatureCache(3, directory)
+    cache.put(['Fe2O3', None, 'CeO2'], rows(1, 9, 2))
+    features, hits = cache.get(['CeO2', 'NiO', None, 'Fe2O3'])
+    assert hits.tolist() == [True, False, False, True]
+    np.testing.assert_array_equal(features[[0, 3]], rows(2, 1))
+    assert np.isnan(features[1]).all()
+    assert len(FeatureCache(3, directory)) == 2
+
+def test_two_writers_on_one_directory(directory):
+    # Two processes opening the cache before either has written
+    first = FeatureCache(3, directory)
+    second = FeatureCache(3, directory)
+    first.put(['A'], rows(1))
+    second.put(['B'], rows(2))
+
+    for cache in (first, second, FeatureCache(3, directory)):
+        features, hits = cache.get(['A', 'B'])
+        assert hits.all()
+        np.testing.assert_array_equal(features, rows(1, 2))
+
+def test_reader_sees_compaction_by_another_writer(directory):
+    row_bytes = 3 * 4
+    writer = FeatureCache(3, directory, max_bytes=3 * row_bytes)
+    reader = FeatureCache(3, directory, max_bytes=3 * row_bytes)
+    writer.put(['A', 'B', 'C'], rows(1, 2, 3))
+    np.testing.assert_array_equal(reader.get(['C'])[0], rows(3))
+
+    # Going over the limit compacts the file down to the two most recent entries
+    writer.get(['B'])
+    writer.put(['D'], rows(4))
+    features, hits = reader.get(['A', 'B', 'C', 'D'])
+    assert hits.tolist() == [False, True, False, True]
+    np.testing.assert_array_equal(features[hits], rows(2, 4))
+
+def test_clear_is_seen_by_other_instances(directory):
+    first = FeatureCache(3, directory)
+    second = FeatureCache(3, directory)
+    first.put(['A'], rows(1))
+    assert second.get(['A'])[1].all()
+    first.clear()
+    assert not second.get(['A'])[1].any()
+    second.put(['B'], rows(2))
+    features, hits = first.get(['A', 'B'])
+    assert hits.tolist() == [False, True]
+    np.testing.assert_array_equal(features[1:], rows(2))
@@ -0,0 +1,81 @@
+"""
+Tests for the deterministic query planner.
+"""
+import pytest
+
+from src.tools.planner import PlanStep, QueryPlanner
+
+PREFIX = "Read data/test.csv, predict with model/catboost_model.cbm, "
+
+def steps(plan):
+    return [(step.tool, step.argument) for step in plan]
+
+@pytest.fixture
+def planner():
+    return QueryPlanner()
+
+def test_dsl_query(planner):
+    plan = planner.plan("read data/test.csv -> predict model/catboost_model.cbm -> match Ce & !Pb -> top 50 -> save out.csv")
+    assert steps(plan) == [
+        ('read_data', 'data/test.csv'),
+        ('model_predict', 'model/catboost_model.cbm'),
+        ('rule_match', 'Ce & !Pb'),
+        ('select_top', '50'),
+        ('save_result', 'out.csv'),
+    ]
+
+def test_dsl_single_prose_step_is_not_a_plan(planner):
+    assert planner.plan("read the paper about nanozymes") is None
+
+def test_request_with_elements_and_top_k(planner):
+    plan = planner.plan(PREFIX + "keep materials containing Fe or Co and save the top 10 to out.csv")
+    assert steps(plan) == [
+        ('read_data', 'data/test.csv'),
+        ('model_predict', 'model/catboost_model.cbm'),
+        ('rule_match', 'Fe,Co'),
+        ('select_top', 'k=10'),
+        ('save_result', 'out.csv'),
+    ]
+
+def test_request_with_quoted_rule(planner):
+    plan = planner.plan("Using data/test.csv and model/catboost_model.cbm, find materials with rule 'Ce & !Pb' "
+                        "and save to out.csv")
+    assert ('rule_match', 'Ce & !Pb') in steps(plan)
+
+def test_request_with_several_models_is_an_ensemble(planner):
+    plan = planner.plan("Read data/test.csv, predict with model/a.cbm and model/b.cbm, keep probability above 0.8 "
+                        "and save to out.parquet")
+    assert steps(plan) == [
+        ('read_data', 'data/test.csv'),
+        ('ensemble_predict', 'model/a.cbm,model/b.cbm'),
+        ('select_top', 'threshold=0.8'),
+        ('save_result', 'out.parquet'),
+    ]
+
+@pytest.mark.parametrize('rest', [
+    # Element wording the patterns do not take up
+    "match Ce and save to out.csv",
+    "match Ce,Fe and save to out.csv",
+    "materials containing Fe and Co, save to out.csv",
+    # Negations
+    "materials containing Fe but not Co, save to out.csv",
+    "materials without Pb containing Ce, save to out.csv",
+    "containing Ce except oxides, save to out.csv",
+    "containing Ce, excluding toxic ones, save to out.csv",
+    # Constraints
+    "containing Ce with at most 3 elements, save to out.csv",
+    "containing Ce where O > 0.5, save to out.csv",
+    # Nothing selects the rows to save
+    "and save the results to out.csv",
+    # Questions
+    "which materials containing Ce are best? save to out.csv",
+])
+def test_requests_the_planner_does_not_fully_understand_go_to_the_agent(planner, rest):
+    assert planner.plan(PREFIX + rest) is None
+
+def test_request_with_two_input_files_goes_to_the_agent(planner):
+    assert planner.plan("Read data/test.csv and data/more.csv, predict with model/catboost_model.cbm, "
+                        "containing Ce, save to out.csv") is None
+
+def test_plan_step_repr():
+    assert repr(PlanStep('read_data', 'a.csv')) == "PlanStep('read_data', 'a.csv')"
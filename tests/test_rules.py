@@ -0,0 +1,45 @@
+"""
+Tests for the element rule DSL.
+"""
+import numpy as np
+import pytest
+
+from src.data.composition import parse_compositions
+from src.tools.rules import compile_rule, element_bits
+
+FORMULAS = ['CeO2', 'Fe3O4', 'CePbO3', 'Ce', 'CoNiO2', 'Og', 'NiO']
+
+@pytest.fixture(scope='module')
+def masks():
+    return parse_compositions(FORMULAS).element_masks()
+
+def matching(rule, masks):
+    return [formula for formula, keep in zip(FORMULAS, compile_rule(rule).evaluate(masks)) if keep]
+
+def test_element_bits_span_both_words():
+    bits = element_bits(['H', 'Og'])
+    assert bits[0] == 1
+    # Og is element 118, bit 117 is bit 53 of the second word
+    assert bits[1] == np.uint64(1) << np.uint64(53)
+
+@pytest.mark.parametrize('rule, expected', [
+    ('Fe,Co,Ni', ['Fe3O4', 'CoNiO2', 'NiO']),
+    ('Fe | Co', ['Fe3O4', 'CoNiO2']),
+    ('Ce & !Pb', ['CeO2', 'Ce']),
+    ('all(Ce, O) & none(Pb, Cd)', ['CeO2']),
+    ('only(Ce, O)', ['CeO2']),
+    ('only(Ce)', ['Ce']),
+    ('any(Co, Fe) & O', ['Fe3O4', 'CoNiO2']),
+    ('!(Ce | O)', ['Og']),
+    ('Og', ['Og']),
+])
+def test_rule_matches(masks, rule, expected):
+    assert matching(rule, masks) == expected
+
+def test_compile_rule_strips_agent_quoting(masks):
+    assert matching("`'Fe,Co,'`", masks) == ['Fe3O4', 'CoNiO2']
+
+@pytest.mark.parametrize('rule', ['', 'Xx', 'Ce &', '(Ce', 'Ce)', 'all(Ce', 'ce', 'Ce $ Fe', 'only()'])
+def test_malformed_rules_raise(rule):
+    with pytest.raises(ValueError):
+        compile_rule(rule)
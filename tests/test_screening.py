@@ -0,0 +1,58 @@
+"""
+Tests for the streaming screening pipeline's memo of predictions across chunks.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.featurizer import MagpieFeaturizer
+from src.tools.screening import ScreeningPipeline
+
+FORMULAS = ['CeO2', 'Fe2O3', 'NiO', 'Fe4O6', 'CeZrO4', 'O2Ce', 'Co3O4', 'NiO', 'MnO2', 'Fe3O4', 'CeO2', 'Co3O4']
+
+@pytest.fixture(scope='module')
+def model_path(tmp_path_factory):
+    catboost = pytest.importorskip('catboost')
+    n_features = len(MagpieFeaturizer().feature_labels())
+    rng = np.random.default_rng(0)
+    model = catboost.CatBoostClassifier(iterations=5, depth=2, verbose=False, allow_writing_files=False)
+    model.fit(rng.random((40, n_features)), np.arange(40) % 2)
+    path = str(tmp_path_factory.mktemp('model') / 'model.cbm')
+    model.save_model(path)
+    return path
+
+@pytest.fixture
+def input_path(tmp_path):
+    path = tmp_path / 'materials.csv'
+    pd.DataFrame({'Substance': FORMULAS}).to_csv(path, index=False)
+    return str(path)
+
+def screen(model_path, input_path, output_path, memo_capacity=None):
+    pipeline = ScreeningPipeline(model_path, chunk_size=3, incremental=False)
+    if memo_capacity is not None:
+        pipeline.memo_capacity = memo_capacity
+    summary = pipeline.run(input_path, output_path)
+    return summary, pd.read_csv(output_path)
+
+def test_each_composition_is_predicted_once(model_path, input_path, tmp_path):
+    summary, output = screen(model_path, input_path, str(tmp_path / 'out.csv'))
+    assert summary['chunks'] == 4
+    assert summary['rows_distinct'] == summary['compositions_predicted'] == 7
+    assert summary['dedup_ratio'] == pytest.approx(12 / 7, abs=1e-3)
+    assert output['Substance'].tolist() == FORMULAS
+
+def test_full_memo_keeps_predictions_and_stops_counting(model_path, input_path, tmp_path):
+    _, expected = screen(model_path, input_path, str(tmp_path / 'expected.csv'))
+    summary, output = screen(model_path, input_path, str(tmp_path / 'out.csv'), memo_capacity=4)
+    np.testing.assert_allclose(output['pred'], expected['pred'])
+    # Co3O4 arrives after the memo is full, so its repeat in the last chunk is predicted again
+    assert summary['compositions_predicted'] == 8
+    assert summary['rows_distinct'] is None and summary['dedup_ratio'] is None
+
+def test_remember_merges_in_sorted_order(model_path):
+    pipeline = ScreeningPipeline(model_path)
+    pipeline._remember(np.array([2, 8], dtype=np.uint64), np.array([0.2, 0.8]))
+    pipeline._remember(np.array([1, 5, 9], dtype=np.uint64), np.array([0.1, 0.5, 0.9]))
+    assert pipeline._known_hashes.tolist() == [1, 2, 5, 8, 9]
+    assert pipeline._known_pred.tolist() == [0.1, 0.2, 0.5, 0.8, 0.9]
+    assert pipeline._known_seen.all()
@@ -4,10 +4,12 @@ Main training script for material properties prediction model.
 import os
 import argparse
 from src.models.trainer import ModelTrainer
+from src.models.oblivious import export_catboost_model
+from src.models.search import HyperparameterSearch, search_result_path, write_search_result
 from src.data.processor import DataProcessor
 from src.utils.logger import setup_logger
 from src.utils.helpers import ensure_directory_exists
-from config.settings import TRAINING_CONFIG
+from config.settings import SEARCH_CONFIG, TRAINING_CONFIG
 
 logger = setup_logger("material_analysis.train")
 
@@ -23,8 +25,28 @@ def parse_arguments():
                         help=f'Proportion of the dataset to include in the test split (default: {TRAINING_CONFIG["TEST_SIZE"]})')
     parser.add_argument('--random-state', type=int, default=TRAINING_CONFIG['RANDOM_STATE'],
                         help=f'Random state for reproducibility (default: {TRAINING_CONFIG["RANDOM_STATE"]})')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Continue the existing model when only a few training rows changed, '
+                             'otherwise retrain from scratch')
+    parser.add_argument('--warm-start-iterations', type=int, default=TRAINING_CONFIG['WARM_START']['ITERATIONS'],
+                        help=f'Trees added when continuing a model (default: {TRAINING_CONFIG["WARM_START"]["ITERATIONS"]})')
+    parser.add_argument('--search', action='store_true',
+                        help='Pick learning rate, depth, L2 regularization and tree count by stratified '
+                             'k-fold cross-validation before training')
+    parser.add_argument('--folds', type=int, default=SEARCH_CONFIG['N_FOLDS'],
+                        help=f'Cross-validation folds for --search (default: {SEARCH_CONFIG["N_FOLDS"]})')
+    parser.add_argument('--time-budget', type=float, default=SEARCH_CONFIG['TIME_BUDGET_SECONDS'],
+                        help=f'Seconds after which --search starts no new fits (default: {SEARCH_CONFIG["TIME_BUDGET_SECONDS"]})')
+    parser.add_argument('--jobs', type=int, default=SEARCH_CONFIG['N_JOBS'],
+                        help='Worker processes for --search (default: all CPUs)')
+    parser.add_argument('--export-arrays', action='store_true',
+                        help='Only export the existing --model-output model to its NumPy .npz artifact')
     
-    return parser.parse_args()
+    args = parser.parse_args()
+    if args.search and args.incremental:
+        # A continued model keeps its trained parameters, so searched ones could not be applied
+        parser.error('--search cannot be combined with --incremental; run --search for a full retrain')
+    return args
 
 def main():
     """Main function to train the model."""
@@ -33,6 +55,15 @@ def main():
     # Parse arguments
     args = parse_arguments()
     
+    if args.export_arrays:
+        try:
+            artifact = export_catboost_model(args.model_output)
+            print(f"Model arrays successfully exported to: {artifact}")
+        except Exception as e:
+            logger.error(f"Error exporting model arrays: {str(e)}")
+            print(f"Error exporting model arrays: {str(e)}")
+        return
+    
     # Verify that training data exists
     if not os.path.exists(args.data_path):
         logger.error(f"Training data file not found: {args.data_path}")
@@ -51,24 +82,52 @@ def main():
             args.data_path, 
             target_column='label',
             test_size=args.test_size,
-            random_state=args.random_state
+            random_state=args.random_state,
+            # A random split of the grown file would move rows the previous model trained on into the test set
+            stable=args.incremental
         )
         
+        # Pick the model parameters by cross-validation on the training split
+        search_result = None
+        model_params = {}
+        if args.search:
+            logger.info("Running cross-validated hyperparameter search")
+            search = HyperparameterSearch(n_folds=args.folds, time_budget=args.time_budget, n_jobs=args.jobs,
+                                          random_state=args.random_state)
+            search_result = search.run(X_train, y_train)
+            model_params = search_result['best_params']
+            logger.info(f"Best parameters: {model_params} (mean log loss {search_result['best_mean_logloss']:.4f}, "
+                        f"{search_result['candidates_evaluated']} of {search_result['candidates_total']} candidates "
+                        f"in {search_result['elapsed_seconds']:.1f}s)")
+        
         # Initialize model trainer
-        trainer = ModelTrainer(random_state=args.random_state)
+        trainer = ModelTrainer(random_state=args.random_state, **model_params)
         
         # Train model
+        model_path = args.model_output
         logger.info("Training model")
-        trainer.train(X_train, y_train)
+        if args.incremental:
+            mode = trainer.train_incremental(X_train, y_train, model_path,
+                                             warm_start_iterations=args.warm_start_iterations)
+            if mode == 'unchanged':
+                print(f"Training data unchanged; model at {model_path} is up to date")
+                return
+        else:
+            trainer.train(X_train, y_train)
         
         # We still evaluate the model but don't display metrics
-        trainer.evaluate(X_test, y_test, log_metrics=False)
+        if len(X_test):
+            trainer.evaluate(X_test, y_test, log_metrics=False)
         
         # Save model
-        model_path = args.model_output
         ensure_directory_exists(model_path)
         trainer.save_model(model_path)
         logger.info(f"Model saved to: {model_path}")
+        if search_result is not None:
+            write_search_result(search_result, search_result_path(model_path))
+            logger.info(f"Search result saved to: {search_result_path(model_path)}")
+        # Keep the NumPy artifact in step with the model so inference does not need catboost
+        export_catboost_model(model_path)
         print(f"Model successfully trained and saved to: {model_path}")
         
         logger.info("Training process completed successfully")